@@ -0,0 +1,173 @@
+"""
+Trade history retention: cold trades go to Parquet, hot ones stay in SQLite.
+
+``archive_trades`` moves trades older than ``days`` out of
+``data/trading_history.db`` into zstd-compressed Parquet files partitioned
+by day (``data/archive/trades/date=YYYY-MM-DD/trades-<first>-<last>.parquet``),
+deletes them from the live table and vacuums it. ``bot_summary`` is
+cumulative, so the per-bot totals are not affected.
+
+``query_trades`` reads both tiers as one table: the hot rows from SQLite
+and, only when needed, the archived partitions in the requested range
+(newest day first, stopping as soon as ``limit`` rows are found).
+
+Usage:
+    python archive.py --days 90            # Archivar y compactar la DB
+"""
+import argparse
+import glob
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import database
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['id', 'bot_name', 'timestamp', 'action', 'price', 'pnl_pct', 'balance', 'win_rate',
+           'daily_drawdown', 'created_at']
+SCHEMA = pa.schema([('id', pa.int64()), ('bot_name', pa.string()), ('timestamp', pa.timestamp('us')),
+                    ('action', pa.string()), ('price', pa.float64()), ('pnl_pct', pa.float64()),
+                    ('balance', pa.float64()), ('win_rate', pa.float64()), ('daily_drawdown', pa.float64()),
+                    ('created_at', pa.timestamp('us'))])
+
+
+def archive_dir():
+    """Archive next to the live DB (follows ``database.DB_PATH``)."""
+    return os.path.join(os.path.dirname(database.DB_PATH), "archive", "trades")
+
+
+def _frame(rows):
+    df = pd.DataFrame([tuple(r) for r in rows], columns=COLUMNS)
+    for col in ('timestamp', 'created_at'):
+        df[col] = pd.to_datetime(df[col], format='ISO8601').astype('datetime64[us]')
+    return df
+
+
+def archive_trades(days=90, now=None, vacuum=True):
+    """
+    Move trades older than ``days`` to Parquet; returns how many were archived.
+
+    Files are written before the rows are deleted, so an interrupted run
+    never loses trades (at worst they are archived twice; ``query_trades``
+    drops duplicate ids).
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    conn = database.get_connection()
+    with database.get_db_connection():
+        rows = conn.execute(f'SELECT {", ".join(COLUMNS)} FROM trades WHERE timestamp < ? ORDER BY id',
+                            (cutoff,)).fetchall()
+    if not rows:
+        return 0
+
+    df = _frame(rows)
+    root = archive_dir()
+    for day, part in df.groupby(df['timestamp'].dt.strftime('%Y-%m-%d'), sort=True):
+        folder = os.path.join(root, f"date={day}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"trades-{part['id'].min()}-{part['id'].max()}.parquet")
+        table = pa.Table.from_pandas(part, schema=SCHEMA, preserve_index=False)
+        pq.write_table(table, path + ".tmp", compression='zstd')
+        os.replace(path + ".tmp", path)
+
+    with database.get_db_connection():
+        conn.execute('DELETE FROM trades WHERE timestamp < ? AND id <= ?', (cutoff, int(df['id'].max())))
+        conn.commit()
+    if vacuum:
+        # Devolver el espacio al sistema (y vaciar el WAL)
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    logger.info(f"📦 {len(df)} operaciones anteriores a {cutoff:%Y-%m-%d} archivadas en {root}")
+    return len(df)
+
+
+def _partitions(start=None, end=None):
+    """Day folders of the archive between ``start`` and ``end``, newest first."""
+    first = f"{pd.Timestamp(start):%Y-%m-%d}" if start is not None else None
+    last = f"{pd.Timestamp(end):%Y-%m-%d}" if end is not None else None
+    folders = sorted(glob.glob(os.path.join(archive_dir(), "date=*")), reverse=True)
+    return [f for f in folders
+            if (first is None or os.path.basename(f)[5:] >= first) and (last is None or os.path.basename(f)[5:] <= last)]
+
+
+def _read_archive(bot_name=None, start=None, end=None, limit=None, skip_ids=()):
+    filters = []
+    if start is not None:
+        filters.append(ds.field('timestamp') >= pd.Timestamp(start).to_datetime64())
+    if end is not None:
+        filters.append(ds.field('timestamp') <= pd.Timestamp(end).to_datetime64())
+    if bot_name:
+        filters.append(ds.field('bot_name') == bot_name)
+    if len(skip_ids):
+        # Filas ya leídas de la DB (archivado interrumpido): no cuentan para ``limit``
+        filters.append(~ds.field('id').isin(list(skip_ids)))
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    # Un día cada vez, del más reciente hacia atrás: las particiones más antiguas no se abren
+    tables, found = [], 0
+    for folder in _partitions(start, end):
+        files = glob.glob(os.path.join(folder, "*.parquet"))
+        if not files:
+            continue
+        table = ds.dataset(files, format='parquet', schema=SCHEMA).to_table(columns=COLUMNS, filter=expression)
+        tables.append(table)
+        found += table.num_rows
+        if limit is not None and found >= limit:
+            break
+    if not tables:
+        return _frame([])
+    return pa.concat_tables(tables).to_pandas()
+
+
+def query_trades(bot_name=None, start=None, end=None, limit=None) -> pd.DataFrame:
+    """
+    Trades of ``bot_name`` (all bots by default) between ``start`` and
+    ``end``, newest first, from the live DB and the Parquet archive.
+    """
+    where, params = [], []
+    for clause, value in (('bot_name = ?', bot_name), ('timestamp >= ?', start), ('timestamp <= ?', end)):
+        if value is not None:
+            where.append(clause)
+            params.append(str(pd.Timestamp(value)) if clause != 'bot_name = ?' else value)
+    sql = f'SELECT {", ".join(COLUMNS)} FROM trades'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY timestamp DESC, id DESC'
+    if limit is not None:
+        sql += f' LIMIT {int(limit)}'
+    with database.get_db_connection() as conn:
+        hot = _frame(conn.execute(sql, params).fetchall())
+
+    # El archivo solo guarda operaciones más antiguas que las de la DB
+    if limit is not None and len(hot) >= limit:
+        return hot
+    if limit is None:
+        cold = _read_archive(bot_name, start, end)
+    else:
+        cold = _read_archive(bot_name, start, end, limit - len(hot), hot['id'].tolist())
+    if cold.empty:
+        return hot
+    trades = pd.concat([hot, cold], ignore_index=True) if len(hot) else cold
+    trades = trades.drop_duplicates('id').sort_values(['timestamp', 'id'], ascending=False)
+    return trades.head(limit).reset_index(drop=True) if limit is not None else trades.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiva el histórico de operaciones en Parquet")
+    parser.add_argument('--days', type=int, default=90, help="Días que se quedan en la DB")
+    parser.add_argument('--no-vacuum', action='store_true', help="No compactar la DB al terminar")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    database.init_database()
+    archive_trades(args.days, vacuum=not args.no_vacuum)
+
+
+if __name__ == "__main__":
+    main()
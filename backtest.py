@@ -6,6 +6,7 @@ import os
 from stable_baselines3 import PPO
 from trading_env import TradingEnv
 from config import get_asset_config
+from downsample import downsample
 
 def calculate_metrics(net_worths, steps_per_day=96):
     """
@@ -151,7 +152,9 @@ def run_backtest(asset_name="BTC", model_path=None, data_path=None, chart_name=N
     
     # Plotting
     plt.figure(figsize=(12, 6))
-    plt.plot(net_worths, label='Equity Curve', color='#00ffcc', linewidth=2)
+    # Máx. 1000 puntos (mínimo y máximo de cada tramo: los drawdowns se siguen viendo)
+    plot_steps = downsample(net_worths)
+    plt.plot(plot_steps, net_worths[plot_steps], label='Equity Curve', color='#00ffcc', linewidth=2)
     plt.axhline(y=env.initial_balance, color='white', linestyle='--', alpha=0.5)
     
     title_text = (f"{asset_name} | Ret: {metrics['return_pct']:.2f}% | Sharpe: {metrics['sharpe']:.2f} | "
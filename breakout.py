@@ -0,0 +1,270 @@
+"""
+Event-driven volatility breakout monitor for the SOL sniper.
+
+``BreakoutMonitor`` keeps the breakout level (max high of the previous
+``breakout_period`` closed candles) in a monotonic deque and the trend EMA
+incrementally, so every price tick is checked against the entry rule, the
+hard stop and the trailing stop at constant cost instead of once per bar on
+a 500-candle frame.
+
+The strategy itself is one state-machine kernel (``_step``) shared by the
+live bots (single-step, ``breakout_step``) and the optimizer (bulk,
+``simulate``), compiled with numba when it is installed.
+
+Prices come from a pluggable feed: any iterable of ``(epoch_seconds, price)``.
+``PollingPriceFeed`` polls the exchange ticker every few seconds and
+``candle_ticks`` turns stored candles into a tick stream (tests / replay).
+"""
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import EMA, RollingMax
+
+try:
+    from numba import njit
+except ImportError:  # Sin numba el kernel corre en Python puro (mismos resultados)
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda fn: fn)
+
+BAR_SECONDS = 15 * 60
+COMMISSION = 0.0005   # 0.05% en la compra y en la venta
+
+
+# Estado del kernel (float64[6]) y eventos
+CASH, SHARES, ENTRY, HIGHEST, TRADES, WINS = range(6)
+HOLD, BUY, STOP_LOSS, TRAILING_STOP = range(4)
+
+
+@njit(cache=True)
+def _step(state, price, level, ema, trend_ok, stop_loss, ts_trigger, ts_dist, allocation, commission):
+    """Advance ``state`` in place by one price; returns the event code."""
+    shares = state[SHARES]
+    if shares > 0:
+        if price > state[HIGHEST]:
+            state[HIGHEST] = price
+        entry = state[ENTRY]
+        event = HOLD
+        if (price - entry) / entry < -stop_loss:
+            event = STOP_LOSS
+        if (state[HIGHEST] - entry) / entry >= ts_trigger and (state[HIGHEST] - price) / state[HIGHEST] >= ts_dist:
+            event = TRAILING_STOP
+        if event != HOLD:
+            revenue = shares * price * (1 - commission)
+            state[CASH] += revenue
+            if revenue > shares * entry:
+                state[WINS] += 1
+            state[TRADES] += 1
+            state[SHARES] = 0.0
+            state[ENTRY] = 0.0
+            state[HIGHEST] = 0.0
+        # Tras una venta no se vuelve a entrar en la misma evaluación
+        return event
+
+    # Entrada: ruptura del máximo de N velas con la tendencia a favor
+    if price > level and price > ema and trend_ok:
+        invest = state[CASH] * allocation
+        if invest < 10:
+            invest = state[CASH]
+        if state[CASH] >= invest * (1 + commission):
+            state[SHARES] = invest / price * (1 - commission)
+            state[CASH] -= invest
+            state[ENTRY] = price
+            state[HIGHEST] = price
+            return BUY
+    return HOLD
+
+
+@njit(cache=True)
+def _run(state, closes, levels, emas, trend, start, stop_loss, ts_trigger, ts_dist, allocation, commission, equity):
+    for i in range(start, len(closes)):
+        price = closes[i]
+        equity[i - start] = state[CASH] + state[SHARES] * price
+        _step(state, price, levels[i], emas[i], trend[i], stop_loss, ts_trigger, ts_dist, allocation, commission)
+
+
+def new_state(balance=200.0):
+    return np.array([balance, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+
+def simulate(closes, levels, emas, params, trend=None, start=0, balance=200.0, allocation=0.60,
+             commission=COMMISSION):
+    """
+    Bulk mode: run the strategy over whole arrays (optimizer / backtests).
+
+    Returns ``(state, equity)`` where ``equity[k]`` is the equity before the
+    decision at bar ``start + k``.
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    trend = np.ones(len(closes), dtype=np.bool_) if trend is None else np.ascontiguousarray(trend, dtype=np.bool_)
+    state = new_state(balance)
+    equity = np.empty(max(len(closes) - start, 0))
+    _run(state, closes, np.ascontiguousarray(levels, dtype=np.float64), np.ascontiguousarray(emas, dtype=np.float64),
+         trend, start, float(params['stop_loss']), float(params['ts_trigger']), float(params['ts_dist']),
+         float(allocation), float(commission), equity)
+    return state, equity
+
+
+def breakout_step(position, balance, price, level, ema, params, allocation=0.60, commission=COMMISSION):
+    """
+    Single-step mode for the live bots: one evaluation of the same kernel at ``price``.
+
+    ``position`` is None or ``{'entry', 'shares', 'stop_loss', 'highest'}``.
+    Returns ``(position, balance, event)``; ``event`` is None, a ``BUY`` dict
+    (``price``, ``shares``, ``invest``, ``stop_loss``) or a ``SELL`` dict
+    (``price``, ``shares``, ``reason``, ``net_profit``, ``balance``).
+    """
+    state = new_state(balance)
+    if position is not None:
+        state[SHARES], state[ENTRY], state[HIGHEST] = position['shares'], position['entry'], position['highest']
+    code = _step(state, float(price), float(level), float(ema), True, float(params['stop_loss']),
+                 float(params['ts_trigger']), float(params['ts_dist']), float(allocation), float(commission))
+    cash = float(state[CASH])
+
+    if code == BUY:
+        sl_price = price * (1 - params['stop_loss'])
+        position = {'entry': float(state[ENTRY]), 'shares': float(state[SHARES]), 'stop_loss': sl_price,
+                    'highest': float(state[HIGHEST])}
+        return position, cash, {'type': 'BUY', 'price': price, 'shares': position['shares'],
+                                'invest': balance - cash, 'stop_loss': sl_price}
+    if code == HOLD:
+        if position is not None:
+            position['highest'] = float(state[HIGHEST])
+        return position, cash, None
+
+    reason = "STOP LOSS" if code == STOP_LOSS else "TRAILING STOP (Locked Profit)"
+    net_profit = (cash - balance) - position['shares'] * position['entry']
+    return None, cash, {'type': 'SELL', 'price': price, 'shares': position['shares'], 'reason': reason,
+                        'net_profit': net_profit, 'balance': cash}
+
+
+def trailing_stop_price(position, params):
+    """Active trailing stop of ``position``, or None while below the trigger."""
+    if position is None:
+        return None
+    if (position['highest'] - position['entry']) / position['entry'] < params['ts_trigger']:
+        return None
+    return position['highest'] * (1 - params['ts_dist'])
+
+
+class BreakoutMonitor:
+    def __init__(self, params, position=None, balance=200.0, allocation=0.60, bar_seconds=BAR_SECONDS):
+        self.params = params
+        self.position = position
+        self.balance = balance
+        self.allocation = allocation
+        self.bar_seconds = bar_seconds
+        self._level = RollingMax(params['breakout_period'])
+        self._ema = EMA(params['ema_period'])
+        # Vela en formación
+        self.bar_open = None
+        self.bar_high = math.nan
+        self.bar_close = math.nan
+
+    @property
+    def level(self):
+        """Breakout level: max high of the previous ``breakout_period`` closed candles."""
+        return self._level.value
+
+    def ema(self, price):
+        """EMA including ``price`` as the close of the forming candle (same as the pandas frame)."""
+        prev = self._ema.value
+        if math.isnan(prev):
+            return float(price)
+        return self._ema.alpha * price + (1.0 - self._ema.alpha) * prev
+
+    def warmup(self, candles: pd.DataFrame):
+        """Seed from a candle frame (``timestamp``, ``high``, ``close``); the last row is the forming one."""
+        highs = candles['high'].to_numpy(dtype='float64')
+        closes = candles['close'].to_numpy(dtype='float64')
+        for high, close in zip(highs[:-1], closes[:-1]):
+            self._level.update(high)
+            self._ema.update(close)
+        if len(candles):
+            self.bar_open = candles['timestamp'].iloc[-1].timestamp()
+            self.bar_high, self.bar_close = highs[-1], closes[-1]
+
+    def bar_of(self, ts):
+        return ts - ts % self.bar_seconds
+
+    def rolls_over(self, ts) -> bool:
+        """True if a tick at ``ts`` belongs to a later candle than the forming one."""
+        return self.bar_open is not None and self.bar_of(ts) > self.bar_open
+
+    def close_bar(self, high=None, close=None):
+        """Close the forming candle, with the exchange's values if given (ticks can miss the true high)."""
+        if self.bar_open is None:
+            return
+        self._level.update(self.bar_high if high is None else high)
+        self._ema.update(self.bar_close if close is None else close)
+        self.bar_open = None
+
+    def roll_to(self, candles: pd.DataFrame, ts):
+        """
+        Close the forming candle and every later one in ``candles`` before the
+        bar of ``ts``, with the exchange's high / close: after a feed gap the
+        skipped bars still reach the breakout level and the EMA.
+        """
+        if self.bar_open is None:
+            return
+        times = candles['timestamp'].map(pd.Timestamp.timestamp).to_numpy()
+        closed = candles[(times >= self.bar_open) & (times < self.bar_of(ts))]
+        if len(closed) == 0 or closed['timestamp'].iloc[0].timestamp() != self.bar_open:
+            # Sin la vela del exchange: se cierra con los ticks vistos
+            self.close_bar()
+        for high, close in zip(closed['high'].to_numpy(dtype='float64'), closed['close'].to_numpy(dtype='float64')):
+            self._level.update(high)
+            self._ema.update(close)
+        self.bar_open = None
+
+    def on_tick(self, ts, price):
+        """Advance with one price; returns the ``breakout_step`` event (or None)."""
+        price = float(price)
+        if self.rolls_over(ts):
+            self.close_bar()
+        if self.bar_open is None:
+            self.bar_open = self.bar_of(ts)
+            self.bar_high = self.bar_close = price
+        else:
+            self.bar_high = max(self.bar_high, price)
+            self.bar_close = price
+
+        self.position, self.balance, event = breakout_step(
+            self.position, self.balance, price, self.level, self.ema(price), self.params, self.allocation)
+        return event
+
+
+class PollingPriceFeed:
+    """Last traded price from ``client.fetch_ticker`` every ``interval`` seconds."""
+
+    def __init__(self, client, symbol, interval=2.0, clock=time):
+        self.client = client
+        self.symbol = symbol
+        self.interval = interval
+        self.clock = clock
+
+    def __iter__(self):
+        while True:
+            try:
+                ticker = self.client.fetch_ticker(self.symbol)
+                ts = ticker.get('timestamp')
+                yield (ts / 1000.0 if ts else self.clock.time()), float(ticker['last'])
+            except Exception as e:
+                print(f"⚠️ Error leyendo precio de {self.symbol}: {e}")
+            self.clock.sleep(self.interval)
+
+
+def candle_ticks(candles: pd.DataFrame, bar_seconds=BAR_SECONDS):
+    """
+    Stand-in feed from stored candles: open, the nearer extreme, the other
+    extreme and close of every candle, spread across the bar.
+    """
+    times = candles['timestamp'].map(pd.Timestamp.timestamp).to_numpy()
+    cols = [candles[c].to_numpy(dtype='float64') for c in ('open', 'high', 'low', 'close')]
+    step = bar_seconds / 4
+    for ts, o, h, l, c in zip(times, *cols):
+        path = (o, l, h, c) if c >= o else (o, h, l, c)
+        for k, price in enumerate(path):
+            yield ts + k * step, price
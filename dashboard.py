@@ -3,7 +3,8 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
-from database import get_bot_summary, get_all_trades
+from dashboard_data import DashboardData
+from live_feed import subscriber_from_env
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(
@@ -73,21 +74,49 @@ with col_head2:
         st.rerun()
 
 # --- CARGA DE DATOS ---
+# Una sola caché por servidor para todos los visores; solo se recarga tras nuevas operaciones
+@st.cache_resource
+def dashboard_data():
+    return DashboardData(page_size=15)
+
+# Estado en vivo que publican los bots (UDP, live_feed.py): un receptor por servidor
+@st.cache_resource
+def live_feed():
+    return subscriber_from_env()
+
+# Solo este bloque se vuelve a ejecutar cada segundo, desde memoria (sin consultar la DB)
+@st.fragment(run_every=1)
+def live_panel():
+    feed = live_feed()
+    _, states = feed.snapshot()
+    if not states:
+        st.caption(f"📡 Sin datos en vivo ({feed.error or f'escuchando en {feed.host}:{feed.port}'})")
+        return
+    now = datetime.now().timestamp()
+    rows = [{
+        'Bot': bot,
+        'Precio ($)': s.get('price'),
+        'Posición': "🟢 LONG" if s.get('position') else "⚪ FLAT",
+        'Entrada ($)': s.get('entry_price'),
+        'Equity ($)': s.get('equity'),
+        'PnL Flotante ($)': (s['equity'] - s['balance']) if s.get('equity') is not None and s.get('balance') is not None else None,
+        'DD Diario %': s.get('daily_drawdown'),
+        'Hace (s)': round(now - s['received'], 1),
+    } for bot, s in sorted(states.items())]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
 try:
-    summary_data = get_bot_summary()
-    trades_data = get_all_trades(limit=1000)
-    
-    # DataFrames
-    df_summary = pd.DataFrame(summary_data, columns=['bot_name', 'total_trades', 'wins', 'losses', 'avg_pnl', 'current_balance'])
-    df_trades = pd.DataFrame(trades_data, columns=['id', 'bot_name', 'timestamp', 'action', 'price', 'pnl_pct', 'balance', 'win_rate', 'daily_drawdown', 'created_at'])
+    data = dashboard_data()
+    df_summary, _ = data.refresh()
+    kpis = data.kpis
 
-    # --- CALCULOS GLOBALES ---
+    # --- CALCULOS GLOBALES (agregados en SQLite, no sobre las filas cargadas) ---
     initial_capital = 300000.00
-    current_total_balance = df_summary['current_balance'].sum() if not df_summary.empty else initial_capital
+    current_total_balance = kpis['total_balance'] if kpis['active_bots'] else initial_capital
     total_pnl_abs = current_total_balance - initial_capital
     total_roi_pct = (total_pnl_abs / initial_capital) * 100
     
-    active_bots_count = len(df_summary)
+    active_bots_count = kpis['active_bots']
 
     # --- TOP ROW: GLOBAL KPIs ---
     st.markdown("---")
@@ -100,31 +129,17 @@ try:
         delta_color="normal"
     )
 
-    # Calcular PnL de hoy (aprox)
-    today_str = datetime.now().strftime('%Y-%m-%d')
-    df_trades['timestamp'] = pd.to_datetime(df_trades['timestamp'])
-    today_pnl = 0.0
-    
-    if not df_trades.empty:
-        today_trades = df_trades[df_trades['timestamp'].dt.date == datetime.now().date()]
-        # Aproximación basada en logs de VENTA hoy
-        today_sells = today_trades[today_trades['action'] == 'VENTA']
-        # El PnL real por operación no está explícito en monto, pero podemos estimarlo o sumarlo si lo tuviéramos
-        # Por ahora usaremos el conteo de operaciones hoy
-        ops_today = len(today_trades)
-    
     kpi2.metric(
         label="📊 Operaciones Hoy",
-        value=ops_today if 'ops_today' in locals() else 0,
-        delta="Actividad Reciente",
+        value=kpis['ops_today'],
+        delta=f"{kpis['sells_today']} cierres",
         delta_color="off"
     )
 
-    best_bot = df_summary.loc[df_summary['current_balance'].idxmax()] if not df_summary.empty else None
     kpi3.metric(
         label="🏆 Bot Líder",
-        value=best_bot['bot_name'] if best_bot is not None else "-",
-        delta=f"${best_bot['current_balance']:,.2f}" if best_bot is not None else "-"
+        value=kpis['best_bot'] or "-",
+        delta=f"${kpis['best_balance']:,.2f}" if kpis['best_bot'] else "-"
     )
 
     kpi4.metric(
@@ -134,15 +149,19 @@ try:
         delta_color="off"
     )
 
+    # --- ESTADO EN VIVO ---
+    st.subheader("📡 En Vivo")
+    live_panel()
+
     # --- SECCIÓN GRAFICA ---
     st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
     c_chart, c_details = st.columns([2, 1])
 
     with c_chart:
         st.subheader("📈 Curva de Rendimiento Comparada")
-        if not df_trades.empty:
-            # Filtrar solo entradas de venta o sync que actualizan balance
-            df_balance_hist = df_trades[df_trades['action'].isin(['VENTA', 'SYNC'])].copy()
+        if not data.history.empty:
+            # Último balance (VENTA / SYNC) de cada hora, agregado en la DB (tabla balance_history)
+            df_balance_hist = data.history
             
             # Crear gráfica multilínea
             fig = px.line(
@@ -150,7 +169,7 @@ try:
                 x="timestamp", 
                 y="balance", 
                 color="bot_name",
-                markers=True,
+                markers=len(df_balance_hist) <= 200,
                 color_discrete_map={
                     "BTC": "#f7931a",
                     "ETH": "#627eea",
@@ -200,9 +219,21 @@ try:
     st.markdown("---")
     st.subheader("📜 Historial de Operaciones (Live Feed)")
 
-    if not df_trades.empty:
+    # Paginación por cursor: cada visor guarda la pila de cursores de las páginas que ha visto
+    cursors = st.session_state.setdefault('feed_cursors', [None])
+    df_page, next_cursor = data.feed_page(cursors[-1])
+    nav_newer, nav_page, nav_older = st.columns([1, 2, 1])
+    if nav_newer.button("⬅️ Más recientes", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    nav_page.markdown(f"<div style='text-align:center; color:#78909c;'>Página {len(cursors)}</div>", unsafe_allow_html=True)
+    if nav_older.button("Más antiguas ➡️", disabled=next_cursor is None, use_container_width=True):
+        cursors.append(next_cursor)
+        st.rerun()
+
+    if not df_page.empty:
         # Formatear tabla para visualización
-        df_display = df_trades.copy()
+        df_display = df_page.copy()
         df_display['timestamp'] = df_display['timestamp'].dt.strftime('%d %b %H:%M')
         
         # Colorear PnL
@@ -213,11 +244,14 @@ try:
             return ''
 
         # Seleccionar columnas clave
-        df_show = df_display[['timestamp', 'bot_name', 'action', 'price', 'pnl_pct', 'balance', 'win_rate']].head(15)
+        df_show = df_display[['timestamp', 'bot_name', 'action', 'price', 'pnl_pct', 'balance', 'win_rate']]
         df_show.columns = ['Fecha/Hora', 'Activo', 'Acción', 'Precio ($)', 'PnL %', 'Balance ($)', 'Win Rate %']
 
+        styler = df_show.style
+        # Styler.applymap pasó a llamarse Styler.map (pandas 2.1) y ya no existe en pandas 3
+        styler = styler.map(color_pnl, subset=['PnL %']) if hasattr(styler, 'map') else styler.applymap(color_pnl, subset=['PnL %'])
         st.dataframe(
-            df_show.style.applymap(color_pnl, subset=['PnL %']),
+            styler,
             use_container_width=True,
             hide_index=True
         )
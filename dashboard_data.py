@@ -0,0 +1,80 @@
+"""
+Shared, incremental data layer for the Streamlit dashboard.
+
+One ``DashboardData`` per server process (``st.cache_resource``) serves every
+viewer. A rerun costs one ``SELECT MAX(id)``: the summary, the KPIs, the
+balance curve (all aggregated in SQLite) and the first page of the trade
+feed are only reloaded when that version changes. Older pages are read on
+demand with ``feed_page``, with the same ``(timestamp, id)`` keyset order.
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import database
+from downsample import downsample_groups
+
+HISTORY_DAYS = 30
+CHART_POINTS = 500   # Por bot en la curva de balance
+SUMMARY_COLUMNS = ['bot_name', 'total_trades', 'wins', 'losses', 'avg_pnl', 'current_balance']
+TRADE_COLUMNS = ['id', 'bot_name', 'timestamp', 'action', 'price', 'pnl_pct', 'balance', 'win_rate',
+                 'daily_drawdown', 'created_at']
+
+
+def _trades_frame(rows):
+    df = pd.DataFrame([tuple(r) for r in rows], columns=TRADE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return df
+
+
+class DashboardData:
+    def __init__(self, page_size=15, history_days=HISTORY_DAYS):
+        """Keeps the first ``page_size`` trades of the feed (newest first), the bot summary, KPIs and balance curve."""
+        self.page_size = page_size
+        self.history_days = history_days
+        self.version = None
+        self.summary = pd.DataFrame(columns=SUMMARY_COLUMNS)
+        self.trades = _trades_frame([])
+        self.next_cursor = None
+        self.kpis = {}
+        self.history = pd.DataFrame(columns=['bot_name', 'timestamp', 'balance'])
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """``(summary, trades)`` (and ``kpis`` / ``history``); beyond the version check, hits the DB only after writes."""
+        # Cambia con cada operación y al pasar de día (operaciones de hoy)
+        version = (database.get_last_trade_id(), date.today())
+        if version == self.version:
+            return self.summary, self.trades
+        # Varios visores a la vez: uno recarga, el resto espera y reutiliza
+        with self._lock:
+            if version != self.version:
+                self._load(version)
+            return self.summary, self.trades
+
+    def _load(self, version):
+        self.kpis = database.get_dashboard_kpis(version[1])
+        history = database.get_balance_history(start=datetime.now() - timedelta(days=self.history_days))
+        self.history = pd.DataFrame([tuple(r) for r in history], columns=['bot_name', 'timestamp', 'balance'])
+        self.history['timestamp'] = pd.to_datetime(self.history['timestamp'], format='ISO8601')
+        # Se decima una vez por versión y todos los visores reciben la misma serie
+        self.history = downsample_groups(self.history, 'balance', 'bot_name', CHART_POINTS)
+
+        rows, self.next_cursor = database.get_trades_page(limit=self.page_size)
+        self.trades = _trades_frame(rows)
+        self.summary = pd.DataFrame([tuple(r) for r in database.get_bot_summary()], columns=SUMMARY_COLUMNS)
+        self.version = version
+        self.loads += 1
+
+    def feed_page(self, cursor=None, limit=None):
+        """
+        ``(page, next_cursor)`` of the trade feed, newest first. The first
+        page comes from the cache; later ones from the DB by cursor.
+        """
+        limit = limit or self.page_size
+        if cursor is None and limit == self.page_size and self.version is not None:
+            return self.trades, self.next_cursor
+        rows, next_cursor = database.get_trades_page(cursor=cursor, limit=limit)
+        return _trades_frame(rows), next_cursor
@@ -1,17 +1,79 @@
 import sqlite3
 import os
-from datetime import datetime
+import logging
+import threading
+from datetime import datetime, timedelta
 from contextlib import contextmanager
+from live_loop import BatchWriter
+from metrics import METRICS, PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "data/trading_history.db"
 
+# Sentencias fijas: sqlite3 las prepara una vez por conexión (caché de sentencias)
+INSERT_TRADE = '''
+    INSERT INTO trades (bot_name, timestamp, action, price, pnl_pct, balance, win_rate, daily_drawdown)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_EQUITY = '''
+    INSERT INTO equity (bot_name, timestamp, equity, balance, position)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Agregados de la serie de equity (resolución -> segundos por punto)
+RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+_BUCKETS = {'1m': "strftime('%Y-%m-%d %H:%M:00', NEW.timestamp)",
+            '1h': "strftime('%Y-%m-%d %H:00:00', NEW.timestamp)",
+            '1d': "date(NEW.timestamp)"}
+
+# Bots con operaciones, sin los modelos en sombra
+LIVE_BOTS = "total_trades > 0 AND bot_name NOT LIKE '%\\_SHADOW\\_%' ESCAPE '\\'"
+
+UPSERT_BALANCE = '''
+            INSERT INTO balance_history (bot_name, bucket, timestamp, balance)
+            {source}
+            ON CONFLICT(bot_name, bucket) DO UPDATE SET
+                balance = CASE WHEN excluded.timestamp >= timestamp THEN excluded.balance ELSE balance END,
+                timestamp = MAX(timestamp, excluded.timestamp)'''
+
+# Una conexión larga por hilo y archivo (sqlite3 no comparte conexiones entre hilos)
+_local = threading.local()
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # WAL: el dashboard lee mientras los bots escriben sin bloquearse entre sí
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+def get_connection(path=None):
+    """Conexión del hilo actual a ``path`` (por defecto ``DB_PATH``), abierta una sola vez."""
+    path = path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _connect(path)
+    return conn
+
+def close_connection(path=None):
+    """Cierra la conexión del hilo actual (al terminar un hilo de trabajo)."""
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(path or DB_PATH, None)
+    if conn is not None:
+        conn.close()
+
 def init_database():
     """Inicializa la base de datos con las tablas necesarias."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    
-    conn = sqlite3.connect(DB_PATH)
+
+    conn = get_connection()
     cursor = conn.cursor()
-    
+
     # Tabla de operaciones
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS trades (
@@ -27,7 +89,7 @@ def init_database():
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
+
     # Tabla de métricas diarias
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS daily_metrics (
@@ -44,29 +106,308 @@ def init_database():
             UNIQUE(bot_name, date)
         )
     ''')
-    
+
+    # Índices para las consultas del dashboard (últimas operaciones, por bot)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_bot_ts ON trades(bot_name, timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp)')
+
+    # Resumen por bot mantenido en cada INSERT (trades es append-only)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_summary (
+            bot_name TEXT PRIMARY KEY,
+            total_trades INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            pnl_sum REAL NOT NULL DEFAULT 0,
+            pnl_count INTEGER NOT NULL DEFAULT 0,
+            last_timestamp DATETIME,
+            current_balance REAL
+        )
+    ''')
+    # Se recrea siempre: las versiones anteriores del trigger fallaban con pnl_pct NULL
+    cursor.execute('DROP TRIGGER IF EXISTS trg_trades_summary')
+    cursor.execute('''
+        CREATE TRIGGER trg_trades_summary AFTER INSERT ON trades
+        BEGIN
+            INSERT INTO bot_summary (bot_name, last_timestamp, current_balance)
+            VALUES (NEW.bot_name, NEW.timestamp, NEW.balance)
+            ON CONFLICT(bot_name) DO UPDATE SET
+                current_balance = CASE WHEN NEW.timestamp >= last_timestamp OR last_timestamp IS NULL
+                                       THEN NEW.balance ELSE current_balance END,
+                last_timestamp = MAX(COALESCE(last_timestamp, NEW.timestamp), NEW.timestamp);
+            UPDATE bot_summary SET
+                total_trades = total_trades + 1,
+                wins = wins + COALESCE(NEW.pnl_pct > 0, 0),
+                losses = losses + COALESCE(NEW.pnl_pct < 0, 0),
+                pnl_sum = pnl_sum + COALESCE(NEW.pnl_pct, 0),
+                pnl_count = pnl_count + (NEW.pnl_pct IS NOT NULL)
+            WHERE bot_name = NEW.bot_name AND NEW.action IN ('VENTA', 'SYNC');
+        END
+    ''')
+
+    # Equity de cada ciclo + agregados OHLC por minuto / hora / día, mantenidos al insertar
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bot_name TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            equity REAL NOT NULL,
+            balance REAL NOT NULL,
+            position INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_equity_bot_ts ON equity(bot_name, timestamp)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equity_rollup (
+            bot_name TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            bucket DATETIME NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            balance REAL NOT NULL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (bot_name, resolution, bucket)
+        )
+    ''')
+    rollups = "\n".join(f'''
+            INSERT INTO equity_rollup (bot_name, resolution, bucket, open, high, low, close, balance, samples)
+            VALUES (NEW.bot_name, '{resolution}', {bucket}, NEW.equity, NEW.equity, NEW.equity, NEW.equity, NEW.balance, 1)
+            ON CONFLICT(bot_name, resolution, bucket) DO UPDATE SET
+                high = MAX(high, excluded.high),
+                low = MIN(low, excluded.low),
+                close = excluded.close,
+                balance = excluded.balance,
+                samples = samples + 1;''' for resolution, bucket in _BUCKETS.items())
+    # daily_metrics: drawdown intradía desde el máximo del día y balance final
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_equity_rollup AFTER INSERT ON equity
+        BEGIN{rollups}
+            INSERT INTO daily_metrics (bot_name, date, max_drawdown, final_balance)
+            SELECT NEW.bot_name, r.bucket, (r.high - NEW.equity) / r.high * 100, NEW.balance
+            FROM equity_rollup r
+            WHERE r.bot_name = NEW.bot_name AND r.resolution = '1d' AND r.bucket = date(NEW.timestamp)
+            ON CONFLICT(bot_name, date) DO UPDATE SET
+                max_drawdown = MAX(max_drawdown, excluded.max_drawdown),
+                final_balance = excluded.final_balance;
+        END
+    ''')
+    # daily_metrics: operaciones cerradas del día
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_trades_daily AFTER INSERT ON trades
+        WHEN NEW.action = 'VENTA'
+        BEGIN
+            INSERT INTO daily_metrics (bot_name, date, total_trades, winning_trades, losing_trades, total_pnl, final_balance)
+            VALUES (NEW.bot_name, date(NEW.timestamp), 1, COALESCE(NEW.pnl_pct > 0, 0), COALESCE(NEW.pnl_pct < 0, 0),
+                    COALESCE(NEW.pnl_pct, 0), NEW.balance)
+            ON CONFLICT(bot_name, date) DO UPDATE SET
+                total_trades = total_trades + 1,
+                winning_trades = winning_trades + excluded.winning_trades,
+                losing_trades = losing_trades + excluded.losing_trades,
+                total_pnl = total_pnl + excluded.total_pnl,
+                final_balance = excluded.final_balance;
+        END
+    ''')
+
+    # Curva de balance por hora (último balance de VENTA/SYNC en cada hora) para la gráfica del dashboard
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS balance_history (
+            bot_name TEXT NOT NULL,
+            bucket DATETIME NOT NULL,
+            timestamp DATETIME NOT NULL,
+            balance REAL NOT NULL,
+            PRIMARY KEY (bot_name, bucket)
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_trades_balance AFTER INSERT ON trades
+        WHEN NEW.action IN ('VENTA', 'SYNC')
+        BEGIN
+            {UPSERT_BALANCE.format(source="VALUES (NEW.bot_name, strftime('%Y-%m-%d %H:00:00', NEW.timestamp), NEW.timestamp, NEW.balance)")};
+        END
+    ''')
+
+    # Bases de datos anteriores a las tablas de resumen: rellenarlas una vez
+    if conn.execute('SELECT COUNT(*) FROM bot_summary').fetchone()[0] == 0:
+        rebuild_bot_summary(conn)
+    if conn.execute('SELECT COUNT(*) FROM balance_history').fetchone()[0] == 0:
+        conn.execute(UPSERT_BALANCE.format(source='''
+            SELECT bot_name, strftime('%Y-%m-%d %H:00:00', timestamp), timestamp, balance FROM trades
+            WHERE action IN ('VENTA', 'SYNC') ORDER BY timestamp, id'''))
+
+    conn.commit()
+
+def rebuild_bot_summary(conn=None):
+    """Recalcula ``bot_summary`` desde ``trades`` (una sola vez, al migrar)."""
+    conn = conn or get_connection()
+    conn.execute('DELETE FROM bot_summary')
+    conn.execute('''
+        INSERT INTO bot_summary (bot_name, total_trades, wins, losses, pnl_sum, pnl_count, last_timestamp, current_balance)
+        SELECT
+            t.bot_name,
+            SUM(t.action IN ('VENTA', 'SYNC')),
+            SUM(COALESCE(t.action IN ('VENTA', 'SYNC') AND t.pnl_pct > 0, 0)),
+            SUM(COALESCE(t.action IN ('VENTA', 'SYNC') AND t.pnl_pct < 0, 0)),
+            TOTAL(CASE WHEN t.action IN ('VENTA', 'SYNC') THEN t.pnl_pct END),
+            COUNT(CASE WHEN t.action IN ('VENTA', 'SYNC') THEN t.pnl_pct END),
+            MAX(t.timestamp),
+            (SELECT balance FROM trades t2 WHERE t2.bot_name = t.bot_name ORDER BY t2.timestamp DESC, t2.id DESC LIMIT 1)
+        FROM trades t
+        GROUP BY t.bot_name
+    ''')
     conn.commit()
-    conn.close()
 
 @contextmanager
 def get_db_connection():
-    """Context manager para conexiones a la base de datos."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Context manager con la conexión del hilo actual (no se cierra al salir)."""
+    conn = get_connection()
     try:
         yield conn
-    finally:
-        conn.close()
+    except Exception:
+        conn.rollback()
+        raise
+
+def _trade_row(bot_name, action, price, pnl_pct=None, balance=0, win_rate=0, daily_drawdown=0, timestamp=None):
+    return (bot_name, timestamp or datetime.now(), action, price, pnl_pct, balance, win_rate, daily_drawdown)
 
 def save_trade(bot_name, action, price, pnl_pct=None, balance=0, win_rate=0, daily_drawdown=0):
     """Guarda una operación en la base de datos."""
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO trades (bot_name, timestamp, action, price, pnl_pct, balance, win_rate, daily_drawdown)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (bot_name, datetime.now(), action, price, pnl_pct, balance, win_rate, daily_drawdown))
+        conn.execute(INSERT_TRADE, _trade_row(bot_name, action, price, pnl_pct, balance, win_rate, daily_drawdown))
+        conn.commit()
+
+def save_trades_bulk(trades):
+    """
+    Guarda varias operaciones en una sola transacción.
+
+    ``trades``: dicts con los mismos campos que ``save_trade`` (más
+    ``timestamp`` opcional). Devuelve cuántas se han guardado.
+    """
+    rows = [_trade_row(**trade) for trade in trades]
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        conn.executemany(INSERT_TRADE, rows)
+        conn.commit()
+    return len(rows)
+
+def _equity_row(bot_name, equity, balance, position=0, timestamp=None):
+    return (bot_name, timestamp or datetime.now(), equity, balance, position)
+
+def save_equity_bulk(points):
+    """
+    Guarda puntos de equity (dicts ``bot_name``, ``equity``, ``balance``,
+    ``position``, ``timestamp``) en una transacción; los agregados por
+    minuto/hora/día y ``daily_metrics`` se actualizan solos (triggers).
+    """
+    rows = [_equity_row(**point) for point in points]
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        conn.executemany(INSERT_EQUITY, rows)
         conn.commit()
+    return len(rows)
+
+def get_equity(bot_name, start=None, end=None, resolution=None, max_points=2000):
+    """
+    Serie de equity de ``bot_name`` entre ``start`` y ``end``.
+
+    ``resolution``: ``'raw'``, ``'1m'``, ``'1h'`` o ``'1d'``; por defecto la
+    más fina que no pase de ``max_points`` puntos en el rango. Filas
+    ``(timestamp, open, high, low, close, balance)`` (en ``raw`` las cuatro
+    primeras son la equity del ciclo).
+    """
+    with get_db_connection() as conn:
+        if resolution is None:
+            first, last = conn.execute(
+                'SELECT MIN(timestamp), MAX(timestamp) FROM equity WHERE bot_name = ? '
+                'AND timestamp >= COALESCE(?, timestamp) AND timestamp <= COALESCE(?, timestamp)',
+                (bot_name, start, end)).fetchone()
+            if first is None:
+                return []
+            span = (datetime.fromisoformat(str(last)) - datetime.fromisoformat(str(first))).total_seconds()
+            count = conn.execute(
+                'SELECT COUNT(*) FROM equity WHERE bot_name = ? AND timestamp BETWEEN ? AND ?',
+                (bot_name, first, last)).fetchone()[0]
+            resolution = 'raw' if count <= max_points else next(
+                (r for r, seconds in RESOLUTIONS.items() if span / seconds <= max_points), '1d')
+        if resolution == 'raw':
+            return conn.execute(
+                'SELECT timestamp, equity, equity, equity, equity, balance FROM equity WHERE bot_name = ? '
+                'AND timestamp >= COALESCE(?, timestamp) AND timestamp <= COALESCE(?, timestamp) ORDER BY timestamp',
+                (bot_name, start, end)).fetchall()
+        return conn.execute(
+            'SELECT bucket, open, high, low, close, balance FROM equity_rollup WHERE bot_name = ? AND resolution = ? '
+            'AND bucket >= COALESCE(?, bucket) AND bucket <= COALESCE(?, bucket) ORDER BY bucket',
+            (bot_name, resolution, start, end)).fetchall()
+
+class TradeWriter(BatchWriter):
+    """
+    Buffered trade / equity writer: ``add`` and ``add_equity`` never touch
+    the DB; rows are written every ``max_delay`` seconds (or as soon as
+    ``max_rows`` are pending) from a daemon thread. Shared by every bot of a
+    process.
+    """
+
+    thread_name = "db-writer"
+
+    def __init__(self, max_rows=500, max_delay=1.0):
+        super().__init__(max_rows, max_delay)
+        self.written = 0
+
+    def add(self, bot_name, action, price, pnl_pct=None, balance=0, win_rate=0, daily_drawdown=0):
+        """Encola una operación (con la hora actual) para la próxima escritura."""
+        row = dict(bot_name=bot_name, action=action, price=price, pnl_pct=pnl_pct, balance=balance,
+                   win_rate=win_rate, daily_drawdown=daily_drawdown, timestamp=datetime.now())
+        self._add((save_trades_bulk, row))
+
+    def add_equity(self, bot_name, equity, balance, position=0, timestamp=None):
+        """Encola un punto de la serie de equity (una vez por ciclo)."""
+        self._add((save_equity_bulk, dict(bot_name=bot_name, equity=equity, balance=balance, position=position,
+                                          timestamp=timestamp or datetime.now())))
+
+    def _write(self, batch):
+        ok = True
+        for save, what in ((save_trades_bulk, "operaciones"), (save_equity_bulk, "puntos de equity")):
+            pending = [row for target, row in batch if target is save]
+            if not pending:
+                continue
+            try:
+                with METRICS.timer(PHASE_SECONDS, bot="DB", phase="db_write"):
+                    written = save(pending)
+            except sqlite3.OperationalError as e:
+                # DB bloqueada o no disponible: se reintenta todo en la próxima escritura
+                logger.warning(f"⚠️ Error guardando {len(pending)} {what} en DB, se reintentará: {e}")
+                self._requeue([(save, row) for row in pending])
+                ok = False
+                continue
+            except Exception as e:
+                # Una fila inválida no bloquea al resto: fila a fila, descartando solo las malas
+                logger.error(f"❌ Lote de {len(pending)} {what} rechazado, se reintenta fila a fila: {e}")
+                written, rest = self._save_each(save, pending, what)
+                if rest:
+                    self._requeue([(save, row) for row in rest])
+                    ok = False
+            if save is save_trades_bulk:
+                self.written += written
+        return ok
+
+    @staticmethod
+    def _save_each(save, pending, what):
+        """``(written, rest)``: ``rest`` are the rows left after a retryable error."""
+        written = 0
+        for i, row in enumerate(pending):
+            try:
+                written += save([row])
+            except sqlite3.OperationalError:
+                return written, pending[i:]
+            except Exception as e:
+                logger.error(f"❌ Descartada una fila de {what} inválida {row}: {e}")
+        return written, []
+
+    def _thread_exit(self):
+        close_connection()
 
 def update_daily_metrics(bot_name, date, trades_count, winning_count, losing_count, total_pnl, max_dd, final_balance):
     """Actualiza las métricas diarias de un bot."""
@@ -95,20 +436,84 @@ def get_all_trades(bot_name=None, limit=100):
             cursor.execute('SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?', (limit,))
         return cursor.fetchall()
 
+def get_last_trade_id():
+    """Id de la última operación (0 si no hay): cambia con cada escritura, sirve de versión para cachés."""
+    with get_db_connection() as conn:
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM trades').fetchone()[0]
+
 def get_bot_summary():
-    """Obtiene un resumen del rendimiento de todos los bots."""
+    """Obtiene un resumen del rendimiento de todos los bots (tabla ``bot_summary``, sin recorrer ``trades``)."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT 
-                t.bot_name,
-                COUNT(t.id) as total_trades,
-                SUM(CASE WHEN t.pnl_pct > 0 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN t.pnl_pct < 0 THEN 1 ELSE 0 END) as losses,
-                AVG(t.pnl_pct) as avg_pnl,
-                (SELECT balance FROM trades t2 WHERE t2.bot_name = t.bot_name ORDER BY t2.timestamp DESC LIMIT 1) as current_balance
-            FROM trades t
-            WHERE t.action = 'VENTA' or t.action = 'SYNC'
-            GROUP BY t.bot_name
+            SELECT
+                bot_name,
+                total_trades,
+                wins,
+                losses,
+                CASE WHEN pnl_count > 0 THEN pnl_sum / pnl_count END as avg_pnl,
+                current_balance
+            FROM bot_summary
+            WHERE total_trades > 0
+            ORDER BY bot_name
         ''')
         return cursor.fetchall()
+
+def get_dashboard_kpis(today=None):
+    """
+    KPIs globales calculados en SQLite (coste constante aunque ``trades`` crezca):
+    capital total, bots activos, bot líder y operaciones del día. Los libros
+    en sombra (``<SYM>_SHADOW_<name>``, ver shadow.py) no cuentan como capital.
+    """
+    today = today or datetime.now().date()
+    start = datetime.combine(today, datetime.min.time())
+    with get_db_connection() as conn:
+        nav, bots = conn.execute(
+            f'SELECT TOTAL(current_balance), COUNT(*) FROM bot_summary WHERE {LIVE_BOTS}').fetchone()
+        best = conn.execute(f'SELECT bot_name, current_balance FROM bot_summary WHERE {LIVE_BOTS} '
+                            'ORDER BY current_balance DESC LIMIT 1').fetchone()
+        # Rango sobre idx_trades_ts: solo se leen las filas de hoy
+        ops, sells = conn.execute(
+            "SELECT COUNT(*), TOTAL(action = 'VENTA') FROM trades WHERE timestamp >= ? AND timestamp < ?",
+            (str(start), str(start + timedelta(days=1)))).fetchone()
+    return {'total_balance': nav, 'active_bots': bots, 'best_bot': best[0] if best else None,
+            'best_balance': best[1] if best else None, 'ops_today': ops, 'sells_today': int(sells)}
+
+def get_balance_history(start=None, end=None):
+    """Balance por bot y hora (``bot_name``, ``bucket``, ``balance``) desde ``balance_history``."""
+    with get_db_connection() as conn:
+        return conn.execute(
+            'SELECT bot_name, bucket, balance FROM balance_history '
+            'WHERE bucket >= COALESCE(?, bucket) AND bucket <= COALESCE(?, bucket) ORDER BY bucket, bot_name',
+            (start and str(start), end and str(end))).fetchall()
+
+def get_trades_page(bot_name=None, cursor=None, limit=50):
+    """
+    Una página del histórico, de la más reciente a la más antigua.
+
+    ``cursor`` es ``None`` (primera página) o el ``next_cursor`` devuelto por
+    la página anterior; paginación por clave ``(timestamp, id)``, así que el
+    coste no depende de lo lejos que se esté del principio. Devuelve
+    ``(rows, next_cursor)``; ``next_cursor`` es None en la última página.
+    """
+    where, params = [], []
+    if bot_name:
+        where.append('bot_name = ?')
+        params.append(bot_name)
+    if cursor is not None:
+        where.append('(timestamp, id) < (?, ?)')
+        params.extend(cursor)
+    sql = 'SELECT * FROM trades'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    next_cursor = (rows[limit - 1]['timestamp'], rows[limit - 1]['id']) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def get_latest_balance(bot_name):
+    """Último balance registrado de ``bot_name`` (o None)."""
+    with get_db_connection() as conn:
+        row = conn.execute('SELECT current_balance FROM bot_summary WHERE bot_name = ?', (bot_name,)).fetchone()
+        return row[0] if row else None
@@ -1,6 +1,6 @@
 import yfinance as yf
 import pandas as pd
-import ta
+from features import add_indicators, WARMUP_BARS
 
 def descargar_datos_profesionales(symbol="BTC-USD", interval="15m", period="59d"):
     print(f"📥 Descargando datos de {symbol}...")
@@ -14,21 +14,11 @@ def descargar_datos_profesionales(symbol="BTC-USD", interval="15m", period="59d"
         return
 
     # --- FEATURE ENGINEERING ---
-    # 1. RSI
-    df['RSI'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
+    # RSI, Bandas de Bollinger y EMAs desde el pipeline compartido (features.py)
+    df = add_indicators(df)
     
-    # 2. Bandas de Bollinger
-    indicator_bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
-    df['BBL_20_2.0'] = indicator_bb.bollinger_lband()
-    df['BBM_20_2.0'] = indicator_bb.bollinger_mavg()
-    df['BBU_20_2.0'] = indicator_bb.bollinger_hband()
-    
-    # 3. EMA (Medias Móviles)
-    df['EMA_20'] = ta.trend.EMAIndicator(close=df['Close'], window=20).ema_indicator()
-    df['EMA_50'] = ta.trend.EMAIndicator(close=df['Close'], window=50).ema_indicator()
-    
-    # Limpiamos datos nulos
-    df.dropna(inplace=True)
+    # Limpiamos el calentamiento de las EMAs y datos nulos
+    df = df.iloc[WARMUP_BARS:].dropna()
     
     filename = "datos_btc_15m.csv"
     df.to_csv(filename)
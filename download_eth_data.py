@@ -1,6 +1,6 @@
 import ccxt
 import pandas as pd
-import ta
+from features import add_indicators, WARMUP_BARS
 import time
 from datetime import datetime, timedelta
 
@@ -36,22 +36,11 @@ def download_eth_data(symbol='ETH/USDT', timeframe='15m', days=365):
     # --- FEATURE ENGINEERING ---
     print("🛠️ Calculating Indicators for Ethereum...")
     
-    # 1. RSI
-    df['RSI'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
-    
-    # 2. Bollinger Bands
-    indicator_bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
-    df['BBL_20_2.0'] = indicator_bb.bollinger_lband()
-    df['BBM_20_2.0'] = indicator_bb.bollinger_mavg()
-    df['BBU_20_2.0'] = indicator_bb.bollinger_hband()
-    
-    # 3. EMA
-    df['EMA_20'] = ta.trend.EMAIndicator(close=df['Close'], window=20).ema_indicator()
-    df['EMA_50'] = ta.trend.EMAIndicator(close=df['Close'], window=50).ema_indicator()
-    df['EMA_200'] = ta.trend.EMAIndicator(close=df['Close'], window=200).ema_indicator()
+    # RSI, Bollinger Bands y EMA 20/50/200 desde el pipeline compartido
+    df = add_indicators(df)
 
-    # Cleanup
-    df.dropna(inplace=True)
+    # Cleanup (EMA 200 warmup)
+    df = df.iloc[WARMUP_BARS:].dropna()
     
     filename = "datos_eth_15m_binance.csv"
     df.to_csv(filename)
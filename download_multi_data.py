@@ -1,6 +1,6 @@
 import ccxt
 import pandas as pd
-import ta
+from features import add_indicators, WARMUP_BARS
 import time
 from datetime import datetime, timedelta
 
@@ -31,16 +31,9 @@ def download_asset_data(symbol, days=365):
     
     # Feature Engineering
     print(f"🛠️ Calculating indicators for {symbol}...")
-    df['RSI'] = ta.momentum.RSIIndicator(close=df['Close']).rsi()
-    bb = ta.volatility.BollingerBands(close=df['Close'])
-    df['BBL_20_2.0'] = bb.bollinger_lband()
-    df['BBM_20_2.0'] = bb.bollinger_mavg()
-    df['BBU_20_2.0'] = bb.bollinger_hband()
-    df['EMA_20'] = ta.trend.EMAIndicator(close=df['Close'], window=20).ema_indicator()
-    df['EMA_50'] = ta.trend.EMAIndicator(close=df['Close'], window=50).ema_indicator()
-    df['EMA_200'] = ta.trend.EMAIndicator(close=df['Close'], window=200).ema_indicator()
+    df = add_indicators(df)
     
-    df.dropna(inplace=True)
+    df = df.iloc[WARMUP_BARS:].dropna()
     df.to_csv(filename)
     print(f"✅ Saved to {filename}. Rows: {len(df)}")
 
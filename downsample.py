@@ -0,0 +1,83 @@
+"""
+Point decimation for equity / balance charts.
+
+Charts only need a few hundred points, whatever the history length:
+
+* ``minmax`` keeps the first and last point and, for each bucket, its
+  minimum and maximum, so peaks and troughs (and therefore the drawdowns a
+  reader looks for) survive the decimation;
+* ``lttb`` (Largest-Triangle-Three-Buckets) keeps the visually most
+  significant point of each bucket.
+
+Both return positional indices into the original series, so the same
+selection can be applied to the x values, other columns or be cached.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 1000
+
+
+def minmax_indices(y, n_out=MAX_POINTS):
+    """Indices of the first, last and per-bucket min / max points (at most ``n_out``)."""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+    # Dos puntos por cubeta, más el primero y el último
+    n_buckets = (n_out - 2) // 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    keep = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop <= start:
+            continue
+        bucket = y[start:stop]
+        keep += [start + int(np.nanargmin(bucket)), start + int(np.nanargmax(bucket))] \
+            if not np.isnan(bucket).all() else [start]
+    return np.unique(keep)
+
+
+def lttb_indices(y, n_out=MAX_POINTS, x=None):
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` points (first and last always kept)."""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype='float64') if x is None else np.asarray(x, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        start, stop = edges[k], edges[k + 1]
+        # Vértice C: media de la cubeta siguiente (el último punto para la última)
+        nxt_start, nxt_stop = stop, (edges[k + 2] if k + 2 < len(edges) else n)
+        cx, cy = x[nxt_start:nxt_stop].mean(), y[nxt_start:nxt_stop].mean()
+        area = np.abs((x[a] - cx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[k + 1] = a
+    return keep
+
+
+METHODS = {'minmax': minmax_indices, 'lttb': lttb_indices}
+
+
+def downsample(data, n_out=MAX_POINTS, column=None, method='minmax'):
+    """
+    Decimated copy of a Series / DataFrame (rows of ``column`` for frames),
+    or an index array for plain arrays.
+    """
+    pick = METHODS[method]
+    if isinstance(data, pd.DataFrame):
+        return data.iloc[pick(data[column].to_numpy(), n_out)]
+    if isinstance(data, pd.Series):
+        return data.iloc[pick(data.to_numpy(), n_out)]
+    return pick(data, n_out)
+
+
+def downsample_groups(df, column, by, n_out=MAX_POINTS, method='minmax'):
+    """``downsample`` applied per group (one line per bot), ``n_out`` points per group."""
+    if df.empty:
+        return df
+    parts = [downsample(group, n_out, column, method) for _, group in df.groupby(by, sort=False)]
+    return pd.concat(parts)
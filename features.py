@@ -0,0 +1,301 @@
+"""
+Single feature pipeline shared by training, backtesting and live trading.
+
+The indicators and the observation features are declared once in ``PIPELINE``
+and computed over NumPy arrays. Every step is resumable: ``FeaturePipeline.run``
+returns the state needed to continue the series, so
+
+* **batch mode** (``compute_features``) processes a full history, and
+* **tail mode** (``FeatureStream``) advances the same state with new candles only,
+
+and a live observation is bit-for-bit identical to the training observation
+for the same candles.
+"""
+import math
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import RingBuffer
+
+# Candles dropped at the start of a downloaded history so EMA_200 is warmed up
+WARMUP_BARS = 200
+
+
+# Block length of the vectorized EMA scan (see ``_ewm``)
+EMA_BLOCK = 64
+
+
+def _ewm(values, alpha, state=None):
+    """
+    ``ewm(alpha, adjust=False).mean()`` as a vectorized block scan.
+
+    Inside a block of ``EMA_BLOCK`` candles the recursion has the closed form
+    ``y[o] = d**(o+1) * (y_start + cumsum(alpha * x / d**(o+1)))`` with ``d = 1 - alpha``;
+    only the block starts are chained in Python. Blocks are aligned on the
+    absolute candle index and the running ``cumsum`` is carried in ``state``,
+    so resuming from ``state`` yields exactly the same floats as one long run.
+
+    ``state`` is ``(offset_in_block, y_start, running_sum)``; returns ``(out, state)``.
+    """
+    n = len(values)
+    if n == 0:
+        return np.empty(0), state
+    decay = (1.0 - alpha) ** np.arange(1, EMA_BLOCK + 1)
+    offset, y_start, running = state if state is not None else (0, float(values[0]), 0.0)
+
+    total = offset + n
+    n_blocks = -(-total // EMA_BLOCK)
+    padded = np.zeros(n_blocks * EMA_BLOCK)
+    padded[offset:total] = values
+    terms = padded.reshape(n_blocks, EMA_BLOCK) * (alpha / decay)
+    if offset:
+        # Zeros before the carried sum keep the sequential cumsum identical
+        terms[0, offset - 1] = running
+    sums = np.cumsum(terms, axis=1)
+
+    # Chain the block starts with plain floats (the only sequential part)
+    last = float(decay[-1])
+    starts = [float(y_start)]
+    for block_sum in sums[:-1, -1].tolist():
+        starts.append(last * (starts[-1] + block_sum))
+    starts = np.array(starts)
+
+    out = (decay * (starts[:, None] + sums)).ravel()[offset:total]
+    end = total % EMA_BLOCK
+    if end == 0:
+        new_state = (0, out[-1], 0.0)
+    else:
+        new_state = (end, starts[-1], sums[-1, end - 1])
+    return out, new_state
+
+
+def _windows(values, carry, window):
+    """Sliding windows over ``carry + values`` ending at each new value."""
+    extended = np.concatenate((carry, values))
+    n_full = len(extended) - window + 1
+    if n_full <= 0:
+        return None, extended
+    return sliding_window_view(extended, window), extended[-(window - 1):]
+
+
+class Ema:
+    """Exponential moving average (``ewm(span, adjust=False)``) of a column."""
+
+    def __init__(self, name, span, source='Close'):
+        self.name = name
+        self.outputs = (name,)
+        self.source = source
+        self.alpha = 2.0 / (span + 1.0)
+
+    def compute(self, cols, state):
+        cols[self.name], state = _ewm(cols[self.source], self.alpha, state)
+        return state
+
+
+class Rsi:
+    """Wilder RSI, same values and warm-up as ``ta.momentum.RSIIndicator``."""
+
+    def __init__(self, name, period=14, source='Close'):
+        self.name = name
+        self.outputs = (name,)
+        self.period = period
+        self.source = source
+        self.alpha = 1.0 / period
+
+    def compute(self, cols, state):
+        close = cols[self.source]
+        prev_close, up_state, dn_state, count = state or (math.nan, None, None, 0)
+
+        diff = np.diff(close, prepend=prev_close)
+        up = np.where(diff > 0, diff, 0.0)
+        dn = np.where(diff < 0, -diff, 0.0)
+        up_ewm, up_state = _ewm(up, self.alpha, up_state)
+        dn_ewm, dn_state = _ewm(dn, self.alpha, dn_state)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(dn_ewm == 0, 100.0, 100.0 - (100.0 / (1.0 + up_ewm / dn_ewm)))
+        rsi[count + np.arange(len(close)) < self.period - 1] = np.nan
+        cols[self.name] = rsi
+
+        if len(close) == 0:
+            return state
+        return (close[-1], up_state, dn_state, count + len(close))
+
+
+class Bollinger:
+    """Bollinger bands (population std, like ``ta``) from a rolling window."""
+
+    def __init__(self, window=20, dev=2.0, source='Close'):
+        self.window = window
+        self.dev = dev
+        self.source = source
+        suffix = f"{window}_{dev}"
+        self.name = f"BB_{suffix}"
+        self.lower, self.mid, self.upper = f"BBL_{suffix}", f"BBM_{suffix}", f"BBU_{suffix}"
+        self.outputs = (self.lower, self.mid, self.upper)
+
+    def compute(self, cols, state):
+        values = cols[self.source]
+        carry = state if state is not None else np.empty(0)
+        windows, new_carry = _windows(values, carry, self.window)
+
+        mid = np.full(len(values), np.nan)
+        std = np.full(len(values), np.nan)
+        if windows is not None:
+            # Explicit column loop: the summation order does not depend on how
+            # many rows are processed at once, which keeps tail == batch.
+            total = windows[:, 0].copy()
+            for j in range(1, self.window):
+                total += windows[:, j]
+            mean = total / self.window
+            sq = (windows[:, 0] - mean) ** 2
+            for j in range(1, self.window):
+                sq += (windows[:, j] - mean) ** 2
+            n = len(mean)
+            mid[len(values) - n:] = mean
+            std[len(values) - n:] = np.sqrt(sq / self.window)
+
+        cols[self.mid] = mid
+        cols[self.upper] = mid + self.dev * std
+        cols[self.lower] = mid - self.dev * std
+        return new_carry
+
+
+class LogReturn:
+    """Log return of a column; the very first candle has a return of 0."""
+
+    def __init__(self, name, source='Close'):
+        self.name = name
+        self.outputs = (name,)
+        self.source = source
+
+    def compute(self, cols, state):
+        close = cols[self.source]
+        prev = np.concatenate(([math.nan if state is None else state], close[:-1]))[:len(close)]
+        cols[self.name] = np.nan_to_num(np.log(close / prev), nan=0.0)
+        return close[-1] if len(close) else state
+
+
+class Expr:
+    """Stateless element-wise feature computed from columns already in the pipeline."""
+
+    def __init__(self, name, func: Callable[[Dict[str, np.ndarray]], np.ndarray]):
+        self.name = name
+        self.outputs = (name,)
+        self.func = func
+
+    def compute(self, cols, state):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cols[self.name] = self.func(cols)
+        return None
+
+
+class FeaturePipeline:
+    """Ordered list of resumable steps plus the columns fed to the model."""
+
+    def __init__(self, steps: Sequence, obs_columns: Sequence[str]):
+        self.steps = tuple(steps)
+        self.obs_columns = tuple(obs_columns)
+        self.columns = tuple(col for step in self.steps for col in step.outputs)
+
+    @property
+    def signature(self) -> str:
+        """Steps with their parameters (and ``Expr`` code); changes whenever the output would."""
+        parts = []
+        for step in self.steps:
+            params = sorted((k, v) for k, v in vars(step).items() if isinstance(v, (int, float, str, tuple)))
+            code = getattr(getattr(step, 'func', None), '__code__', None)
+            body = (code.co_code.hex(), code.co_consts, code.co_names) if code else ()
+            parts.append(f"{type(step).__name__}{params}{body}")
+        return "|".join(parts)
+
+    def run(self, close, state: Optional[dict] = None) -> Tuple[Dict[str, np.ndarray], dict]:
+        """Compute every column for ``close``, continuing from ``state`` if given."""
+        cols = {'Close': np.asarray(close, dtype=np.float64)}
+        state = state or {}
+        new_state = {}
+        for step in self.steps:
+            new_state[step.name] = step.compute(cols, state.get(step.name))
+        return cols, new_state
+
+    def observation_matrix(self, cols) -> np.ndarray:
+        return np.column_stack([cols[c] for c in self.obs_columns]).astype(np.float32)
+
+
+PIPELINE = FeaturePipeline(
+    steps=(
+        LogReturn('Log_Ret'),
+        Rsi('RSI', period=14),
+        Bollinger(window=20, dev=2.0),
+        Ema('EMA_20', span=20),
+        Ema('EMA_50', span=50),
+        Ema('EMA_200', span=200),
+        Ema('EMA_12', span=12),
+        Ema('EMA_26', span=26),
+        Expr('MACD', lambda c: c['EMA_12'] - c['EMA_26']),
+        Ema('MACD_Signal', span=9, source='MACD'),
+        # Normalized features for the model
+        Expr('RSI_Norm', lambda c: c['RSI'] / 100.0),
+        Expr('MACD_Hist', lambda c: np.nan_to_num((c['MACD'] - c['MACD_Signal']) / c['Close'], nan=0.0)),
+        Expr('EMA_20_Dist', lambda c: (c['Close'] / c['EMA_20']) - 1),
+        Expr('EMA_50_Dist', lambda c: (c['Close'] / c['EMA_50']) - 1),
+        Expr('EMA_200_Dist', lambda c: (c['Close'] / c['EMA_200']) - 1),
+    ),
+    obs_columns=('Log_Ret', 'RSI_Norm', 'MACD_Hist', 'EMA_20_Dist', 'EMA_50_Dist', 'EMA_200_Dist'),
+)
+
+OBS_COLUMNS = PIPELINE.obs_columns
+
+# Raw indicator columns stored in the downloaded CSVs
+INDICATOR_COLUMNS = ('RSI', 'BBL_20_2.0', 'BBM_20_2.0', 'BBU_20_2.0', 'EMA_20', 'EMA_50', 'EMA_200')
+
+
+def compute_features(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                     pipeline: FeaturePipeline = PIPELINE) -> pd.DataFrame:
+    """Batch mode: return a copy of ``df`` with the pipeline columns added."""
+    cols, _ = pipeline.run(df['Close'].to_numpy(dtype=np.float64))
+    names = list(columns or pipeline.columns)
+    # One concat instead of inserting the columns one by one
+    new = pd.DataFrame({name: cols[name] for name in names}, index=df.index)
+    return pd.concat([df.drop(columns=[n for n in names if n in df.columns]), new], axis=1)
+
+
+def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw indicator columns for the download scripts (replaces the ``ta`` pass)."""
+    return compute_features(df, columns=INDICATOR_COLUMNS)
+
+
+class FeatureStream:
+    """
+    Tail mode for live trading.
+
+    Keeps the pipeline state and the last ``window_size`` observation rows, so
+    each new candle costs a constant amount of work.
+    """
+
+    def __init__(self, window_size=60, pipeline: FeaturePipeline = PIPELINE):
+        self.window_size = window_size
+        self.pipeline = pipeline
+        self.state = None
+        self.rows = RingBuffer(window_size, len(pipeline.obs_columns))
+
+    def update(self, closes):
+        """Advance the pipeline with one or more new closed candles."""
+        closes = np.atleast_1d(np.asarray(closes, dtype=np.float64))
+        if len(closes) == 0:
+            return
+        cols, self.state = self.pipeline.run(closes, self.state)
+        for row in self.pipeline.observation_matrix(cols)[-self.window_size:]:
+            self.rows.append(row)
+
+    seed = update
+
+    @property
+    def ready(self):
+        return self.rows.full
+
+    def observation(self):
+        return self.rows.view()
@@ -0,0 +1,182 @@
+"""
+Streaming technical indicators for the live trading loop.
+
+Every indicator keeps only the state it needs and is advanced one value at a
+time with ``update`` (O(1) per candle). ``value`` is ``nan`` until enough
+history has been seen, mirroring the ``min_periods`` behaviour of pandas.
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+
+class EMA:
+    """Exponential moving average, equivalent to ``ewm(span=span, adjust=False)``."""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = float(x)
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class RollingStats:
+    """Rolling mean / standard deviation over a fixed window backed by a ring buffer."""
+
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.count = 0
+        self._buf = [0.0] * window
+        self._idx = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        x = float(x)
+        if self.count < self.window:
+            # Welford while the window fills up
+            self.count += 1
+            delta = x - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (x - self._mean)
+        else:
+            # Replace the oldest value in constant time
+            old = self._buf[self._idx]
+            old_mean = self._mean
+            self._mean += (x - old) / self.window
+            self._m2 += (x - old) * (x - self._mean + old - old_mean)
+        self._buf[self._idx] = x
+        self._idx = (self._idx + 1) % self.window
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    @property
+    def mean(self):
+        return self._mean if self.ready else math.nan
+
+    @property
+    def std(self):
+        if not self.ready:
+            return math.nan
+        return math.sqrt(max(self._m2, 0.0) / (self.window - self.ddof))
+
+
+class RSI:
+    """
+    Relative Strength Index.
+
+    ``method="sma"`` averages gains/losses with a simple rolling mean (the
+    historical LiveTrader formula); ``method="wilder"`` uses Wilder smoothing
+    like ``ta.momentum.RSIIndicator``.
+    """
+
+    def __init__(self, period=14, method="sma"):
+        if method not in ("sma", "wilder"):
+            raise ValueError(f"Unknown RSI method: {method}")
+        self.period = period
+        self.method = method
+        self.count = 0
+        self.value = math.nan
+        self._prev = math.nan
+        if method == "sma":
+            self._gain = RollingStats(period)
+            self._loss = RollingStats(period)
+        else:
+            self._alpha = 1.0 / period
+            self._avg_gain = 0.0
+            self._avg_loss = 0.0
+
+    def update(self, close):
+        close = float(close)
+        # The first candle has no delta and counts as a zero move (pandas .diff + .where)
+        delta = 0.0 if math.isnan(self._prev) else close - self._prev
+        self._prev = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.count += 1
+
+        if self.method == "sma":
+            self._gain.update(gain)
+            self._loss.update(loss)
+            avg_gain, avg_loss = self._gain.mean, self._loss.mean
+        else:
+            if self.count == 1:
+                self._avg_gain, self._avg_loss = gain, loss
+            else:
+                self._avg_gain += self._alpha * (gain - self._avg_gain)
+                self._avg_loss += self._alpha * (loss - self._avg_loss)
+            if self.count < self.period:
+                self.value = math.nan
+                return self.value
+            avg_gain, avg_loss = self._avg_gain, self._avg_loss
+
+        if math.isnan(avg_gain):
+            self.value = math.nan
+        elif avg_loss == 0:
+            self.value = 100.0 if (avg_gain > 0 or self.method == "wilder") else math.nan
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return self.value
+
+
+class RollingMax:
+    """Rolling maximum over a fixed window using a monotonic deque (amortised O(1))."""
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self._dq = deque()  # (index, value) with strictly decreasing values
+
+    def update(self, x):
+        x = float(x)
+        dq = self._dq
+        while dq and dq[-1][1] <= x:
+            dq.pop()
+        dq.append((self.count, x))
+        if dq[0][0] <= self.count - self.window:
+            dq.popleft()
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self._dq[0][1] if self.count >= self.window else math.nan
+
+
+class RingBuffer:
+    """
+    Fixed-size buffer of feature rows.
+
+    Each row is written twice (at ``i`` and ``i + size``) so ``view()`` can
+    always return the last ``size`` rows, oldest first, as a contiguous slice
+    without copying.
+    """
+
+    def __init__(self, size, width, dtype=np.float32):
+        self.size = size
+        self.count = 0
+        self._data = np.zeros((2 * size, width), dtype=dtype)
+        self._idx = 0
+
+    def append(self, row):
+        self._data[self._idx] = row
+        self._data[self._idx + self.size] = row
+        self._idx = (self._idx + 1) % self.size
+        self.count += 1
+
+    @property
+    def full(self):
+        return self.count >= self.size
+
+    def view(self):
+        return self._data[self._idx:self._idx + self.size]
+
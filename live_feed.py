@@ -0,0 +1,151 @@
+"""
+Push channel for live bot state (price, position, equity, drawdown).
+
+Bots publish one small JSON datagram per update over UDP: sending never
+blocks and never fails the trading loop (with nobody listening the packet
+is just dropped). The dashboard runs one ``LiveFeedSubscriber`` that keeps
+the latest state of every bot in memory, so it can refresh every second
+without touching SQLite.
+
+Configuration:
+    LIVE_FEED=host:port[,host:port]   # Bots: a dónde publicar (sin definir: no se publica)
+    LIVE_FEED_BIND=host:port          # Dashboard: dónde escuchar (127.0.0.1:9300)
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LIVE_FEED_PORT = 9300
+MAX_DATAGRAM = 8192
+RESOLVE_RETRY_SECONDS = 30.0
+
+
+def _parse_address(value, default_host='127.0.0.1'):
+    host, _, port = value.strip().rpartition(':')
+    return host or default_host, int(port or LIVE_FEED_PORT)
+
+
+class LiveFeedPublisher:
+    def __init__(self, targets=(('127.0.0.1', LIVE_FEED_PORT),), clock=time):
+        """``targets``: ``(host, port)`` pairs; host names are resolved once (retried if not up yet)."""
+        self.targets = list(targets)
+        self.clock = clock
+        self.sent = 0
+        self.dropped = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._resolved = None
+        self._resolved_at = -RESOLVE_RETRY_SECONDS
+
+    def _addresses(self):
+        # Resolver nombres (p. ej. "dashboard" en docker) fuera de cada envío: getaddrinfo puede bloquear
+        if self._resolved is None and time.monotonic() - self._resolved_at >= RESOLVE_RETRY_SECONDS:
+            self._resolved_at = time.monotonic()
+            try:
+                self._resolved = [socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+                                  for host, port in self.targets]
+            except OSError as e:
+                logger.warning(f"⚠️ Live feed: no se pudo resolver {self.targets}: {e}")
+        return self._resolved or []
+
+    def publish(self, bot, **state):
+        """Send ``state`` of ``bot`` to every subscriber (fire-and-forget)."""
+        payload = json.dumps({'bot': bot, 'ts': self.clock.time(), **state}, default=float).encode()
+        for address in self._addresses():
+            try:
+                self._sock.sendto(payload, address)
+                self.sent += 1
+            except OSError:
+                self.dropped += 1
+
+    def close(self):
+        self._sock.close()
+
+
+def publisher_from_env(environ=None):
+    """``LiveFeedPublisher`` for ``LIVE_FEED`` or None when it is not set."""
+    environ = os.environ if environ is None else environ
+    value = environ.get("LIVE_FEED", "").strip()
+    if not value:
+        return None
+    return LiveFeedPublisher([_parse_address(v) for v in value.split(',') if v.strip()])
+
+
+class LiveFeedSubscriber:
+    def __init__(self, host='127.0.0.1', port=LIVE_FEED_PORT):
+        self.host = host
+        self.port = port
+        self.states = {}        # bot -> último estado (+ 'received')
+        self.version = 0
+        self.error = None
+        self._changed = threading.Condition()
+        self._sock = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Bind and listen in a daemon thread; a bind error is kept in ``error`` instead of raised."""
+        try:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.bind((self.host, self.port))
+            self._sock.settimeout(0.5)
+        except OSError as e:
+            self.error = str(e)
+            logger.error(f"❌ Live feed: no se pudo escuchar en {self.host}:{self.port}: {e}")
+            return self
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self._sock.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                state = json.loads(data)
+                bot = state['bot']
+            except (ValueError, KeyError, TypeError):
+                continue
+            state['received'] = time.time()
+            with self._changed:
+                previous = self.states.get(bot)
+                # Datagramas desordenados: no pisar un estado más reciente
+                if previous is None or state.get('ts', 0) >= previous.get('ts', 0):
+                    self.states[bot] = state
+                    self.version += 1
+                    self._changed.notify_all()
+
+    def snapshot(self):
+        """``(version, {bot: state})`` copy of the latest states."""
+        with self._changed:
+            return self.version, {bot: dict(state) for bot, state in self.states.items()}
+
+    def wait(self, version, timeout=None):
+        """Block until something newer than ``version`` arrives; returns the new version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        if self._sock is not None:
+            self._sock.close()
+
+
+def subscriber_from_env(environ=None):
+    """``LiveFeedSubscriber`` on ``LIVE_FEED_BIND`` (default ``127.0.0.1:9300``), started."""
+    environ = os.environ if environ is None else environ
+    host, port = _parse_address(environ.get("LIVE_FEED_BIND", f"127.0.0.1:{LIVE_FEED_PORT}"))
+    return LiveFeedSubscriber(host, port).start()
@@ -0,0 +1,171 @@
+"""
+Asyncio core for the live traders.
+
+Three independent lanes so a slow one never delays the decision:
+
+- data: candle download (retries, late-candle polling) in a worker thread,
+  woken up by the candle-close scheduler;
+- decision: inference in a dedicated executor as soon as new data arrives,
+  then the (cheap, in-memory) trade logic on the event loop;
+- I/O: SQLite writes go to ``BackgroundQueue`` / ``TradeWriter`` workers and
+  TensorBoard scalars and log records to ``telemetry`` sinks, all flushed
+  there, never on the decision path.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """Runs submitted calls in order on a daemon thread; ``submit`` never blocks."""
+
+    def __init__(self, name, maxsize=10000):
+        self.name = name
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            logger.error(f"❌ Cola '{self.name}' llena. Se descarta {getattr(fn, '__name__', fn)}")
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                fn, args, kwargs = item
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"Error en cola '{self.name}' ({getattr(fn, '__name__', fn)}): {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Wait until everything submitted so far has been processed."""
+        self._queue.join()
+
+    def close(self, timeout=10.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+class BatchWriter:
+    """
+    Buffers items and hands them to ``_write(batch)`` from a daemon thread
+    every ``max_delay`` seconds (or as soon as ``max_items`` are pending);
+    ``_add`` never touches the disk. Subclasses implement ``_write``.
+    """
+
+    thread_name = "batch-writer"
+
+    def __init__(self, max_items, max_delay):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _add(self, *items):
+        # El búfer se busca con el lock tomado: flush() lo sustituye por uno vacío
+        with self._lock:
+            self._pending.extend(items)
+            full = len(self._pending) >= self.max_items
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _requeue(self, items):
+        """Put ``items`` back in front of the buffer for the next write."""
+        with self._lock:
+            self._pending[:0] = items
+
+    def _write(self, batch) -> bool:
+        raise NotImplementedError
+
+    def _thread_exit(self):
+        """Hook run on the writer thread when it stops (e.g. close a per-thread connection)."""
+
+    def flush(self) -> bool:
+        """Escribe ya lo pendiente (en el hilo que llama)."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return self._write(batch) if batch else True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.max_delay)
+            self._wake.clear()
+            self.flush()
+        self._thread_exit()
+
+    def close(self, timeout=10.0):
+        """Detiene el hilo y escribe lo que quede."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+async def run_live(scheduler, fetch, decide, act, executor=None):
+    """
+    Drive a trader until cancelled.
+
+    ``fetch(expected_open)`` (blocking, worker thread) returns the cycle data
+    or ``None``; ``decide(data)`` (blocking, inference executor) returns the
+    decision; ``act(data, decision)`` runs on the event loop. The first cycle
+    runs immediately, then once per candle close.
+    """
+    loop = asyncio.get_running_loop()
+    executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+    ready = asyncio.Queue(maxsize=1)
+
+    async def data_lane():
+        expected_open = None
+        while True:
+            try:
+                data = await asyncio.to_thread(fetch, expected_open)
+            except Exception as e:
+                logger.error(f"Error obteniendo datos de mercado: {e}")
+                data = None
+            if data is not None:
+                # Si la decisión anterior sigue pendiente, solo importa el dato más reciente
+                if ready.full():
+                    ready.get_nowait()
+                ready.put_nowait((time.perf_counter(), data))
+
+            # Las decisiones solo cambian al cerrar una vela: dormir hasta justo después del cierre
+            delay, expected_open = scheduler.next_close()
+            await asyncio.sleep(delay)
+
+    async def decision_lane():
+        while True:
+            received, data = await ready.get()
+            try:
+                decision = await loop.run_in_executor(executor, decide, data)
+                act(data, decision)
+                logger.debug(f"⚡ Decisión en {(time.perf_counter() - received) * 1000:.1f} ms")
+            except Exception as e:
+                logger.error(f"Error en ciclo de decisión: {e}")
+
+    tasks = [asyncio.create_task(data_lane()), asyncio.create_task(decision_lane())]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,226 @@
+"""
+Market data for the live bots: candle-close scheduling and a local candle cache.
+
+Decisions only change when a candle closes, so instead of polling every
+minute the bots sleep until just after each close (``CandleScheduler``) and
+ask upstream only for candles newer than the ones already stored on disk
+(``CandleCache``). A short poll is used only when the expected candle is late.
+"""
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from timeframes import to_offset
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "data/cache/candles"
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class SystemClock:
+    """Wall-clock time source (replaceable in tests and replays)."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """OHLCV frame indexed by the UTC candle open time, whatever the upstream format."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    # Misma resolución venga de donde venga (yfinance, CSV, JSON) para poder concatenar/comparar
+    index = index.as_unit('ns')
+    out = df[OHLCV_COLUMNS].astype('float64').set_axis(index)
+    out.index.name = 'timestamp'
+    return out[~out.index.duplicated(keep='last')].sort_index()
+
+
+def split_tickers(df: pd.DataFrame, tickers) -> Dict[str, pd.DataFrame]:
+    """Split a multi-ticker yfinance frame (``group_by='ticker'``) into normalized frames."""
+    frames = {}
+    available = set(df.columns.get_level_values(0)) if isinstance(df.columns, pd.MultiIndex) else set()
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        # El índice es común a todos los tickers: quitar las filas sin datos de este
+        frame = df[ticker].dropna(subset=['Close'])
+        if len(frame):
+            frames[ticker] = normalize_ohlcv(frame)
+    return frames
+
+
+class CandleScheduler:
+    """Wakes up just after each candle close of ``timeframe``."""
+
+    def __init__(self, timeframe='15m', grace_seconds=3.0, late_poll_seconds=10.0,
+                 max_late_seconds=300.0, clock=None):
+        self.period = to_offset(timeframe).total_seconds()
+        self.grace_seconds = grace_seconds
+        self.late_poll_seconds = late_poll_seconds
+        self.max_late_seconds = max_late_seconds
+        self.clock = clock or SystemClock()
+
+    def last_closed_open(self, now: Optional[float] = None) -> pd.Timestamp:
+        """Open time of the most recent candle that has already closed."""
+        now = self.clock.time() if now is None else now
+        open_ts = (now // self.period) * self.period - self.period
+        return pd.Timestamp(open_ts, unit='s', tz='UTC')
+
+    def next_close(self, now: Optional[float] = None):
+        """(seconds until ``grace_seconds`` after the next close, open time of that candle)."""
+        now = self.clock.time() if now is None else now
+        next_close = ((now // self.period) + 1) * self.period
+        return next_close + self.grace_seconds - now, pd.Timestamp(next_close - self.period, unit='s', tz='UTC')
+
+    def sleep_until_next_close(self) -> pd.Timestamp:
+        """Sleep until ``grace_seconds`` after the next close; return that candle's open time."""
+        delay, open_ts = self.next_close()
+        self.clock.sleep(delay)
+        return open_ts
+
+    def late_polls(self, expected_open: Optional[pd.Timestamp] = None):
+        """
+        One iteration per download attempt: right away, then every
+        ``late_poll_seconds`` while the caller has not seen ``expected_open``
+        (the caller ``break``s once it has), up to ``max_late_seconds``.
+        """
+        yield
+        if expected_open is None:
+            return
+        waited = 0.0
+        while waited < self.max_late_seconds:
+            logger.info(f"⏳ Vela de {expected_open} aún no disponible, nuevo sondeo en {self.late_poll_seconds:.0f}s...")
+            self.clock.sleep(self.late_poll_seconds)
+            waited += self.late_poll_seconds
+            yield
+        logger.warning(f"⚠️ La vela de {expected_open} no llegó tras {waited:.0f}s. Se decide con la última disponible.")
+
+    def is_closed(self, open_times: pd.DatetimeIndex, now: Optional[float] = None):
+        """Mask of candles whose close time has passed (drops the forming candle)."""
+        now = self.clock.time() if now is None else now
+        close_times = open_times + pd.Timedelta(seconds=self.period)
+        return np.asarray(close_times <= pd.Timestamp(now, unit='s', tz='UTC'))
+
+
+class CandleCache:
+    """
+    Closed candles of one ticker kept in memory and appended to a CSV on disk.
+
+    Only the last ``max_rows`` candles are kept in memory; the file is
+    append-only so each update writes just the new rows.
+    """
+
+    def __init__(self, ticker, timeframe='15m', cache_dir: Optional[str] = CACHE_DIR, max_rows=2000):
+        self.ticker = ticker
+        self.timeframe = timeframe
+        self.max_rows = max_rows
+        self.path = os.path.join(cache_dir, f"{ticker}_{timeframe}.csv") if cache_dir else None
+        self.frame = self._load()
+
+    def _load(self) -> pd.DataFrame:
+        if self.path and os.path.exists(self.path):
+            try:
+                df = pd.read_csv(self.path, index_col=0)
+                df.index = pd.to_datetime(df.index, utc=True, format='ISO8601').as_unit('ns')
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+                return df.iloc[-self.max_rows:]
+            except Exception as e:
+                logger.warning(f"⚠️ Caché de velas ilegible ({self.path}), se descarta: {e}")
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC', name='timestamp'), dtype='float64')
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        return self.frame.index[-1] if len(self.frame) else None
+
+    def append(self, candles: pd.DataFrame) -> pd.DataFrame:
+        """Store the candles newer than the cache; returns only those new rows."""
+        last = self.last_timestamp
+        new = candles if last is None else candles[candles.index > last]
+        if len(new) == 0:
+            return new
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            new.to_csv(self.path, mode='a', header=not os.path.exists(self.path))
+        self.frame = pd.concat([self.frame, new]).iloc[-self.max_rows:] if len(self.frame) else new.iloc[-self.max_rows:]
+        return new
+
+
+def fetch_with_retries(fetch, clock=None, max_retries=3, retry_delay=2):
+    """
+    Call ``fetch()`` with exponential backoff; ``None`` after ``max_retries``
+    failed or empty attempts.
+    """
+    import random
+
+    clock = clock or SystemClock()
+    for attempt in range(max_retries):
+        try:
+            if attempt > 0:
+                delay = retry_delay * (2 ** attempt) + random.uniform(0, 2)
+                logger.info(f"⏳ Reintento {attempt + 1}/{max_retries} en {delay:.1f}s...")
+                clock.sleep(delay)
+
+            data = fetch()
+
+            if len(data) == 0:
+                if attempt < max_retries - 1:
+                    logger.warning(f"⚠️ Yahoo Finance devolvió datos vacíos (intento {attempt + 1}/{max_retries})")
+                    continue
+                logger.error("❌ Yahoo Finance devolvió datos vacíos después de todos los reintentos.")
+                return None
+
+            return data
+
+        except Exception as e:
+            if attempt < max_retries - 1:
+                logger.warning(f"⚠️ Error temporal descargando datos (intento {attempt + 1}/{max_retries}): {e}")
+                continue
+            logger.error(f"❌ Error descargando datos después de {max_retries} intentos: {e}")
+            return None
+    return None
+
+
+class YahooSource:
+    """Yahoo Finance candles; asks only for what is newer than ``start`` when given."""
+
+    def __init__(self, interval='15m', timeout=10):
+        self.interval = interval
+        self.timeout = timeout
+
+    def _download(self, tickers, start: Optional[pd.Timestamp] = None, **kwargs):
+        import yfinance as yf
+
+        if start is not None and pd.Timestamp.now(tz='UTC') - start < pd.Timedelta(days=59):
+            return yf.download(tickers, interval=self.interval, start=start.to_pydatetime(),
+                               progress=False, timeout=self.timeout, **kwargs)
+        # Sin caché (o demasiado vieja para Yahoo 15m): historia suficiente para los indicadores
+        return yf.download(tickers, interval=self.interval, period="5d",
+                           progress=False, timeout=self.timeout, **kwargs)
+
+    def fetch(self, ticker, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        df = self._download(ticker, start)
+        if df is None or len(df) == 0:
+            return pd.DataFrame()
+        return normalize_ohlcv(df)
+
+    def fetch_many(self, tickers, start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        """
+        One request for several tickers; ``{ticker: frame}`` with the tickers
+        that returned data. ``start`` should be the oldest of the caches.
+        """
+        df = self._download(list(tickers), start, group_by='ticker')
+        if df is None or len(df) == 0:
+            return {}
+        return split_tickers(df, tickers)
@@ -0,0 +1,383 @@
+"""
+Shared market-data service for every bot on a host.
+
+``MarketDataDaemon`` owns the upstream connections (one Yahoo source, one
+rate-limited ccxt client with the Binance -> Binance US switch) and an
+in-memory candle cache per ticker / ``(symbol, timeframe)``. Bots ask it
+over a local TCP socket (newline-delimited JSON) instead of going upstream:
+
+* a request is answered from the cache while it is fresher than
+  ``min_interval`` seconds;
+* otherwise one refresh is started and every request arriving meanwhile
+  waits for that same refresh (no duplicate upstream calls);
+* Yahoo tickers are refreshed together in one multi-ticker request, ccxt
+  pairs incrementally from their last cached candle.
+
+So upstream traffic depends on the symbols watched, not on how many bots
+watch them.
+
+``MarketDataClient`` is the drop-in for the bots: it implements the
+``YahooSource`` interface (``fetch`` / ``fetch_many``) used by the live
+traders and the ccxt calls (``fetch_ohlcv`` / ``fetch_ticker``) used by the
+SOL sniper. Set ``MARKET_DATA=host:port`` to use it.
+
+Protocol, one JSON object per line (reply ``{"error": ...}`` on failure):
+    -> {"op": "yahoo", "tickers": [...], "start": ms | null}   <- {"frames": {ticker: {"index", "data"}}}
+    -> {"op": "ohlcv", "symbol", "timeframe", "since", "limit"} <- {"rows": [[ms, o, h, l, c, v], ...]}
+    -> {"op": "ticker", "symbol"}                               <- {"ticker": {...}}
+    -> {"op": "stats"}                                          <- {"upstream_requests", "requests", ...}
+
+Uso: python market_data_daemon.py --host 0.0.0.0 --port 9400
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+
+# market_data (y con él timeframes/features) se importa al usarlo: el cliente ccxt del
+# sniper solo necesita este módulo y pandas (Dockerfile.production)
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_PORT = 9400
+EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def _to_ms(index):
+    return ((index - EPOCH) // pd.Timedelta(milliseconds=1)).tolist()
+
+
+def _frame_to_wire(df):
+    from market_data import OHLCV_COLUMNS
+
+    return {'index': _to_ms(df.index), 'data': df[OHLCV_COLUMNS].to_numpy().tolist()}
+
+
+def _frame_from_wire(payload):
+    from market_data import OHLCV_COLUMNS, normalize_ohlcv
+
+    index = pd.to_datetime(payload['index'], unit='ms', utc=True)
+    return normalize_ohlcv(pd.DataFrame(payload['data'], columns=OHLCV_COLUMNS, index=index))
+
+
+def _frame_to_rows(df):
+    """ccxt ``fetch_ohlcv`` rows: ``[ms, open, high, low, close, volume]``."""
+    from market_data import OHLCV_COLUMNS
+
+    return [[t] + row for t, row in zip(_to_ms(df.index), df[OHLCV_COLUMNS].to_numpy().tolist())]
+
+
+def _frame_from_rows(rows):
+    from market_data import OHLCV_COLUMNS, normalize_ohlcv
+
+    index = pd.to_datetime([r[0] for r in rows], unit='ms', utc=True)
+    return normalize_ohlcv(pd.DataFrame([r[1:6] for r in rows], columns=OHLCV_COLUMNS, index=index))
+
+
+def _merge(cached, new, max_rows):
+    """Cached candles + newer ones; the fresh copy of a repeated candle wins (the forming one changes)."""
+    if cached is None or len(cached) == 0:
+        return new.iloc[-max_rows:]
+    merged = pd.concat([cached[cached.index < new.index[0]], new]) if len(new) else cached
+    return merged.iloc[-max_rows:]
+
+
+def ccxt_exchange(use_us=False):
+    import ccxt
+
+    return ccxt.binanceus({'enableRateLimit': True}) if use_us else ccxt.binance({'enableRateLimit': True})
+
+
+class MarketDataDaemon:
+    def __init__(self, yahoo=None, exchange=None, min_interval=5.0, ticker_interval=1.0, max_rows=1000,
+                 clock=time, host='127.0.0.1', port=MARKET_DATA_PORT, retries=3):
+        """
+        ``yahoo`` (``YahooSource`` interface) and ``exchange`` (ccxt
+        interface) are created on first use when not given; a ``ReplaySource``
+        can stand in for both.
+        """
+        self._yahoo = yahoo
+        self._exchange = exchange
+        self._own_exchange = exchange is None
+        self.min_interval = min_interval
+        self.ticker_interval = ticker_interval
+        self.max_rows = max_rows
+        self.clock = clock
+        self.host = host
+        self.port = port
+        self.retries = retries
+        self.requests = 0
+        self.upstream_requests = 0
+        self.clients = 0
+
+        self._yahoo_wanted = set()
+        self._yahoo_tried = set()           # Ya pedidos upstream (sin datos no se reintenta en cada petición)
+        self._yahoo_frames: Dict[str, pd.DataFrame] = {}
+        self._yahoo_refreshed = None
+        self._ohlcv: Dict[tuple, pd.DataFrame] = {}
+        self._ohlcv_refreshed: Dict[tuple, float] = {}
+        self._tickers: Dict[str, tuple] = {}         # symbol -> (refreshed, ticker)
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"📡 Market data en {self.host}:{self.port} (refresco mínimo {self.min_interval:.0f}s)")
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # --- Upstream (en hilos: yfinance y ccxt son bloqueantes) ---
+    @property
+    def yahoo(self):
+        if self._yahoo is None:
+            from market_data import YahooSource
+
+            self._yahoo = YahooSource(interval="15m")
+        return self._yahoo
+
+    def _ccxt(self, method, *args, **kwargs):
+        """ccxt call with retries; switches to Binance US on region blocks (as ``sol_sniper_bot.fetch_data``)."""
+        if self._exchange is None:
+            self._exchange = ccxt_exchange()
+        for attempt in range(self.retries):
+            try:
+                self.upstream_requests += 1
+                return getattr(self._exchange, method)(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"⚠️ Error upstream {method} (intento {attempt + 1}/{self.retries}): {e}")
+                if attempt == self.retries - 1:
+                    raise
+                if self._own_exchange and ("451" in str(e) or "403" in str(e) or "Service Unavailable" in str(e)):
+                    import ccxt
+                    if not isinstance(self._exchange, ccxt.binanceus):
+                        logger.info("🇺🇸 Cambiando a la API de Binance US (región bloqueada)...")
+                        self._exchange = ccxt_exchange(use_us=True)
+                time.sleep(2 ** attempt)
+
+    def _yahoo_download(self, tickers, start):
+        self.upstream_requests += 1
+        return self.yahoo.fetch_many(tickers, start=start)
+
+    async def _once(self, key, refresh):
+        """Run ``refresh()`` once for ``key``; concurrent callers await the same run."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(refresh())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _stale(self, refreshed, interval):
+        return refreshed is None or self.clock.time() - refreshed >= interval
+
+    # --- Yahoo: todos los tickers en una sola petición ---
+    async def yahoo_frames(self, tickers, start=None):
+        self._yahoo_wanted.update(tickers)
+        # Dos vueltas como mucho: si ya había un refresco en curso, puede no incluir un ticker nuevo
+        for _ in range(2):
+            if not (any(t not in self._yahoo_tried for t in tickers)
+                    or self._stale(self._yahoo_refreshed, self.min_interval)):
+                break
+            await self._once(('yahoo',), self._refresh_yahoo)
+        frames = {}
+        for ticker in tickers:
+            df = self._yahoo_frames.get(ticker)
+            if df is not None and start is not None:
+                df = df[df.index >= start]
+            if df is not None and len(df):
+                frames[ticker] = df
+        return frames
+
+    async def _refresh_yahoo(self):
+        from market_data import fetch_with_retries
+
+        tickers = sorted(self._yahoo_wanted)
+        # Desde la caché más atrasada (o historia completa si hay un ticker nuevo)
+        lasts = [self._yahoo_frames[t].index[-1] for t in tickers if t in self._yahoo_frames]
+        start = min(lasts) if len(lasts) == len(tickers) else None
+        frames = await asyncio.get_running_loop().run_in_executor(
+            None, fetch_with_retries, lambda: self._yahoo_download(tickers, start))
+        for ticker, df in (frames or {}).items():
+            self._yahoo_frames[ticker] = _merge(self._yahoo_frames.get(ticker), df, self.max_rows)
+        self._yahoo_tried.update(tickers)
+        self._yahoo_refreshed = self.clock.time()
+
+    # --- ccxt: velas incrementales por (símbolo, timeframe) y ticker ---
+    async def ohlcv(self, symbol, timeframe='15m', since=None, limit=500):
+        key = (symbol, timeframe)
+        if self._stale(self._ohlcv_refreshed.get(key), self.min_interval):
+            await self._once(('ohlcv',) + key, lambda: self._refresh_ohlcv(key))
+        df = self._ohlcv.get(key)
+        if df is None or len(df) == 0:
+            return []
+        if since is not None:
+            df = df[df.index >= pd.Timestamp(since, unit='ms', tz='UTC')]
+            df = df.iloc[:limit] if limit else df
+        elif limit:
+            df = df.iloc[-limit:]
+        return _frame_to_rows(df)
+
+    async def _refresh_ohlcv(self, key):
+        symbol, timeframe = key
+        cached = self._ohlcv.get(key)
+        since = _to_ms(cached.index[-1:])[0] if cached is not None and len(cached) else None
+        limit = self.max_rows if since is None else None
+        rows = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self._ccxt('fetch_ohlcv', symbol, timeframe, since=since, limit=limit))
+        if rows:
+            new = _frame_from_rows(rows)
+            self._ohlcv[key] = _merge(cached, new, self.max_rows)
+        self._ohlcv_refreshed[key] = self.clock.time()
+
+    async def ticker(self, symbol):
+        refreshed, ticker = self._tickers.get(symbol, (None, None))
+        if self._stale(refreshed, self.ticker_interval):
+            async def refresh():
+                value = await asyncio.get_running_loop().run_in_executor(None, self._ccxt, 'fetch_ticker', symbol)
+                self._tickers[symbol] = (self.clock.time(), value)
+            await self._once(('ticker', symbol), refresh)
+            ticker = self._tickers[symbol][1]
+        return ticker
+
+    # --- Servidor ---
+    async def _reply(self, msg):
+        op = msg.get('op')
+        if op == 'yahoo':
+            start = None if msg.get('start') is None else pd.Timestamp(msg['start'], unit='ms', tz='UTC')
+            frames = await self.yahoo_frames(msg['tickers'], start)
+            return {'frames': {t: _frame_to_wire(df) for t, df in frames.items()}}
+        if op == 'ohlcv':
+            return {'rows': await self.ohlcv(msg['symbol'], msg.get('timeframe', '15m'), msg.get('since'),
+                                             msg.get('limit'))}
+        if op == 'ticker':
+            return {'ticker': await self.ticker(msg['symbol'])}
+        if op == 'stats':
+            return {'requests': self.requests, 'upstream_requests': self.upstream_requests, 'clients': self.clients,
+                    'yahoo': sorted(self._yahoo_frames), 'ohlcv': sorted('/'.join(k) for k in self._ohlcv)}
+        raise ValueError(f"operación desconocida: {op}")
+
+    async def _handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while line := await reader.readline():
+                self.requests += 1
+                try:
+                    reply = await self._reply(json.loads(line))
+                except Exception as e:
+                    reply = {'error': f"{type(e).__name__}: {e}"}
+                writer.write((json.dumps(reply, default=str) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+
+class MarketDataClient:
+    """Blocking client for the bots (one persistent connection, thread-safe)."""
+
+    def __init__(self, host='127.0.0.1', port=MARKET_DATA_PORT, timeout=60.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _call(self, payload):
+        data = (json.dumps(payload) + "\n").encode()
+        with self._lock:
+            # Un reintento con conexión nueva (p. ej. el daemon se reinició)
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(data)
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("conexión cerrada por el daemon")
+                    break
+                except OSError:
+                    self.close()
+                    if attempt:
+                        raise
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise RuntimeError(f"market data: {reply['error']}")
+        return reply
+
+    # --- Interfaz YahooSource ---
+    def fetch(self, ticker, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        return self.fetch_many([ticker], start).get(ticker, pd.DataFrame())
+
+    def fetch_many(self, tickers, start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        start = None if start is None else _to_ms(pd.DatetimeIndex([start]))[0]
+        reply = self._call({'op': 'yahoo', 'tickers': list(tickers), 'start': start})
+        return {t: _frame_from_wire(f) for t, f in reply['frames'].items()}
+
+    # --- Interfaz ccxt ---
+    def fetch_ohlcv(self, symbol, timeframe='15m', since=None, limit=500):
+        return self._call({'op': 'ohlcv', 'symbol': symbol, 'timeframe': timeframe, 'since': since,
+                           'limit': limit})['rows']
+
+    def fetch_ticker(self, symbol):
+        return self._call({'op': 'ticker', 'symbol': symbol})['ticker']
+
+    def stats(self):
+        return self._call({'op': 'stats'})
+
+
+def client_from_env(environ=None):
+    """``MarketDataClient`` for ``MARKET_DATA=host:port`` or None (each bot goes upstream itself)."""
+    environ = os.environ if environ is None else environ
+    value = environ.get("MARKET_DATA", "").strip()
+    if not value:
+        return None
+    host, _, port = value.rpartition(':')
+    return MarketDataClient(host or '127.0.0.1', int(port or MARKET_DATA_PORT))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de datos de mercado para los bots")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=MARKET_DATA_PORT)
+    parser.add_argument('--min-interval', type=float, default=5.0, help="Segundos que se sirve la caché sin refrescar")
+    args = parser.parse_args()
+
+    async def serve():
+        async with MarketDataDaemon(min_interval=args.min_interval, host=args.host, port=args.port):
+            await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Latency metrics for the live bots.
+
+Every cycle phase (fetch, features, observation, predict, risk, DB write,
+TensorBoard write) is timed into a per-label histogram of recent samples.
+The registry is exposed in Prometheus text format on a small local HTTP
+endpoint (``/metrics``) and summarised periodically in the log as
+p50/p95/p99, so decision latency drift after candle close can be alerted on.
+
+No dependency on ``prometheus_client``: a summary with quantiles over the
+last ``window`` samples plus ``_sum``/``_count`` is all the bots need.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+PHASE_SECONDS = "live_cycle_phase_seconds"
+DECISION_LATENCY = "live_decision_latency_seconds"
+FILL_LATENCY = "order_fill_latency_seconds"
+
+_HELP = {
+    PHASE_SECONDS: "Duración de cada fase del ciclo de trading",
+    DECISION_LATENCY: "Segundos desde el cierre de vela hasta la decisión",
+    FILL_LATENCY: "Segundos desde la señal hasta la ejecución de la orden",
+}
+
+
+class Histogram:
+    """Running count/sum plus the last ``window`` samples for quantiles."""
+
+    def __init__(self, window=2048):
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def quantiles(self, qs=QUANTILES):
+        if not self._recent:
+            return {q: float('nan') for q in qs}
+        values = np.quantile(np.fromiter(self._recent, dtype=np.float64), qs)
+        return dict(zip(qs, values.tolist()))
+
+
+class Metrics:
+    """Thread-safe registry of histograms keyed by ``(name, labels)``."""
+
+    def __init__(self, window=2048):
+        self.window = window
+        self._lock = threading.Lock()
+        self._series = OrderedDict()   # (name, ((label, value), ...)) -> Histogram
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = Histogram(self.window)
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name=PHASE_SECONDS, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """``[(name, labels, count, sum, {q: value})]`` for every series."""
+        with self._lock:
+            return [(name, dict(labels), h.count, h.sum, h.quantiles()) for (name, labels), h in self._series.items()]
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines, seen = [], set()
+        for name, labels, count, total, quantiles in self.snapshot():
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} summary")
+            base = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            for q, value in quantiles.items():
+                sep = "," if base else ""
+                lines.append(f'{name}{{{base}{sep}quantile="{q}"}} {value:.6g}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{name}_sum{suffix} {total:.6g}")
+            lines.append(f"{name}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One log line per bot with p50/p95/p99 of each phase, in ms."""
+        by_bot = OrderedDict()
+        for name, labels, count, _, q in self.snapshot():
+            what = labels.get('phase', {DECISION_LATENCY: 'decision', FILL_LATENCY: 'fill'}.get(name, name))
+            text = f"{what} p50={q[0.5] * 1000:.1f} p95={q[0.95] * 1000:.1f} p99={q[0.99] * 1000:.1f}ms (n={count})"
+            by_bot.setdefault(labels.get('bot', '-'), []).append(text)
+        return "\n".join(f"📈 Latencias {bot} | " + " | ".join(parts) for bot, parts in by_bot.items())
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Serve ``/metrics`` from a daemon thread; returns the server."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📡 Métricas Prometheus en http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def log_summaries(self, interval=3600.0):
+        """Log ``summary()`` every ``interval`` seconds from a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                text = self.summary()
+                if text:
+                    logger.info(text)
+
+        threading.Thread(target=loop, name="metrics-log", daemon=True).start()
+
+
+# Registro compartido por todo el proceso
+METRICS = Metrics()
+
+
+def start_from_env(registry=METRICS, environ=None):
+    """
+    Start the endpoint and log summaries as configured by ``METRICS_PORT``
+    (0 disables the endpoint), ``METRICS_HOST`` and ``METRICS_LOG_SECONDS``.
+    """
+    import os
+
+    environ = os.environ if environ is None else environ
+    port = int(environ.get("METRICS_PORT", 9108))
+    if port:
+        try:
+            registry.serve(port, environ.get("METRICS_HOST", "127.0.0.1"))
+        except OSError as e:
+            logger.error(f"No se pudo abrir el endpoint de métricas en el puerto {port}: {e}")
+    registry.log_summaries(float(environ.get("METRICS_LOG_SECONDS", 3600)))
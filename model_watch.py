@@ -0,0 +1,89 @@
+"""
+Hot-reload of production models for the live traders.
+
+``ModelWatcher`` polls the model file from a daemon thread. When a new
+version appears (and has stopped changing for one poll), it is loaded and
+validated in that background thread; the trader only picks it up with
+``take()`` between cycles, so the swap is atomic, no candle is missed and the
+decision path never pays the load.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWatcher:
+    def __init__(self, path, loader, validate=None, interval=10.0):
+        """
+        ``loader(path)`` returns the model; ``validate(model)`` raises if the
+        model must not go live.
+        """
+        self.path = path
+        self.loader = loader
+        self.validate = validate
+        self.interval = interval
+        self._signature = self._stat()   # Versión activa
+        self._candidate = None           # Versión vista en el último sondeo
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def check(self) -> bool:
+        """One poll; True when a new model has been loaded and is waiting for ``take()``."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            self._candidate = None
+            return False
+        if signature != self._candidate:
+            # Archivo recién modificado: esperar a que deje de cambiar (escritura en curso)
+            self._candidate = signature
+            return False
+
+        self._candidate = None
+        try:
+            model = self.loader(self.path)
+            if self.validate is not None:
+                self.validate(model)
+        except Exception as e:
+            # No reintentar la misma versión rota en cada sondeo
+            self._signature = signature
+            logger.error(f"❌ Nuevo modelo en {self.path} descartado: {e}")
+            return False
+
+        with self._lock:
+            self._pending = model
+            self._signature = signature
+        logger.info(f"🔄 Nuevo modelo validado ({self.path}). Se activará en el próximo ciclo.")
+        return True
+
+    def take(self):
+        """The validated model waiting to go live, or None."""
+        with self._lock:
+            model, self._pending = self._pending, None
+        return model
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error vigilando el modelo {self.path}: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -3,22 +3,28 @@ import pandas as pd
 import numpy as np
 import json
 import os
+from breakout import CASH, SHARES, TRADES, simulate
+from timeframes import add_timeframe_features
 
 # --- CONFIG ---
 DATA_FILE = "datos_sol_15m_binance.csv"
 INITIAL_CAPITAL = 200.0
 POSITION_SIZE_PCT = 0.60  # 60% tactic
 COMMISSION = 0.0005      # 0.05%
+MTF_TIMEFRAMES = ()       # e.g. ('1h', '4h') to add higher-timeframe columns (see timeframes.py)
+
+def load_data(path=DATA_FILE, timeframes=MTF_TIMEFRAMES):
+    df = pd.read_csv(path)
+    if timeframes:
+        # Derived from the 15m series and cached, so this is almost free
+        df = add_timeframe_features(df, timeframes)
+    return df
 
 def backtest(df, params):
     # Unpack params
     breakout_period = params['breakout_period']
     ema_period = params['ema_period']
     
-    stop_loss_pct = params['stop_loss']       
-    trailing_trigger = params['ts_trigger']   
-    trailing_dist = params['ts_dist']         
-    
     # --- PREPARE DATA ---
     # We use numpy for raw speed
     highs = df['High'].values
@@ -31,79 +37,20 @@ def backtest(df, params):
     # EMA for filter
     ema = df['Close'].ewm(span=ema_period, adjust=False).mean().values
     
-    # --- LOOP ---
-    balance = INITIAL_CAPITAL
-    shares = 0
-    max_price_since_entry = 0
-    entry_price = 0
-    
-    trades = 0
-    wins = 0
-    equity_curve = []
+    # Optional higher-timeframe trend filter, e.g. "EMA_50_Dist_1h" (> 0 = above the 1h EMA)
+    htf_col = params.get('htf_trend_column')
+    htf_trend = df[htf_col].values if htf_col else None
     
-    # Start after enough data
+    # --- LOOP ---
+    # Same kernel as the live bot (breakout.py), compiled with numba if available
     start_idx = max(breakout_period, ema_period) + 10
-    
-    for i in range(start_idx, len(closes)):
-        current_price = closes[i]
-        equity = balance + (shares * current_price)
-        equity_curve.append(equity)
-        
-        # 1. EXIT LOGIC
-        if shares > 0:
-            if current_price > max_price_since_entry:
-                max_price_since_entry = current_price
-            
-            pnl_pct = (current_price - entry_price) / entry_price
-            
-            sell_signal = False
-            reason = ""
-            
-            # SL
-            if pnl_pct < -stop_loss_pct:
-                sell_signal = True
-            
-            # TS
-            if (max_price_since_entry - entry_price) / entry_price >= trailing_trigger:
-                drop_from_high = (max_price_since_entry - current_price) / max_price_since_entry
-                if drop_from_high >= trailing_dist:
-                    sell_signal = True
-            
-            if sell_signal:
-                revenue = shares * current_price * (1 - COMMISSION)
-                balance += revenue
-                if revenue > (shares * entry_price): wins += 1
-                shares = 0
-                max_price_since_entry = 0
-                entry_price = 0
-                trades += 1
-                continue 
-        
-        # 2. ENTRY LOGIC
-        if shares == 0:
-            # Condition 1: Price broke above the N-period High
-            breakout = current_price > roll_max[i]
-            
-            # Condition 2: Trend aligned
-            trend_ok = current_price > ema[i]
-            
-            if breakout and trend_ok:
-                invest_amount = balance * POSITION_SIZE_PCT
-                if invest_amount < 10: invest_amount = balance
-                
-                cost = invest_amount * (1 + COMMISSION)
-                if balance >= cost:
-                    actual_invest = invest_amount
-                    shares = (actual_invest / current_price) * (1 - COMMISSION)
-                    balance -= actual_invest
-                    
-                    entry_price = current_price
-                    max_price_since_entry = current_price
-
-    final_equity = balance + (shares * closes[-1])
+    trend = htf_trend > 0 if htf_trend is not None else None
+    state, equity_arr = simulate(closes, roll_max, ema, params, trend=trend, start=start_idx,
+                                 balance=INITIAL_CAPITAL, allocation=POSITION_SIZE_PCT, commission=COMMISSION)
+    trades = int(state[TRADES])
+    final_equity = state[CASH] + (state[SHARES] * closes[-1])
     
     # Drawdown Calc
-    equity_arr = np.array(equity_curve)
     peak = np.maximum.accumulate(equity_arr)
     drawdown = (peak - equity_arr) / peak
     max_dd = drawdown.max() if len(drawdown) > 0 else 0
@@ -161,7 +108,7 @@ if __name__ == "__main__":
         print(f"File {DATA_FILE} not found")
         exit()
         
-    df = pd.read_csv(DATA_FILE)
+    df = load_data(DATA_FILE)
     print(f"Data loaded: {len(df)} candles")
 
     study = optuna.create_study(direction="maximize")
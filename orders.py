@@ -0,0 +1,428 @@
+"""
+Order execution for the live bots.
+
+``OrderGateway`` is the async client: ``submit`` / ``cancel`` over one
+long-lived connection, with fills pushed back as events (``on_fill``
+callbacks, ``wait``). Signal-to-fill latency goes to the shared
+metrics registry (``order_fill_latency_seconds``).
+
+``OrderRouter`` runs a gateway on its own event loop thread for the
+synchronous bots (the SOL sniper): ``send`` never blocks the caller.
+
+``PaperExchange`` is the local stand-in it talks to: an asyncio TCP service
+(newline-delimited JSON) that fills orders against replayed or live candles
+(any ``fetch_ohlcv`` source, e.g. ``replay.ReplaySource``) with configurable
+latency and fees. Market orders fill at the last price; limit orders rest
+until a later candle trades through them.
+
+Protocol, one JSON object per line:
+    -> {"op": "submit", "id", "symbol", "side": "buy"|"sell", "qty", "type": "market"|"limit", "price"}
+    -> {"op": "cancel", "id"}
+    <- {"event": "ack"|"fill"|"canceled"|"rejected", "id", ...}
+
+Offline benchmark:
+    python orders.py bench datos_sol_15m_binance.csv --orders 5000 --latency 0.002
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from metrics import FILL_LATENCY, METRICS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Order:
+    id: str
+    symbol: str
+    side: str
+    qty: float
+    type: str = "market"
+    price: Optional[float] = None
+    status: str = "new"           # new -> open -> filled | canceled | rejected
+    fill_price: Optional[float] = None
+    fee: float = 0.0
+    reason: Optional[str] = None
+    signal_time: float = field(default_factory=time.perf_counter)
+    filled_time: Optional[float] = None
+
+    @property
+    def done(self):
+        return self.status in ("filled", "canceled", "rejected")
+
+    @property
+    def latency(self):
+        """Seconds from the signal (or submit) to the fill."""
+        return None if self.filled_time is None else self.filled_time - self.signal_time
+
+
+class PaperExchange:
+    def __init__(self, source, latency=0.0, fee=0.001, timeframe='15m', match_interval=0.05,
+                 host='127.0.0.1', port=0):
+        """
+        ``source.fetch_ohlcv(symbol, timeframe, limit=1)`` gives the last
+        candle; ``latency`` seconds are added before every ack / fill and
+        ``fee`` is charged on the notional of each fill.
+        """
+        self.source = source
+        self.latency = latency
+        self.fee = fee
+        self.timeframe = timeframe
+        self.match_interval = match_interval
+        self.host = host
+        self.port = port
+        self.resting: Dict[str, tuple] = {}   # id -> (msg, writer)
+        self.fills = 0
+        self._server = None
+        self._matcher = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._matcher = asyncio.create_task(self._match_loop())
+        logger.info(f"📒 Paper exchange en {self.host}:{self.port} (latencia {self.latency * 1000:.0f} ms, comisión {self.fee:.2%})")
+        return self
+
+    async def stop(self):
+        if self._matcher:
+            self._matcher.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def last_candle(self, symbol):
+        rows = self.source.fetch_ohlcv(symbol, self.timeframe, limit=1)
+        return rows[-1] if rows else None   # [ts, open, high, low, close, volume]
+
+    @staticmethod
+    async def _send(writer, payload):
+        writer.write((json.dumps(payload) + "\n").encode())
+        await writer.drain()
+
+    async def _fill(self, msg, price, writer):
+        self.fills += 1
+        await self._send(writer, {'event': 'fill', 'id': msg['id'], 'price': price,
+                                  'qty': msg['qty'], 'fee': price * msg['qty'] * self.fee})
+
+    @staticmethod
+    def _crosses(msg, candle):
+        """Price a limit order fills at on ``candle`` (the open if it gaps through), or None."""
+        _, open_, high, low = candle[:4]
+        limit = msg['price']
+        if msg['side'] == 'buy':
+            return open_ if open_ <= limit else (limit if low <= limit else None)
+        return open_ if open_ >= limit else (limit if high >= limit else None)
+
+    async def _on_submit(self, msg, writer):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        candle = self.last_candle(msg['symbol'])
+        if candle is None or msg.get('qty', 0) <= 0 or msg.get('side') not in ('buy', 'sell'):
+            await self._send(writer, {'event': 'rejected', 'id': msg['id'], 'reason': 'sin precio o orden inválida'})
+            return
+        await self._send(writer, {'event': 'ack', 'id': msg['id']})
+        if msg.get('type', 'market') == 'market':
+            await self._fill(msg, candle[4], writer)
+            return
+        price = self._crosses(msg, [candle[0]] + [candle[4]] * 4)
+        if price is not None:
+            await self._fill(msg, price, writer)
+        else:
+            # Se casa contra las velas posteriores a la actual (aunque el replay salte varias entre sondeos)
+            self.resting[msg['id']] = (dict(msg, since=candle[0] + 1), writer)
+
+    async def _on_cancel(self, msg, writer):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.resting.pop(msg['id'], None) is not None:
+            await self._send(writer, {'event': 'canceled', 'id': msg['id']})
+        else:
+            await self._send(writer, {'event': 'rejected', 'id': msg['id'], 'reason': 'orden no abierta'})
+
+    async def _match_loop(self):
+        while True:
+            await asyncio.sleep(self.match_interval)
+            for order_id, (msg, writer) in list(self.resting.items()):
+                for candle in self.source.fetch_ohlcv(msg['symbol'], self.timeframe, since=msg['since'], limit=1000):
+                    price = self._crosses(msg, candle)
+                    if price is not None:
+                        break
+                    msg['since'] = candle[0] + 1
+                else:
+                    continue
+                if self.resting.pop(order_id, None) is not None:
+                    try:
+                        await self._fill(msg, price, writer)
+                    except ConnectionError:
+                        pass
+
+    async def _handle(self, reader, writer):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                msg = json.loads(line)
+                handler = self._on_submit if msg.get('op') == 'submit' else self._on_cancel
+                # Cada orden en su propia tarea: la latencia simulada no serializa la conexión
+                task = asyncio.create_task(handler(msg, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            for order_id in [i for i, (_, w) in self.resting.items() if w is writer]:
+                del self.resting[order_id]
+            writer.close()
+
+
+class OrderGateway:
+    """Async order client over one persistent connection (paper exchange protocol)."""
+
+    def __init__(self, host='127.0.0.1', port=9200, bot='-', metrics=None):
+        self.host = host
+        self.port = port
+        self.bot = bot
+        self.metrics = metrics or METRICS
+        self.orders: Dict[str, Order] = {}
+        self.on_fill: List[Callable[[Order], None]] = []
+        self._ids = itertools.count(1)
+        self._acks: Dict[str, asyncio.Future] = {}
+        self._done: Dict[str, asyncio.Future] = {}
+        self._reader = self._writer = self._task = None
+        self._connecting = asyncio.Lock()
+
+    async def connect(self):
+        # Varios submit a la vez tras un corte: una sola conexión
+        async with self._connecting:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                self._task = asyncio.create_task(self._read_events())
+        return self
+
+    async def close(self):
+        task, writer = self._task, self._writer
+        self._disconnected()
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if writer:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _send(self, payload):
+        self._writer.write((json.dumps(payload) + "\n").encode())
+        await self._writer.drain()
+
+    async def submit(self, symbol, side, qty, type='market', price=None, signal_time=None) -> Order:
+        """Send an order and wait for the ack (or rejection); the fill arrives later as an event."""
+        await self.connect()
+        loop = asyncio.get_running_loop()
+        order = Order(f"{self.bot}-{next(self._ids)}", symbol, side, float(qty), type, price)
+        if signal_time is not None:
+            order.signal_time = signal_time
+        self.orders[order.id] = order
+        ack = self._acks[order.id] = loop.create_future()
+        self._done[order.id] = loop.create_future()
+        try:
+            await self._send({'op': 'submit', 'id': order.id, 'symbol': symbol, 'side': side,
+                              'qty': order.qty, 'type': type, 'price': price})
+            await ack
+        except ConnectionError:
+            self._disconnected()
+        finally:
+            self._acks.pop(order.id, None)
+        return order
+
+    async def cancel(self, order: Order) -> Order:
+        if order.done:
+            return order
+        await self._send({'op': 'cancel', 'id': order.id})
+        return await self.wait(order)
+
+    async def wait(self, order: Order, timeout=None) -> Order:
+        """Wait until ``order`` is filled, canceled or rejected."""
+        future = self._done.get(order.id)
+        if future is not None:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        return order
+
+    def _resolve(self, order):
+        ack = self._acks.get(order.id)
+        if ack is not None and not ack.done():
+            ack.set_result(order)
+        if order.done:
+            done = self._done.pop(order.id, None)
+            if done is not None and not done.done():
+                done.set_result(order)
+
+    def _disconnected(self):
+        """Reject every pending order and drop the connection so the next ``submit`` reconnects."""
+        writer = self._writer
+        self._reader = self._writer = self._task = None
+        if writer is not None:
+            writer.close()
+        for order_id in list(self._done):
+            order = self.orders[order_id]
+            order.status, order.reason = 'rejected', 'disconnected'
+            self._resolve(order)
+
+    async def _read_events(self):
+        try:
+            while line := await self._reader.readline():
+                event = json.loads(line)
+                order = self.orders.get(event['id'])
+                if order is None:
+                    continue
+                kind = event['event']
+                if kind == 'ack':
+                    order.status = 'open'
+                elif kind == 'fill':
+                    order.status, order.fill_price, order.fee = 'filled', event['price'], event['fee']
+                    order.filled_time = time.perf_counter()
+                    self.metrics.observe(FILL_LATENCY, order.latency, bot=self.bot)
+                    for callback in self.on_fill:
+                        try:
+                            callback(order)
+                        except Exception as e:
+                            logger.error(f"Error en callback de ejecución ({order.id}): {e}")
+                else:
+                    order.status, order.reason = kind, event.get('reason')
+                self._resolve(order)
+            logger.warning(f"🔌 Conexión con el exchange cerrada ({self.host}:{self.port})")
+        except Exception as e:
+            logger.error(f"❌ Error leyendo eventos del exchange ({self.host}:{self.port}): {e}")
+        finally:
+            # close() ya ha limpiado si la tarea se cancela desde allí
+            if self._task is asyncio.current_task():
+                self._disconnected()
+
+
+class OrderRouter:
+    """Fire-and-forget orders for synchronous bots: an ``OrderGateway`` on a background event loop."""
+
+    def __init__(self, gateway: OrderGateway, timeout=30.0):
+        self.gateway = gateway
+        self.timeout = timeout
+        self.pending = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="orders", daemon=True)
+        self._thread.start()
+
+    def send(self, symbol, side, qty, signal_time=None):
+        """Schedule an order; returns a ``concurrent.futures.Future`` with the final ``Order`` (or None)."""
+        future = asyncio.run_coroutine_threadsafe(self._send(symbol, side, qty, signal_time), self._loop)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return future
+
+    async def _send(self, symbol, side, qty, signal_time):
+        try:
+            order = await self.gateway.submit(symbol, side, qty, signal_time=signal_time)
+            await self.gateway.wait(order, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Orden {side} de {symbol} sin ejecutar tras {self.timeout:.0f}s")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error enviando orden {side} de {symbol}: {e}")
+            return None
+        if order.status == 'filled':
+            logger.info(f"📬 Orden {order.id} ejecutada: {side} {qty:.6f} {symbol} @ {order.fill_price:.4f} "
+                        f"(comisión {order.fee:.4f}, {order.latency * 1000:.1f} ms desde la señal)")
+        else:
+            logger.warning(f"⚠️ Orden {order.id} {order.status}: {order.reason}")
+        return order
+
+    def close(self):
+        """Wait for the orders in flight (up to ``timeout``), close the gateway and stop the loop."""
+        wait_futures(set(self.pending), timeout=self.timeout)
+        asyncio.run_coroutine_threadsafe(self.gateway.close(), self._loop).result(self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(self.timeout)
+
+
+def gateway_from_env(bot, environ=None):
+    """``OrderGateway`` for ``ORDER_GATEWAY=host:port`` or None (trades stay simulated in-process)."""
+    environ = os.environ if environ is None else environ
+    value = environ.get("ORDER_GATEWAY", "").strip()
+    if not value:
+        return None
+    host, _, port = value.rpartition(':')
+    return OrderGateway(host or '127.0.0.1', int(port), bot=bot)
+
+
+async def bench(source, symbol, orders=1000, latency=0.0, fee=0.001, concurrency=50):
+    """Signal-to-fill latency and throughput of ``orders`` market orders against a paper exchange."""
+    async with PaperExchange(source, latency=latency, fee=fee) as exchange:
+        async with OrderGateway(port=exchange.port, bot="BENCH") as gateway:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                async with slots:
+                    order = await gateway.submit(symbol, 'buy' if i % 2 == 0 else 'sell', 1.0)
+                    await gateway.wait(order)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(orders)))
+            elapsed = time.perf_counter() - started
+    latencies = sorted(o.latency for o in gateway.orders.values() if o.latency is not None)
+    pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else float('nan')
+    return {'orders': orders, 'filled': len(latencies), 'seconds': elapsed,
+            'orders_per_second': orders / elapsed if elapsed else float('inf'),
+            'p50_ms': pick(0.5), 'p99_ms': pick(0.99)}
+
+
+def main():
+    from replay import ReplaySource, SimulatedClock, load_candles
+
+    parser = argparse.ArgumentParser(description="Paper exchange local y benchmark de ejecución")
+    parser.add_argument('mode', choices=['bench', 'serve'])
+    parser.add_argument('csv', help="Velas guardadas (p. ej. datos_sol_15m_binance.csv)")
+    parser.add_argument('--symbol', default='SOL/USDT')
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latencia simulada por orden (s)")
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--port', type=int, default=9200)
+    args = parser.parse_args()
+
+    candles = load_candles(args.csv)
+    clock = SimulatedClock(candles.index[-1].timestamp() + 60)
+    source = ReplaySource(candles, clock)
+    if args.mode == 'bench':
+        print(asyncio.run(bench(source, args.symbol, args.orders, args.latency, args.fee)))
+        return
+
+    async def serve():
+        async with PaperExchange(source, latency=args.latency, fee=args.fee, port=args.port):
+            await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Batched deterministic inference for several SB3 PPO policies.
+
+Policies with the same architecture have their weights stacked along a new
+leading dimension and are evaluated together with ``torch.func.vmap``, so a
+portfolio of N assets costs one forward pass per cycle instead of N
+``model.predict`` calls. Policies with a different architecture (e.g. other
+``net_arch`` from an Optuna run) simply end up in their own group.
+"""
+import copy
+from collections import OrderedDict
+from typing import Dict, Mapping
+
+import numpy as np
+import torch
+from gymnasium import spaces
+from torch import nn
+from torch.func import functional_call, stack_module_state, vmap
+
+
+class _ActorLogits(nn.Module):
+    """Actor path of an ``ActorCriticPolicy``: features -> latent_pi -> action logits."""
+
+    def __init__(self, policy):
+        super().__init__()
+        extractor = policy.features_extractor if policy.share_features_extractor else policy.pi_features_extractor
+        self.features_extractor = extractor
+        self.policy_net = policy.mlp_extractor.policy_net
+        self.action_net = policy.action_net
+
+    def forward(self, obs):
+        return self.action_net(self.policy_net(self.features_extractor(obs)))
+
+
+def _signature(module: nn.Module):
+    return tuple((name, tuple(p.shape)) for name, p in module.state_dict().items())
+
+
+def load_policy(path, device="cpu"):
+    """Load only the policy network of a PPO zip (no rollout buffer, no optimizer state)."""
+    from stable_baselines3 import PPO
+
+    model = PPO.load(path, device=device)
+    policy = model.policy
+    policy.set_training_mode(False)
+    return policy
+
+
+class StackedPolicies:
+    """
+    Deterministic ``predict`` for a dict ``{name: ActorCriticPolicy}`` in one batched call.
+
+    Only ``Discrete`` action spaces are stacked (deterministic action = argmax
+    of the logits, as in ``policy.predict(obs, deterministic=True)``); any
+    other policy falls back to its own ``predict``.
+    """
+
+    def __init__(self, policies: Mapping[str, object], device="cpu"):
+        self.device = torch.device(device)
+        self.names = list(policies)
+        self.groups = []   # (names, base module, params, buffers)
+        self.fallback: Dict[str, object] = {}
+
+        by_signature = OrderedDict()
+        for name, policy in policies.items():
+            if not isinstance(policy.action_space, spaces.Discrete):
+                self.fallback[name] = policy
+                continue
+            actor = _ActorLogits(policy).to(self.device).eval()
+            by_signature.setdefault(_signature(actor), []).append((name, actor))
+
+        for members in by_signature.values():
+            names = [name for name, _ in members]
+            actors = [actor for _, actor in members]
+            params, buffers = stack_module_state(actors)
+            # Plantilla sin pesos propios: functional_call inyecta los apilados
+            base = copy.deepcopy(actors[0]).to("meta")
+            self.groups.append((names, base, params, buffers))
+
+    def _group_logits(self, base, params, buffers, obs):
+        def single(p, b, x):
+            return functional_call(base, (p, b), (x.unsqueeze(0),)).squeeze(0)
+        return vmap(single)(params, buffers, obs)
+
+    @torch.no_grad()
+    def predict(self, observations: Mapping[str, np.ndarray]) -> Dict[str, int]:
+        """Deterministic action for every policy that has an observation this cycle."""
+        actions = {}
+        for names, base, params, buffers in self.groups:
+            idx = [i for i, name in enumerate(names) if name in observations]
+            if not idx:
+                continue
+            obs = torch.as_tensor(np.stack([observations[names[i]] for i in idx]),
+                                  dtype=torch.float32, device=self.device)
+            if len(idx) == len(names):
+                p, b = params, buffers
+            else:
+                sel = torch.as_tensor(idx, device=self.device)
+                p = {k: v.index_select(0, sel) for k, v in params.items()}
+                b = {k: v.index_select(0, sel) for k, v in buffers.items()}
+            logits = self._group_logits(base, p, b, obs)
+            for i, action in zip(idx, logits.argmax(dim=-1).cpu().numpy()):
+                actions[names[i]] = int(action)
+
+        for name, policy in self.fallback.items():
+            if name in observations:
+                action, _ = policy.predict(observations[name], deterministic=True)
+                actions[name] = int(np.asarray(action).item())
+        return actions
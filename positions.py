@@ -0,0 +1,161 @@
+"""
+Simulated position bookkeeping shared by the live trader and its shadows.
+
+``PositionBook`` holds one long-only simulated position with the LiveTrader
+risk rules: mechanical stop loss, cooldown after a sale and the prop-firm
+daily drawdown tracking on a $100k account.
+"""
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PositionBook:
+    # Campos que sobreviven a un reinicio (ver snapshots.py)
+    STATE_FIELDS = ('current_position', 'entry_price', 'sim_balance', 'daily_start_balance',
+                    'last_day_checked', 'max_daily_loss', 'wins', 'losses', 'last_sell_time',
+                    'position_qty')
+
+    def __init__(self, name, config, balance=100000.0, now=None, log: Optional[logging.Logger] = logger):
+        """``log=None`` silences the book (shadow models)."""
+        self.name = name
+        self.log = log
+
+        self.current_position = 0 # 0: Nada, 1: Long
+        self.entry_price = 0.0
+        self.position_qty = 0.0 # Unidades compradas (cantidad de la orden de cierre)
+
+        # Prop Firm Tracking (Simulated $100k Account)
+        self.sim_balance = balance
+        self.daily_start_balance = balance
+        self.last_day_checked = now.day if now is not None else None
+        self.max_daily_loss = 0.0
+        self.wins = 0
+        self.losses = 0
+
+        # Risk Config
+        self.cooldown_seconds = config.env_params.get("cooldown_steps", 8) * 15 * 60 # Steps * 15m * 60s
+        self.stop_loss_pct = config.env_params.get("stop_loss", 0.03)
+        self.last_sell_time = 0
+
+    def state(self) -> dict:
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def restore(self, state: dict):
+        for field in self.STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+        if self.current_position and not self.position_qty and self.entry_price:
+            # Snapshots anteriores sin cantidad: el balance no cambia mientras la posición está abierta
+            self.position_qty = self.sim_balance / self.entry_price
+
+    @property
+    def win_rate(self):
+        return (self.wins / (self.wins + self.losses)) * 100 if (self.wins+self.losses) > 0 else 0
+
+    def equity(self, price):
+        """Balance plus the floating PnL of the open position at ``price``."""
+        if self.current_position == 1:
+            return self.sim_balance + (price - self.entry_price) / self.entry_price * self.sim_balance # Full leverage simulation
+        return self.sim_balance
+
+    def _info(self, msg):
+        if self.log:
+            self.log.info(msg)
+
+    def _warning(self, msg):
+        if self.log:
+            self.log.warning(msg)
+
+    def check_prop_firm_rules(self, current_equity, now_dt):
+        # Reset Daily Drawdown Logic
+        today = now_dt.day
+        if self.last_day_checked is None:
+            self.last_day_checked = today
+        if today != self.last_day_checked:
+            self.daily_start_balance = self.sim_balance
+            self.last_day_checked = today
+            self.max_daily_loss = 0.0
+            self._info(f"📅 NUEVO DÍA REGISTRADO. Reset de Drawdown Diario. Balance Inicio: ${self.daily_start_balance:.2f}")
+
+        # Calculate Metrics
+        daily_drawdown = (self.daily_start_balance - current_equity) / self.daily_start_balance * 100
+
+        if daily_drawdown > self.max_daily_loss:
+            self.max_daily_loss = daily_drawdown
+
+        # Warnings (FTMO/MFF limits usually 5% daily, 10% total)
+        if daily_drawdown > 4.0:
+            self._warning(f"⚠️ PELIGRO PROP FIRM: Drawdown Diario al {daily_drawdown:.2f}% (Límite 5%)")
+
+        return daily_drawdown
+
+    def execute(self, action, price, now_dt):
+        """
+        Apply ``action`` (0: Hold, 1: Buy, 2: Sell) at ``price`` with the risk rules.
+
+        Returns the trade to persist as a dict (``action`` "COMPRA"/"VENTA",
+        ``price``, ``qty``, ``pnl_pct``, ``balance``, ``win_rate``,
+        ``daily_drawdown``, ``step``) or ``None`` when nothing was traded.
+        """
+        now_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+        now_ts = now_dt.timestamp()
+        step = int(now_ts)
+
+        # Update Equity Simulation (Floating PnL)
+        current_equity = self.equity(price)
+
+        # Check Prop Firm Rules
+        self.check_prop_firm_rules(current_equity, now_dt)
+
+        # 1. MECHANICAL STOP LOSS CHECK
+        if self.current_position == 1:
+            pnl_pct = (price - self.entry_price) / self.entry_price
+            if pnl_pct <= -self.stop_loss_pct:
+                self._warning(f"🛡️ STOP LOSS ACTIVADO a ${price:.2f} (Drop: {pnl_pct*100:.2f}%)")
+                action = 2 # Force Sell
+
+        # 2. COOLDOWN CHECK
+        if action == 1 and self.current_position == 0:
+            time_since_sell = now_ts - self.last_sell_time
+            if time_since_sell < self.cooldown_seconds:
+                hours_wait = (self.cooldown_seconds - time_since_sell) / 3600
+                if hours_wait < 0.1: # Only log if close just to reduce noise? No, log always for debug
+                    self._info(f"❄️ Enfriamiento activo. Ignorando COMPRA. Espera {hours_wait:.2f}h más.")
+                return None # Abort trade
+
+            self._info(f"🟢 [COMPRA] SEÑAL DETECTADA a ${price:.2f} ({now_str})")
+            self._info(f"   👉 Sugerencia: Abrir LONG en {self.name}")
+            self.current_position = 1
+            self.entry_price = price
+            self.position_qty = self.sim_balance / price
+
+            return {'action': "COMPRA", 'price': price, 'qty': self.position_qty, 'pnl_pct': None, 'balance': self.sim_balance,
+                    'win_rate': 0, 'daily_drawdown': self.max_daily_loss, 'step': step}
+
+        elif action == 2 and self.current_position > 0:
+            self._info(f"🔴 [VENTA] SEÑAL DETECTADA a ${price:.2f} ({now_str})")
+            pnl_pct = (price - self.entry_price) / self.entry_price
+
+            # Update Sim Balance
+            pnl_amount = self.sim_balance * pnl_pct
+            self.sim_balance += pnl_amount
+
+            if pnl_amount > 0: self.wins += 1
+            else: self.losses += 1
+
+            win_rate = self.win_rate
+
+            self._info(f"   💰 Cierre. PnL: {pnl_pct*100:.2f}% | Balance Sim: ${self.sim_balance:.2f}")
+            self._info(f"   📊 ESTADO: WinRate: {win_rate:.1f}% | DD Diario Max: {self.max_daily_loss:.2f}%")
+
+            qty, self.position_qty = self.position_qty, 0.0
+            self.current_position = 0
+            self.last_sell_time = now_ts # Start Cooldown Clock
+
+            return {'action': "VENTA", 'price': price, 'qty': qty, 'pnl_pct': pnl_pct*100, 'balance': self.sim_balance,
+                    'win_rate': win_rate, 'daily_drawdown': self.max_daily_loss, 'step': step}
+
+        # Reducir ruido: Solo loggear Hold ocasionalmente o si cambia algo
+        return None
@@ -0,0 +1,378 @@
+"""
+Accelerated historical replay of the live bots.
+
+Drives the production code paths (``LiveTrader`` and
+``sol_sniper_bot.run_bot``) from stored candles instead of live Yahoo /
+Binance in wall-clock time:
+
+- ``SimulatedClock``: ``time()`` / ``sleep()`` that advance instantly;
+- ``ReplaySource``: stored candles served as if live (only what exists at
+  the simulated time, with the forming candle known only by its open);
+- ``ReplayHTTPServer``: optional local stand-in of the Binance klines and
+  Yahoo chart endpoints, to exercise the HTTP clients as well.
+
+Uso:
+    python replay.py sniper datos_sol_15m_binance.csv --bars 5000 [--http]
+    python replay.py live datos_btc_15m_binance.csv --asset BTC --bars 2000 [--http]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Mapping, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from market_data import CandleScheduler, normalize_ohlcv
+from timeframes import candle_times, to_offset
+
+DEFAULT_START_BARS = 1000   # Historia disponible antes del primer ciclo (siembra de indicadores)
+
+
+class SimulatedClock:
+    """Clock whose ``sleep`` just moves simulated time forward."""
+
+    def __init__(self, start: Union[float, pd.Timestamp] = 0.0):
+        self.now = start.timestamp() if isinstance(start, pd.Timestamp) else float(start)
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+
+def load_candles(path: str) -> pd.DataFrame:
+    """Candles from one of the downloaded CSVs, normalized like the live sources."""
+    df = pd.read_csv(path)
+    return normalize_ohlcv(df.set_axis(candle_times(df)))
+
+
+def _key(symbol: str) -> str:
+    """'SOL/USDT', 'SOLUSDT' y 'sol-usdt' son el mismo mercado."""
+    return re.sub(r'[^A-Z0-9]', '', symbol.upper())
+
+
+class ReplaySource:
+    """
+    Stored candles served as if live.
+
+    At simulated time ``now`` only candles that opened at or before ``now``
+    exist; the last one is still forming, so only its open price is known.
+    Implements the ``YahooSource`` interface (``fetch`` / ``fetch_many``)
+    and ccxt's ``fetch_ohlcv``.
+    """
+
+    def __init__(self, candles: Union[pd.DataFrame, Mapping[str, pd.DataFrame]], clock,
+                 timeframe='15m', history=pd.Timedelta(days=5)):
+        # Un solo DataFrame sirve para cualquier símbolo que se pida
+        self.default = normalize_ohlcv(candles) if isinstance(candles, pd.DataFrame) else None
+        self.frames = {} if self.default is not None else {_key(name): normalize_ohlcv(df) for name, df in candles.items()}
+        self.clock = clock
+        self.period = to_offset(timeframe)
+        self.history = history
+        self.requests = 0
+
+    def frame(self, symbol) -> pd.DataFrame:
+        if self.default is not None:
+            return self.default
+        return self.frames[_key(symbol)]
+
+    def visible(self, symbol, start: Optional[pd.Timestamp] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        self.requests += 1
+        df = self.frame(symbol)
+        now = pd.Timestamp(self.clock.time(), unit='s', tz='UTC')
+        hi = df.index.searchsorted(now, side='right')
+        if limit is not None:
+            lo = max(hi - limit, 0)
+        else:
+            lo = df.index.searchsorted(start if start is not None else now - self.history, side='left')
+        out = df.iloc[lo:hi]
+        if len(out) and out.index[-1] + self.period > now:
+            # Vela en formación: solo se conoce su apertura
+            out = out.copy()
+            last = out.iloc[-1]
+            out.iloc[-1] = [last['Open']] * 4 + [0.0]
+        return out
+
+    # --- Interfaz YahooSource ---
+    def fetch(self, ticker, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        return self.visible(ticker, start)
+
+    def fetch_many(self, tickers, start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        frames = {t: self.visible(t, start) for t in tickers}
+        return {t: df for t, df in frames.items() if len(df)}
+
+    # --- Interfaz ccxt ---
+    def fetch_ohlcv(self, symbol, timeframe='15m', since=None, limit=500):
+        start = None if since is None else pd.Timestamp(since, unit='ms', tz='UTC')
+        df = self.visible(symbol, start, limit=None if since is not None else limit)
+        if since is not None and limit is not None:
+            df = df.iloc[:limit]
+        ms = ((df.index - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).tolist()
+        values = df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy().tolist()
+        return [[t] + row for t, row in zip(ms, values)]
+
+
+class ReplayHTTPServer:
+    """
+    Local stand-in for ``/api/v3/klines`` + ``/api/v3/exchangeInfo`` (Binance)
+    and ``/v8/finance/chart/<ticker>`` (Yahoo), served from a ``ReplaySource``.
+    """
+
+    def __init__(self, source: ReplaySource, host='127.0.0.1', port=0):
+        self.source = source
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                try:
+                    if url.path == '/api/v3/klines':
+                        body = server.klines(query)
+                    elif url.path == '/api/v3/exchangeInfo':
+                        body = server.exchange_info()
+                    elif url.path.startswith('/v8/finance/chart/'):
+                        body = server.chart(url.path.rsplit('/', 1)[-1], query)
+                    else:
+                        self.send_error(404)
+                        return
+                except KeyError as e:
+                    self.send_error(400, f"Símbolo desconocido: {e}")
+                    return
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replay-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Endpoints ---
+    def klines(self, query):
+        period_ms = int(self.source.period / pd.Timedelta(milliseconds=1))
+        limit = min(int(query.get('limit', 500)), 1000)
+        since = int(query['startTime']) if 'startTime' in query else None
+        rows = self.source.fetch_ohlcv(query['symbol'], query.get('interval', '15m'), since, limit)
+        return [[r[0], str(r[1]), str(r[2]), str(r[3]), str(r[4]), str(r[5]), r[0] + period_ms - 1,
+                 "0", 0, "0", "0", "0"] for r in rows]
+
+    def exchange_info(self):
+        symbols = []
+        for key in self.source.frames:
+            for quote in ('USDT', 'USD'):
+                if key.endswith(quote) and key != quote:
+                    symbols.append({
+                        'symbol': key, 'status': 'TRADING', 'baseAsset': key[:-len(quote)], 'quoteAsset': quote,
+                        'baseAssetPrecision': 8, 'quotePrecision': 8, 'quoteAssetPrecision': 8,
+                        'orderTypes': ['LIMIT', 'MARKET'], 'isSpotTradingAllowed': True,
+                        'isMarginTradingAllowed': False, 'permissions': ['SPOT'], 'filters': [],
+                    })
+                    break
+        return {'timezone': 'UTC', 'serverTime': int(self.source.clock.time() * 1000), 'symbols': symbols}
+
+    def chart(self, ticker, query):
+        start = pd.Timestamp(int(query['period1']), unit='s', tz='UTC') if 'period1' in query else None
+        df = self.source.visible(ticker, start)
+        quote = {col.lower(): df[col].tolist() for col in ('Open', 'High', 'Low', 'Close', 'Volume')}
+        return {'chart': {'result': [{
+            'meta': {'symbol': ticker, 'dataGranularity': query.get('interval', '15m')},
+            'timestamp': ((df.index - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).tolist(),
+            'indicators': {'quote': [quote]},
+        }], 'error': None}}
+
+
+def binance_client(base_url):
+    """ccxt Binance client pointed at a ``ReplayHTTPServer``."""
+    import ccxt
+
+    client = ccxt.binance({'enableRateLimit': False})
+    client.urls['api'] = dict(client.urls['api'], public=f"{base_url}/api/v3")
+    client.options['fetchMarkets'] = {'types': ['spot']}
+    client.options['fetchCurrencies'] = False
+    return client
+
+
+class YahooChartSource:
+    """``YahooSource`` interface over a Yahoo-like ``/v8/finance/chart`` HTTP endpoint."""
+
+    def __init__(self, base_url, interval='15m', timeout=10):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.interval = interval
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def fetch(self, ticker, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        params = {'interval': self.interval}
+        if start is not None:
+            params['period1'] = int(start.timestamp())
+        else:
+            params['range'] = '5d'
+        response = self.session.get(f"{self.base_url}/v8/finance/chart/{ticker}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        result = response.json()['chart']['result'][0]
+        quote = result['indicators']['quote'][0]
+        if not result['timestamp']:
+            return pd.DataFrame()
+        df = pd.DataFrame({col.capitalize(): quote[col] for col in ('open', 'high', 'low', 'close', 'volume')},
+                          index=pd.to_datetime(result['timestamp'], unit='s', utc=True))
+        return normalize_ohlcv(df.dropna(subset=['Close']))
+
+    def fetch_many(self, tickers, start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        frames = {t: self.fetch(t, start) for t in tickers}
+        return {t: df for t, df in frames.items() if len(df)}
+
+
+class RecordingQueue:
+    """Stand-in for ``BackgroundQueue`` that records the calls instead of running them."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append((getattr(fn, '__name__', str(fn)), args))
+
+    def add_scalars(self, writer, step, scalars):
+        # Mismo papel para la telemetría (telemetry.ScalarSink)
+        self.calls.append(('add_scalars', (step, scalars)))
+
+    def close(self, timeout=None):
+        pass
+
+
+class _NullWriter:
+    def add_scalar(self, *args, **kwargs):
+        pass
+
+    def flush(self):
+        pass
+
+
+def replay_live_trader(candles: pd.DataFrame, asset='BTC', model=None, bars=1000, source=None,
+                       start_bars=DEFAULT_START_BARS, shadows=None):
+    """
+    Run ``LiveTrader.run_cycle`` over ``bars`` stored candles in simulated time.
+
+    Nothing touches the real DB, TensorBoard or candle cache: persistence
+    and telemetry calls are recorded on ``trader.persistence`` /
+    ``trader.telemetry``. ``shadows`` (``{name: policy}``) replays candidate
+    models next to the active one. Returns ``(trader, stats)``.
+    """
+    from market_data import CandleCache
+    from run_live_trader import LiveTrader
+
+    candles = normalize_ohlcv(candles)
+    period = to_offset('15m').total_seconds()
+    # Justo después del cierre de la vela ``start_bars``
+    clock = SimulatedClock(candles.index[min(start_bars, len(candles) - 1)].timestamp() + period + 3.0)
+    source = source(clock) if callable(source) else ReplaySource(candles, clock)
+    trader = LiveTrader(asset, model=model, clock=clock, source=source,
+                        scheduler=CandleScheduler('15m', clock=clock),
+                        persistence=RecordingQueue(), telemetry=RecordingQueue(),
+                        writer=_NullWriter(), candles=CandleCache(f"{asset}-USD", cache_dir=None),
+                        shadows=shadows or {}, state_dir=None)
+
+    started = time.perf_counter()
+    trader.run_cycle()
+    cycles = 1
+    while cycles < bars:
+        expected_open = trader.scheduler.sleep_until_next_close()
+        if expected_open >= candles.index[-1]:
+            break
+        trader.run_cycle(expected_open)
+        cycles += 1
+    elapsed = time.perf_counter() - started
+    trades = sum(1 for name, _ in trader.persistence.calls if name == 'write_trade')
+    return trader, {'cycles': cycles, 'seconds': elapsed, 'bars_per_second': cycles / elapsed if elapsed else float('inf'),
+                    'trades': trades, 'balance': trader.sim_balance}
+
+
+def replay_sniper(candles: pd.DataFrame, bars=1000, client=None, start_bars=DEFAULT_START_BARS, quiet=True):
+    """Run ``sol_sniper_bot.run_bot`` over ``bars`` stored candles in simulated time."""
+    import sol_sniper_bot
+
+    candles = normalize_ohlcv(candles)
+    clock = SimulatedClock(candles.index[min(start_bars, len(candles) - 1)].timestamp() + 3.0)
+    client = client(clock) if callable(client) else ReplaySource(candles, clock)
+    bars = min(bars, len(candles) - start_bars)
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull if quiet else sys.stdout):
+        balance = sol_sniper_bot.run_bot(client=client, clock=clock, max_cycles=bars, state_path=None)
+    elapsed = time.perf_counter() - started
+    return {'cycles': bars, 'seconds': elapsed, 'bars_per_second': bars / elapsed if elapsed else float('inf'),
+            'balance': float(balance)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay acelerado de los bots sobre velas guardadas")
+    parser.add_argument('bot', choices=['live', 'sniper'])
+    parser.add_argument('csv', help="CSV de velas 15m (p.ej. datos_sol_15m_binance.csv)")
+    parser.add_argument('--asset', default='BTC')
+    parser.add_argument('--bars', type=int, default=2000)
+    parser.add_argument('--http', action='store_true', help="Pasar por el servidor HTTP local (Binance/Yahoo)")
+    args = parser.parse_args()
+
+    candles = load_candles(args.csv)
+    if args.http:
+        server = None
+
+        def serve(clock):
+            nonlocal server
+            server = ReplayHTTPServer(ReplaySource(candles, clock)).start()
+            return server
+
+        if args.bot == 'sniper':
+            stats = replay_sniper(candles, args.bars, client=lambda clock: binance_client(serve(clock).url))
+        else:
+            _, stats = replay_live_trader(candles, args.asset, bars=args.bars,
+                                          source=lambda clock: YahooChartSource(serve(clock).url))
+        server.stop()
+    elif args.bot == 'sniper':
+        stats = replay_sniper(candles, args.bars)
+    else:
+        _, stats = replay_live_trader(candles, args.asset, bars=args.bars)
+
+    print(f"⏱️ {stats['cycles']} velas en {stats['seconds']:.2f}s ({stats['bars_per_second']:.0f} velas/s) "
+          f"| Balance final: {stats['balance']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
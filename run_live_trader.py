@@ -1,28 +1,46 @@
-import time
+import asyncio
 import os
+import time
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import logging
 from datetime import datetime
 from stable_baselines3 import PPO
 from config import get_asset_config
 from torch.utils.tensorboard import SummaryWriter
-from database import init_database, save_trade
-
-# Configuración de Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("live_trader.log"),
-        logging.StreamHandler()
-    ]
-)
+from database import TradeWriter, init_database
+from features import FeatureStream
+from live_feed import publisher_from_env
+from live_loop import BackgroundQueue, run_live
+from market_data import CandleCache, CandleScheduler, SystemClock, YahooSource, fetch_with_retries
+from market_data_daemon import client_from_env
+from metrics import DECISION_LATENCY, METRICS, PHASE_SECONDS, start_from_env
+from model_watch import ModelWatcher
+from positions import PositionBook
+from shadow import ShadowPolicies, load_shadow_policies
+from snapshots import STATE_DIR, frame_from_state, frame_to_state, load_snapshot, save_snapshot
+from telemetry import ScalarSink, setup_logging
+
+# Logging: se configura al arrancar (telemetry.setup_logging, cola + archivo rotativo)
 logger = logging.getLogger()
 
+# Segundos máximos de espera por la ejecución de una orden (orders.OrderGateway)
+ORDER_TIMEOUT = 30.0
+
+def model_path(symbol):
+    return f"models/PRODUCTION/{symbol.upper()}/ppo_{symbol.lower()}_final.zip"
+
+
 class LiveTrader:
-    def __init__(self, asset_symbol):
+    def __init__(self, asset_symbol, model=None, clock=None, source=None, scheduler=None,
+                 persistence=None, telemetry=None, writer=None, candles=None, metrics=None,
+                 model_loader=None, shadows=None, state_dir=STATE_DIR, gateway=None, trade_writer=None,
+                 live_feed=None):
+        """
+        ``model`` / ``clock`` / ``source`` / ``scheduler`` / colas de I/O se pueden
+        inyectar para compartirlos entre varios activos en un mismo proceso
+        (ver run_portfolio.py) o para reproducir históricos offline (ver replay.py).
+        """
         self.symbol = asset_symbol.upper()
         # Mapping symbol to Yahoo Ticker
         self.yahoo_ticker = f"{self.symbol}-USD"
@@ -30,295 +48,382 @@ class LiveTrader:
         self.config = get_asset_config(self.symbol)
         
         # TensorBoard Logger (Gráficas estilo FTMO)
-        log_dir = f"tensorboard_logs/LIVE_{self.symbol}"
-        self.writer = SummaryWriter(log_dir)
-        logger.info(f"📊 TensorBoard activo en: {log_dir}")
+        if writer is None:
+            log_dir = f"tensorboard_logs/LIVE_{self.symbol}"
+            writer = SummaryWriter(log_dir)
+            logger.info(f"📊 TensorBoard activo en: {log_dir}")
+        self.writer = writer
+
+        # Latencias por fase del ciclo (endpoint Prometheus + resúmenes en log)
+        self.metrics = metrics or METRICS
+
+        # Escrituras a SQLite y TensorBoard fuera del camino de decisión
+        self.persistence = persistence or BackgroundQueue("db")
+        # Escalares de TensorBoard agrupados y volcados por tiempo (telemetry.ScalarSink)
+        self.telemetry = telemetry or ScalarSink()
+        # Operaciones agrupadas en una transacción por segundo (compartido entre activos)
+        self.trade_writer = trade_writer or TradeWriter()
 
         logger.info(f"🌍 Conectando a Yahoo Finance ({self.yahoo_ticker}) para evitar bloqueo Geo-IP...")
             
         # Cargar Modelo
-        model_path = f"models/PRODUCTION/{self.symbol}/ppo_{self.symbol.lower()}_final.zip"
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"No se encuentra el modelo entrenado: {model_path}")
-            
-        logger.info(f"🧠 Cargando cerebro IA para {self.symbol}...")
-        self.model = PPO.load(model_path)
+        path = model_path(self.symbol)
+        if model is None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No se encuentra el modelo entrenado: {path}")
+                
+            logger.info(f"🧠 Cargando cerebro IA para {self.symbol}...")
+            model = PPO.load(path)
+        self.model = model
+        self.last_obs = None # Última observación, para validar modelos nuevos
+
+        # Recarga en caliente cuando train_production.py publica un modelo nuevo (se arranca en run())
+        self.model_watcher = ModelWatcher(path, loader=model_loader or PPO.load, validate=self.validate_model)
         
         # Estado Interno
         self.window_size = 60
-        self.current_position = 0 # 0: Nada, 1: Long
-        self.entry_price = 0.0
-        
-        # Prop Firm Tracking (Simulated $100k Account)
-        self.sim_balance = 100000.0
-        self.daily_start_balance = 100000.0
-        self.last_day_checked = datetime.now().day
-        self.max_daily_loss = 0.0
-        self.wins = 0
-        self.losses = 0
-        
-        # Risk Config
-        self.cooldown_seconds = self.config.env_params.get("cooldown_steps", 8) * 15 * 60 # Steps * 15m * 60s
-        self.stop_loss_pct = self.config.env_params.get("stop_loss", 0.03)
-        self.last_sell_time = 0
-
-    def check_prop_firm_rules(self, current_equity):
-        # Reset Daily Drawdown Logic
-        today = datetime.now().day
-        if today != self.last_day_checked:
-            self.daily_start_balance = self.sim_balance
-            self.last_day_checked = today
-            self.max_daily_loss = 0.0
-            logger.info(f"📅 NUEVO DÍA REGISTRADO. Reset de Drawdown Diario. Balance Inicio: ${self.daily_start_balance:.2f}")
-
-        # Calculate Metrics
-        daily_drawdown = (self.daily_start_balance - current_equity) / self.daily_start_balance * 100
-
-        if daily_drawdown > self.max_daily_loss:
-            self.max_daily_loss = daily_drawdown
-
-        # Warnings (FTMO/MFF limits usually 5% daily, 10% total)
-        if daily_drawdown > 4.0:
-            logger.warning(f"⚠️ PELIGRO PROP FIRM: Drawdown Diario al {daily_drawdown:.2f}% (Límite 5%)")
-        
-        return daily_drawdown
 
-    def fetch_market_data(self):
-        """Descarga las últimas velas para alimentar al modelo usando Yahoo Finance."""
-        import random
-        
-        # Anti-blocking: Retry logic with exponential backoff
-        max_retries = 3
-        retry_delay = 2  # seconds
-        
-        df = pd.DataFrame() # Initialize df outside the loop
-        
-        for attempt in range(max_retries):
-            try:
-                # Anti-blocking: Random delay between requests (1-3 seconds)
-                if attempt > 0:
-                    delay = retry_delay * (2 ** attempt) + random.uniform(0, 2)
-                    logger.info(f"⏳ Reintento {attempt + 1}/{max_retries} en {delay:.1f}s...")
-                    time.sleep(delay)
-                else:
-                    # Small random delay even on first attempt to avoid rate limiting
-                    time.sleep(random.uniform(0.5, 1.5))
-                
-                # Download recent data (enough for window_size + indicators)
-                # interval='15m' is supported by yfinance for last 60 days
-                df = yf.download(
-                    self.yahoo_ticker, 
-                    interval="15m", 
-                    period="5d", 
-                    progress=False,
-                    timeout=10
-                )
-                
-                if len(df) == 0:
-                    if attempt < max_retries - 1:
-                        logger.warning(f"⚠️ Yahoo Finance devolvió DataFrame vacío (intento {attempt + 1}/{max_retries})")
-                        continue
-                    else:
-                        logger.error("❌ Yahoo Finance devolvió DataFrame vacío después de todos los reintentos.")
-                        return None, None
-                
-                # Success - exit retry loop
-                break
-                
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"⚠️ Error temporal descargando datos (intento {attempt + 1}/{max_retries}): {e}")
-                    continue
-                else:
-                    logger.error(f"❌ Error descargando datos después de {max_retries} intentos: {e}")
-                    return None, None
+        # Pipeline de features compartido con el entrenamiento (modo tail, O(1) por vela)
+        self.features = FeatureStream(self.window_size)
+        self.last_candle_ts = None
+        self.seed_bars = 1000 # Historia usada para sembrar los indicadores (EMA 200)
+
+        # Datos: caché local de velas + planificador alineado al cierre de vela de 15m
+        self.clock = clock or SystemClock()
+        self.source = source or YahooSource(interval="15m")
+        self.scheduler = scheduler or CandleScheduler("15m", clock=self.clock)
+        self.scheduler_period = pd.Timedelta(seconds=self.scheduler.period)
+        self.candles = candles if candles is not None else CandleCache(self.yahoo_ticker, "15m")
         
-        # If df is still empty after all retries, return None
-        if df.empty:
-            return None, None
+        # Posición simulada + reglas de riesgo / Prop Firm (cuenta simulada de $100k)
+        self.book = PositionBook(self.symbol, self.config, now=self.now(), log=logger)
 
+        # Modelos candidatos en sombra (models/SHADOW/<SYMBOL>/*.zip), una sola pasada para todos
+        if shadows is None:
+            shadows = load_shadow_policies(self.symbol)
+        self.shadows = ShadowPolicies(self.symbol, shadows, self.config, now=self.now()) if shadows else None
+        if self.shadows:
+            logger.info(f"👥 {len(self.shadows)} modelo(s) en sombra para {self.symbol}: {', '.join(shadows)}")
+
+        # Órdenes reales/paper (orders.OrderGateway); sin gateway solo se simula en el book
+        self.gateway = gateway
+        self.pending_orders = set()
+
+        # Estado en vivo para el dashboard (live_feed.LiveFeedPublisher, UDP sin bloqueo)
+        self.live_feed = live_feed
+
+        # Arranque en caliente: posición, balances y últimas velas del último snapshot
+        self.state_path = os.path.join(state_dir, f"live_{self.symbol}.json") if state_dir else None
+        self.restore_state()
+
+    def snapshot(self):
+        """Estado mínimo para reanudar tras un reinicio (JSON)."""
+        return {
+            'symbol': self.symbol,
+            'saved_at': self.clock.time(),
+            'book': self.book.state(),
+            'shadows': {name: book.state() for name, book in self.shadows.books.items()} if self.shadows else {},
+            'candles': frame_to_state(self.candles.frame.iloc[-self.seed_bars:]),
+        }
+
+    def save_state(self):
+        """Snapshot atómico en segundo plano (se toma aquí, se escribe en la cola de I/O)."""
+        if self.state_path:
+            self.persistence.submit(save_snapshot, self.state_path, self.snapshot())
+
+    def restore_state(self):
+        state = load_snapshot(self.state_path)
+        if state is None:
+            return False
+        self.book.restore(state['book'])
+        if self.shadows:
+            for name, book_state in state.get('shadows', {}).items():
+                if name in self.shadows.books:
+                    self.shadows.books[name].restore(book_state)
+        # Solo se añaden las velas más nuevas que la caché en disco
+        restored = self.candles.append(frame_from_state(state['candles']))
+        logger.info(f"♻️ Estado restaurado de {self.state_path}: posición {self.current_position} | "
+                    f"Balance Sim: ${self.sim_balance:.2f} | {len(self.candles.frame)} velas en caché ({len(restored)} del snapshot)")
+        return True
+
+    @property
+    def current_position(self):
+        return self.book.current_position
+
+    @property
+    def entry_price(self):
+        return self.book.entry_price
+
+    @property
+    def sim_balance(self):
+        return self.book.sim_balance
+
+    def now(self):
+        """Hora local según el reloj del trader (real o simulado)."""
+        return datetime.fromtimestamp(self.clock.time())
+
+    def timer(self, phase):
+        return self.metrics.timer(PHASE_SECONDS, bot=self.symbol, phase=phase)
+
+    def download_candles(self):
+        """Descarga de Yahoo solo las velas posteriores a la caché local (con reintentos)."""
+        # Solo lo nuevo desde la última vela guardada (o 5d si la caché está vacía)
+        return fetch_with_retries(
+            lambda: self.source.fetch(self.yahoo_ticker, start=self.candles.last_timestamp), self.clock)
+
+    def ingest(self, df):
+        """Guarda las velas cerradas de ``df`` y devuelve el último precio."""
+        # La vela que aún se está formando no entra en la caché ni en los indicadores;
+        # su precio solo se usa para ejecutar.
+        closed = df[self.scheduler.is_closed(df.index)]
+        self.candles.append(closed)
+        return float(df['Close'].iloc[-1])
+
+    def has_candle(self, expected_open):
+        last = self.candles.last_timestamp
+        return expected_open is None or (last is not None and last >= expected_open)
+
+    def market_window(self):
+        """Ventana de features de mercado actualizada, o None si aún no hay historia suficiente."""
         try:
-            # YFinance columns might come as MultiIndex (Price, Ticker). Flatten them.
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
+            with self.timer('features'):
+                self.update_features(self.candles.frame)
 
-            # Reset index to get columns clean
-            df = df.reset_index()
-            
-            # YFinance columns: Date, Open, High, Low, Close, Adj Close, Volume
-            # Ensure proper naming
-            df = df.rename(columns={"Date": "timestamp", "Datetime": "timestamp"})
-            
-            # Feature Engineering (TIENE QUE SER IDÉNTICO AL ENTRENAMIENTO)
-            # 1. Indicadores Técnicos
-            df['RSI'] = self.calculate_rsi(df['Close'], 14)
-            df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
-            df['EMA_50'] = df['Close'].ewm(span=50, adjust=False).mean()
-            df['EMA_200'] = df['Close'].ewm(span=200, adjust=False).mean()
-            
-            # Bollinger Bands
-            rolling_mean = df['Close'].rolling(window=20).mean()
-            rolling_std = df['Close'].rolling(window=20).std()
-            df['BBU_20_2.0'] = rolling_mean + (rolling_std * 2.0)
-            df['BBL_20_2.0'] = rolling_mean - (rolling_std * 2.0)
-
-            # Features Normalizados para la IA
-            df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1)).fillna(0)
-            df['RSI_Norm'] = df['RSI'] / 100.0
-            df['BB_Pct'] = (df['Close'] - df['BBL_20_2.0']) / (df['BBU_20_2.0'] - df['BBL_20_2.0'])
-            df['BB_Pct'] = df['BB_Pct'].fillna(0.5)
-            df['EMA_20_Dist'] = (df['Close'] / df['EMA_20']) - 1
-            df['EMA_50_Dist'] = (df['Close'] / df['EMA_50']) - 1
-            df['EMA_200_Dist'] = (df['Close'] / df['EMA_200']) - 1
-            
-            # Seleccionar últimas 60 velas
-            obs_cols = ['Log_Ret', 'RSI_Norm', 'BB_Pct', 'EMA_20_Dist', 'EMA_50_Dist', 'EMA_200_Dist']
-            
-            if len(df) < self.window_size:
-                logger.error(f"❌ Datos insuficientes ({len(df)} velas). Esperando más historia...")
-                return None, None
-                
-            recent_data = df[obs_cols].iloc[-self.window_size:].values.astype(np.float32)
-            current_close = df['Close'].iloc[-1]
-            
-            # Clean scalar if it's a Series (yfinance quirk)
-            if hasattr(current_close, 'item'): 
-                current_close = current_close.item()
-            
-            return recent_data, current_close
+            if not self.features.ready:
+                logger.error(f"❌ Datos insuficientes para {self.symbol} ({self.features.rows.count} velas). Esperando más historia...")
+                return None
+
+            return self.features.observation()
             
         except Exception as e:
-            logger.error(f"Error descargando datos: {e}")
+            logger.error(f"Error procesando datos de {self.symbol}: {e}")
+            return None
+
+    def fetch_market_data(self, expected_open=None):
+        """
+        Actualiza la caché con las velas nuevas y devuelve (ventana de features, precio actual).
+
+        Si se indica ``expected_open`` y esa vela aún no ha llegado (Yahoo va con retraso),
+        reintenta con un sondeo corto hasta ``scheduler.max_late_seconds``.
+        """
+        current_close = None
+        for _ in self.scheduler.late_polls(expected_open):
+            with self.timer('fetch'):
+                df = self.download_candles()
+                if df is None:
+                    return None, None
+                current_close = self.ingest(df)
+            if self.has_candle(expected_open):
+                break
+
+        market_data = self.market_window()
+        if market_data is None:
             return None, None
+        return market_data, current_close
 
-    def construct_observation(self, market_data):
+    def construct_observation(self, market_data, position=None):
         """Construye el tensor de observación final combinando Mercado + Estado de Cuenta."""
         # Necesitamos simular el estado de cuenta para la IA
+        position = self.current_position if position is None else position
         
         balance_ratio = 0.0 # Asumimos balance neutral estable
-        position_ratio = 1.0 if self.current_position > 0 else 0.0
+        position_ratio = 1.0 if position > 0 else 0.0
         
         account_obs = np.full((self.window_size, 2), [balance_ratio, position_ratio], dtype=np.float32)
         
-        # Combinar
+        # Combinar (igual que TradingEnv._next_observation)
         obs = np.hstack((market_data, account_obs))
-        return obs
+        return np.nan_to_num(obs)
 
     def execute_trade(self, action, price):
+        with self.timer('risk'):
+            self._execute_trade(action, price)
+
+    def _execute_trade(self, action, price):
         """Simula la ejecución de la orden (Modo Señales) con Gestión de Riesgo."""
-        # 0: Hold, 1: Buy, 2: Sell
-        
-        # Timestamp actual
-        now_dt = datetime.now()
-        now_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
-        now_ts = now_dt.timestamp()
-        step = int(now_ts)
-
-        # Update Equity Simulation (Floating PnL)
-        current_equity = self.sim_balance
-        if self.current_position == 1:
-            floating_pnl = (price - self.entry_price) / self.entry_price * self.sim_balance # Full leverage simulation
-            current_equity += floating_pnl
-            
-        # Check Prop Firm Rules
-        self.check_prop_firm_rules(current_equity)
-
-        # 1. MECHANICAL STOP LOSS CHECK
-        if self.current_position == 1:
-            pnl_pct = (price - self.entry_price) / self.entry_price
-            if pnl_pct <= -self.stop_loss_pct:
-                logger.warning(f"🛡️ STOP LOSS ACTIVADO a ${price:.2f} (Drop: {pnl_pct*100:.2f}%)")
-                action = 2 # Force Sell
-        
-        # 2. COOLDOWN CHECK
-        if action == 1 and self.current_position == 0:
-            time_since_sell = now_ts - self.last_sell_time
-            if time_since_sell < self.cooldown_seconds:
-                hours_wait = (self.cooldown_seconds - time_since_sell) / 3600
-                if hours_wait < 0.1: # Only log if close just to reduce noise? No, log always for debug
-                    logger.info(f"❄️ Enfriamiento activo. Ignorando COMPRA. Espera {hours_wait:.2f}h más.")
-                return # Abort trade
-
-            logger.info(f"🟢 [COMPRA] SEÑAL DETECTADA a ${price:.2f} ({now_str})")
-            logger.info(f"   👉 Sugerencia: Abrir LONG en {self.symbol}")
-            self.current_position = 1
-            self.entry_price = price
-            
-            # Guardar en base de datos
-            try:
-                save_trade(self.symbol, "COMPRA", price, None, self.sim_balance, 0, self.max_daily_loss)
-            except Exception as e:
-                logger.error(f"Error guardando COMPRA en DB: {e}")
-            
-        elif action == 2 and self.current_position > 0:
-            logger.info(f"🔴 [VENTA] SEÑAL DETECTADA a ${price:.2f} ({now_str})")
-            pnl_pct = (price - self.entry_price) / self.entry_price 
-            
-            # Update Sim Balance
-            pnl_amount = self.sim_balance * pnl_pct
-            self.sim_balance += pnl_amount
-            
-            if pnl_amount > 0: self.wins += 1
-            else: self.losses += 1
-            
-            win_rate = (self.wins / (self.wins + self.losses)) * 100 if (self.wins+self.losses) > 0 else 0
-            
-            logger.info(f"   💰 Cierre. PnL: {pnl_pct*100:.2f}% | Balance Sim: ${self.sim_balance:.2f}")
-            logger.info(f"   📊 ESTADO: WinRate: {win_rate:.1f}% | DD Diario Max: {self.max_daily_loss:.2f}%")
-
-            # TENSORBOARD GRAPHING
-            try:
-                self.writer.add_scalar("FTMO_Sim/Balance", self.sim_balance, step)
-                self.writer.add_scalar("FTMO_Sim/WinRate", win_rate, step)
-                self.writer.add_scalar("FTMO_Risk/DailyDrawdown", self.max_daily_loss, step)
-                self.writer.flush()
-            except Exception as e:
-                logger.error(f"Error escribiendo a TensorBoard: {e}")
-            
-            # Guardar en base de datos
-            try:
-                save_trade(self.symbol, "VENTA", price, pnl_pct*100, self.sim_balance, win_rate, self.max_daily_loss)
-            except Exception as e:
-                logger.error(f"Error guardando VENTA en DB: {e}")
-
-            self.current_position = 0
-            self.last_sell_time = now_ts # Start Cooldown Clock
-            
-        else:
-            # Reducir ruido: Solo loggear Hold ocasionalmente o si cambia algo
-            pass
+        now_dt = self.now()
+        trade = self.book.execute(action, price, now_dt)
+        if trade is not None:
+            if trade['action'] == "VENTA":
+                # TENSORBOARD GRAPHING (en segundo plano, por lotes)
+                self.telemetry.add_scalars(self.writer, trade['step'], {
+                    "FTMO_Sim/Balance": trade['balance'],
+                    "FTMO_Sim/WinRate": trade['win_rate'],
+                    "FTMO_Risk/DailyDrawdown": trade['daily_drawdown'],
+                })
+            # Guardar en base de datos (en segundo plano)
+            self.persistence.submit(self.write_trade, self.symbol, trade)
+            self.route_order(trade, price)
+
+        # Las sombras operan al mismo precio, cada una con su propia posición
+        if self.shadows:
+            for bot_name, shadow_trade in self.shadows.execute(price, now_dt):
+                self.persistence.submit(self.write_trade, bot_name, shadow_trade)
+
+        # Serie de equity: un punto por ciclo (los agregados los mantiene la DB)
+        equity = self.book.equity(price)
+        self.persistence.submit(self.write_equity, self.symbol, now_dt, equity,
+                                self.book.sim_balance, self.book.current_position)
+        self.publish_state(price, equity, now_dt)
+
+    def publish_state(self, price, equity, now_dt):
+        """Precio, posición, equity y drawdown del día al dashboard (sin pasar por la DB)."""
+        if self.live_feed is None:
+            return
+        book = self.book
+        self.live_feed.publish(
+            self.symbol, ts=now_dt.timestamp(), price=price, position=book.current_position,
+            entry_price=book.entry_price if book.current_position else None, equity=equity,
+            balance=book.sim_balance, daily_drawdown=(book.daily_start_balance - equity) / book.daily_start_balance * 100,
+            max_daily_drawdown=book.max_daily_loss)
+
+    def route_order(self, trade, price):
+        """Envía la operación al gateway sin bloquear el ciclo (solo dentro del bucle asyncio)."""
+        if self.gateway is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # La cantidad viene del book (persistida), así la VENTA tras un reinicio cierra la posición real
+        side = 'buy' if trade['action'] == "COMPRA" else 'sell'
+        task = loop.create_task(self.send_order(side, trade['qty'], time.perf_counter()))
+        self.pending_orders.add(task)
+        task.add_done_callback(self.pending_orders.discard)
+
+    async def send_order(self, side, qty, signal_time):
+        try:
+            order = await self.gateway.submit(f"{self.symbol}/USDT", side, qty, signal_time=signal_time)
+            await self.gateway.wait(order, timeout=ORDER_TIMEOUT)
+            if order.status == 'filled':
+                logger.info(f"📬 Orden {order.id} ejecutada: {side} {qty:.6f} {self.symbol} @ {order.fill_price:.2f} "
+                            f"(comisión {order.fee:.4f}, {order.latency * 1000:.1f} ms desde la señal)")
+            else:
+                logger.warning(f"⚠️ Orden {order.id} {order.status}: {order.reason}")
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Orden {side} de {self.symbol} sin ejecutar tras {ORDER_TIMEOUT:.0f}s")
+        except Exception as e:
+            logger.error(f"❌ Error enviando orden {side} de {self.symbol}: {e}")
+
+    def write_trade(self, bot_name, trade):
+        self.trade_writer.add(bot_name, trade['action'], trade['price'], trade['pnl_pct'], trade['balance'],
+                              trade['win_rate'], trade['daily_drawdown'])
+
+    def write_equity(self, bot_name, now_dt, equity, balance, position):
+        self.trade_writer.add_equity(bot_name, equity, balance, position, now_dt)
+
+    def validate_model(self, model):
+        """Lanza si ``model`` no puede sustituir al actual (se ejecuta en el hilo del watcher)."""
+        if model.observation_space.shape != self.model.observation_space.shape:
+            raise ValueError(f"observation_space {model.observation_space.shape} != {self.model.observation_space.shape}")
+        obs = self.last_obs if self.last_obs is not None else np.zeros(model.observation_space.shape, dtype=np.float32)
+        # La primera pasada también calienta el modelo antes de entrar en el ciclo
+        for _ in range(2):
+            action, _ = model.predict(obs, deterministic=True)
+        if not model.action_space.contains(np.asarray(action).item()):
+            raise ValueError(f"Acción fuera del espacio de acciones: {action}")
+
+    def swap_model(self):
+        """Activa el modelo recargado en segundo plano, si lo hay (solo entre ciclos)."""
+        model = self.model_watcher.take()
+        if model is None:
+            return False
+        self.model = model
+        logger.info(f"🧠 Modelo de {self.symbol} actualizado en caliente (posición conservada: {self.current_position}).")
+        return True
+
+    def predict(self, market_data):
+        self.swap_model()
+        with self.timer('observation'):
+            obs = self.construct_observation(market_data)
+            self.last_obs = obs
+        with self.timer('predict'):
+            action, _ = self.model.predict(obs, deterministic=True)
+        self.predict_shadows(market_data)
+        return int(np.asarray(action).item())
+
+    def predict_shadows(self, market_data):
+        if self.shadows:
+            with self.timer('shadow_predict'):
+                self.shadows.predict(market_data, self.construct_observation)
+
+    def act(self, action, price):
+        """Ejecuta la decisión y registra la latencia desde el cierre de la última vela."""
+        self.execute_trade(action, price)
+        self.save_state()
+        if self.last_candle_ts is not None:
+            closed_at = (self.last_candle_ts + self.scheduler_period).timestamp()
+            self.metrics.observe(DECISION_LATENCY, self.clock.time() - closed_at, bot=self.symbol)
+
+    def poll(self, expected_open=None):
+        """Datos del ciclo (ventana de features, precio) o None."""
+        market_data, current_price = self.fetch_market_data(expected_open)
+        return None if market_data is None else (market_data, current_price)
+
+    def run_cycle(self, expected_open=None):
+        """Un ciclo completo síncrono (datos -> predicción -> ejecución)."""
+        data = self.poll(expected_open)
+        if data is not None:
+            market_data, current_price = data
+            self.act(self.predict(market_data), current_price)
+
+    async def run_async(self):
+        try:
+            await run_live(
+                self.scheduler,
+                fetch=self.poll,
+                decide=lambda data: self.predict(data[0]),
+                act=lambda data, action: self.act(action, data[1]),
+            )
+        finally:
+            await self.close_orders()
+
+    async def close_orders(self):
+        """Espera las órdenes en vuelo (hasta ORDER_TIMEOUT) y cierra el gateway dentro del bucle."""
+        if self.gateway is None:
+            return
+        if self.pending_orders:
+            await asyncio.wait(set(self.pending_orders), timeout=ORDER_TIMEOUT)
+        # Las que sigan abiertas quedan rechazadas ('disconnected') y sus tareas terminan
+        await self.gateway.close()
+        await asyncio.gather(*self.pending_orders, return_exceptions=True)
+
+    def close(self):
+        """Vacía las colas de DB/TensorBoard pendientes (el gateway se cierra al salir de run_async)."""
+        self.model_watcher.stop()
+        self.save_state()
+        self.persistence.close()
+        self.trade_writer.close()
+        self.telemetry.close()
 
     def run(self):
         logger.info(f"🚀 Iniciando Trader en Vivo (Señales) para {self.symbol}...")
-        
-        while True:
-            # logger.info("⏳ Analizando mercado (Yahoo Finance)...")
-            
-            market_data, current_price = self.fetch_market_data()
-            if market_data is not None:
-                obs = self.construct_observation(market_data)
-                
-                # Predecir
-                action, _ = self.model.predict(obs, deterministic=True)
-                
-                # Ejecutar
-                self.execute_trade(action.item(), current_price)
-            
-            # Esperar 60 segundos antes de volver a chequear
-            # Yahoo tiene retraso, no necesitamos consultar cada milisegundo
-            time.sleep(60) 
-
-    # Utilidades
-    def calculate_rsi(self, series, period):
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        self.model_watcher.start()
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            logger.info("🛑 Trader detenido.")
+        finally:
+            self.close()
+
+    def update_features(self, candles):
+        """Avanza el pipeline de features solo con las velas cerradas que aún no ha visto."""
+        if self.last_candle_ts is None:
+            # Primer ciclo: sembrar una sola vez desde la historia en caché
+            new_candles = candles.iloc[-self.seed_bars:]
+        else:
+            new_candles = candles.iloc[candles.index.searchsorted(self.last_candle_ts, side='right'):]
+
+        if len(new_candles) == 0:
+            return
+
+        self.features.update(new_candles['Close'].to_numpy(dtype=np.float64))
+        self.last_candle_ts = new_candles.index[-1]
 
 if __name__ == "__main__":
     import sys
-    
+
+    setup_logging("live_trader.log")
     # Asegurar que la DB existe
     try:
         init_database()
@@ -327,5 +432,11 @@ if __name__ == "__main__":
 
     asset = sys.argv[1] if len(sys.argv) > 1 else "ETH"
     # No API keys needed for Yahoo
-    trader = LiveTrader(asset)
+    # ORDER_GATEWAY=host:port envía las operaciones a un paper exchange (orders.py serve)
+    from orders import gateway_from_env
+    gateway = gateway_from_env(asset.upper())
+    # LIVE_FEED=host:port publica el estado de cada ciclo para el dashboard (live_feed.py)
+    # MARKET_DATA=host:port toma las velas del daemon compartido (market_data_daemon.py)
+    trader = LiveTrader(asset, source=client_from_env(), gateway=gateway, live_feed=publisher_from_env())
+    start_from_env()
     trader.run()
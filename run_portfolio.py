@@ -0,0 +1,155 @@
+"""
+Portfolio runner: several assets in one process.
+
+Instead of one ``run_live_trader.py <ASSET>`` process per asset (each with
+its own Python + torch + SB3), all assets share the process, the clock and
+the candle scheduler, download their candles in a single multi-ticker Yahoo
+request per cycle, and decide with one batched forward pass
+(``policy_batch.StackedPolicies``). Each extra asset only adds its policy
+weights, its candle cache and its feature state (a few MB).
+
+Uso: python run_portfolio.py BTC ETH SOL
+"""
+import asyncio
+import logging
+import os
+import sys
+
+from database import TradeWriter, init_database
+from live_feed import publisher_from_env
+from live_loop import BackgroundQueue, run_live
+from market_data import CandleScheduler, SystemClock, YahooSource, fetch_with_retries
+from market_data_daemon import client_from_env
+from metrics import METRICS, PHASE_SECONDS, start_from_env
+from policy_batch import StackedPolicies, load_policy
+from run_live_trader import LiveTrader, model_path
+from telemetry import ScalarSink, setup_logging
+
+logger = logging.getLogger()
+
+
+class PortfolioTrader:
+    def __init__(self, symbols):
+        self.clock = SystemClock()
+        # MARKET_DATA=host:port: velas del daemon compartido en vez de ir a Yahoo
+        self.source = client_from_env() or YahooSource(interval="15m")
+        self.scheduler = CandleScheduler("15m", clock=self.clock)
+
+        # Colas de I/O compartidas por todos los activos
+        self.persistence = BackgroundQueue("db")
+        self.telemetry = ScalarSink()
+        self.trade_writer = TradeWriter()
+        live_feed = publisher_from_env()
+
+        self.traders = {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            path = model_path(symbol)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No se encuentra el modelo entrenado: {path}")
+            logger.info(f"🧠 Cargando cerebro IA para {symbol}...")
+            # Solo la red de la política: sin optimizador ni buffers de entrenamiento
+            self.traders[symbol] = LiveTrader(symbol, model=load_policy(path), clock=self.clock,
+                                              source=self.source, scheduler=self.scheduler,
+                                              persistence=self.persistence, telemetry=self.telemetry,
+                                              trade_writer=self.trade_writer, model_loader=load_policy,
+                                              live_feed=live_feed)
+
+        self.policies = StackedPolicies({s: t.model for s, t in self.traders.items()})
+        logger.info(f"📦 Portfolio: {', '.join(self.traders)} ({len(self.policies.groups)} grupo(s) de inferencia)")
+
+    def download_candles(self):
+        """Una sola petición a Yahoo para todos los tickers, desde la caché más atrasada."""
+        lasts = [t.candles.last_timestamp for t in self.traders.values()]
+        start = None if any(last is None for last in lasts) else min(lasts)
+        tickers = [t.yahoo_ticker for t in self.traders.values()]
+        return fetch_with_retries(lambda: self.source.fetch_many(tickers, start=start), self.clock)
+
+    def fetch_market_data(self, expected_open=None):
+        """Actualiza las cachés de todos los activos; devuelve {símbolo: precio actual}."""
+        prices = {}
+        for _ in self.scheduler.late_polls(expected_open):
+            frames = self.download_candles()
+            if frames is None:
+                break
+            for symbol, trader in self.traders.items():
+                if trader.yahoo_ticker in frames:
+                    prices[symbol] = trader.ingest(frames[trader.yahoo_ticker])
+            if all(t.has_candle(expected_open) for t in self.traders.values()):
+                break
+        return prices
+
+    def poll(self, expected_open=None):
+        """Datos del ciclo ({símbolo: ventana de features}, {símbolo: precio}) o None."""
+        prices = self.fetch_market_data(expected_open)
+        windows = {}
+        for symbol in prices:
+            market_data = self.traders[symbol].market_window()
+            if market_data is not None:
+                windows[symbol] = market_data
+        return (windows, prices) if windows else None
+
+    def predict(self, windows):
+        # Modelos recargados en caliente: activarlos todos y re-apilar los pesos
+        if any([t.swap_model() for t in self.traders.values()]):
+            self.policies = StackedPolicies({s: t.model for s, t in self.traders.items()})
+
+        with METRICS.timer(PHASE_SECONDS, bot="PORTFOLIO", phase="observation"):
+            observations = {s: self.traders[s].construct_observation(w) for s, w in windows.items()}
+            for s, obs in observations.items():
+                self.traders[s].last_obs = obs
+        # Una sola pasada para todos los activos
+        with METRICS.timer(PHASE_SECONDS, bot="PORTFOLIO", phase="predict"):
+            actions = self.policies.predict(observations)
+        for s, window in windows.items():
+            self.traders[s].predict_shadows(window)
+        return actions
+
+    def execute(self, prices, actions):
+        for symbol, action in actions.items():
+            self.traders[symbol].act(action, prices[symbol])
+
+    def run_cycle(self, expected_open=None):
+        """Un ciclo completo síncrono (datos -> predicción -> ejecución)."""
+        data = self.poll(expected_open)
+        if data is not None:
+            windows, prices = data
+            self.execute(prices, self.predict(windows))
+
+    async def run_async(self):
+        await run_live(
+            self.scheduler,
+            fetch=self.poll,
+            decide=lambda data: self.predict(data[0]),
+            act=lambda data, actions: self.execute(data[1], actions),
+        )
+
+    def run(self):
+        logger.info(f"🚀 Iniciando Portfolio en Vivo (Señales) para {', '.join(self.traders)}...")
+        for trader in self.traders.values():
+            trader.model_watcher.start()
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            logger.info("🛑 Portfolio detenido.")
+        finally:
+            for trader in self.traders.values():
+                trader.model_watcher.stop()
+                trader.save_state()
+            self.persistence.close()
+            self.trade_writer.close()
+            self.telemetry.close()
+
+
+if __name__ == "__main__":
+    setup_logging("live_trader.log")
+    # Asegurar que la DB existe
+    try:
+        init_database()
+    except Exception as e:
+        logger.error(f"Error inicializando DB: {e}")
+
+    symbols = sys.argv[1:] or ["BTC", "ETH", "SOL"]
+    portfolio = PortfolioTrader(symbols)
+    start_from_env()
+    portfolio.run()
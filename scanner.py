@@ -0,0 +1,164 @@
+"""
+Multi-symbol scanner for the SOL sniper breakout rule.
+
+Evaluates "price above the max high of the previous N candles and above the
+EMA" across hundreds of pairs every 15m candle:
+
+* candles are fetched concurrently (thread pool over ccxt) and incrementally,
+  one rolling buffer per symbol as in ``sol_sniper_bot``;
+* highs and closes are held as ``(symbols x window)`` arrays, so the breakout
+  level and the EMA are computed for every symbol at once, each with its own
+  ``breakout_period`` / ``ema_period``;
+* per-symbol params come from ``best_breakout_<base>[_<tag>].json`` (the
+  untagged file wins), the rest use ``sol_sniper_bot.PARAMS``.
+
+Usage:
+    python scanner.py                      # Todos los pares USDT de spot
+    python scanner.py --top 200            # Los 200 con más volumen
+    python scanner.py SOL/USDT ETH/USDT
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import sol_sniper_bot
+from market_data import CandleScheduler, SystemClock
+from metrics import METRICS, PHASE_SECONDS, start_from_env
+from sol_sniper_bot import BUFFER_SIZE, PARAMS, TIMEFRAME, buffer_since, fetch_data, update_buffer
+
+BOT_NAME = "SCANNER"
+PARAMS_GLOB = "best_breakout_*.json"
+
+
+def load_symbol_params(pattern=PARAMS_GLOB, quote="USDT") -> Dict[str, dict]:
+    """``{'SOL/USDT': params}`` from the optimizer outputs matching ``pattern``."""
+    found = {}
+    # Orden inverso: el archivo sin sufijo (best_breakout_sol.json) se lee el último y gana
+    for path in sorted(glob.glob(pattern), reverse=True):
+        name = os.path.splitext(os.path.basename(path))[0]
+        base = name[len("best_breakout_"):].split("_")[0].upper()
+        with open(path) as f:
+            found[f"{base}/{quote}"] = json.load(f)
+    return found
+
+
+def universe(client, quote="USDT", top: Optional[int] = None):
+    """Active spot pairs quoted in ``quote``; the ``top`` by 24h quote volume if given."""
+    markets = client.load_markets()
+    symbols = sorted(s for s, m in markets.items()
+                     if m.get('spot') and m.get('active', True) and m.get('quote') == quote)
+    if top:
+        tickers = client.fetch_tickers(symbols)
+        symbols = sorted(symbols, key=lambda s: -(tickers.get(s, {}).get('quoteVolume') or 0))[:top]
+    return symbols
+
+
+class BreakoutScanner:
+    def __init__(self, symbols, params: Optional[Dict[str, dict]] = None, client=None, clock=time,
+                 window=BUFFER_SIZE, workers=16):
+        self.symbols = list(symbols)
+        self.client = client
+        self.clock = clock
+        self.window = window
+        self.workers = workers
+        params = params or {}
+        self.params = {s: params.get(s, PARAMS) for s in self.symbols}
+        self.breakout_period = np.array([p['breakout_period'] for p in self.params.values()], dtype=np.int64)
+        self.alpha = np.array([2.0 / (p['ema_period'] + 1.0) for p in self.params.values()])
+
+        self.buffers = {s: None for s in self.symbols}
+        # Velas alineadas a la derecha: la última columna es la vela en formación
+        self.highs = np.full((len(self.symbols), window), np.nan)
+        self.closes = np.full((len(self.symbols), window), np.nan)
+        self.last_timestamp = np.full(len(self.symbols), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    def _fetch_one(self, i, symbol):
+        buffer = self.buffers[symbol]
+        new = fetch_data(symbol, TIMEFRAME, limit=self.window, client=self.client, clock=self.clock,
+                         since=buffer_since(buffer, self.clock, self.window))
+        if new is None or len(new) == 0:
+            return
+        buffer = self.buffers[symbol] = update_buffer(buffer, new, self.window)
+        n = len(buffer)
+        self.highs[i, :self.window - n] = np.nan
+        self.closes[i, :self.window - n] = np.nan
+        self.highs[i, self.window - n:] = buffer['high'].to_numpy(dtype='float64')
+        self.closes[i, self.window - n:] = buffer['close'].to_numpy(dtype='float64')
+        self.last_timestamp[i] = buffer['timestamp'].iloc[-1].to_datetime64()
+
+    def fetch(self):
+        """Update every symbol's buffer concurrently (each thread writes only its own row)."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan-fetch") as pool:
+            list(pool.map(self._fetch_one, range(len(self.symbols)), self.symbols))
+
+    def signals(self) -> pd.DataFrame:
+        """Price, breakout level, EMA and entry signal of every symbol (same values as ``calculate_signals``)."""
+        n_symbols, window = self.highs.shape
+        cols = np.arange(window)
+        # Máximo de las N velas anteriores a la que se forma (shift(1)), con N por símbolo
+        in_range = (cols >= window - 1 - self.breakout_period[:, None]) & (cols < window - 1)
+        level = np.where(in_range, self.highs, -np.inf).max(axis=1)
+
+        # EMA (adjust=False) vectorizada entre símbolos; arranca en el primer cierre conocido
+        ema = np.full(n_symbols, np.nan)
+        alpha = self.alpha
+        for j in range(window):
+            x = self.closes[:, j]
+            ema = np.where(np.isnan(ema), x, alpha * x + (1.0 - alpha) * ema)
+
+        price = self.closes[:, -1]
+        with np.errstate(invalid='ignore'):
+            signal = (price > level) & (price > ema)
+        return pd.DataFrame({'price': price, 'breakout_level': level, 'ema': ema, 'signal': signal,
+                             'timestamp': self.last_timestamp}, index=pd.Index(self.symbols, name='symbol'))
+
+    def scan(self) -> pd.DataFrame:
+        with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="fetch"):
+            self.fetch()
+        with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="features"):
+            return self.signals()
+
+
+def run_scanner(symbols=None, top=None, client=None, clock=None, max_cycles=None):
+    """Scan right after every candle close and print the symbols breaking out."""
+    client = client or sol_sniper_bot.exchange
+    clock = clock or SystemClock()
+    symbols = symbols or universe(client, top=top)
+    params = load_symbol_params()
+    scanner = BreakoutScanner(symbols, params, client=client, clock=clock)
+    scheduler = CandleScheduler(TIMEFRAME, clock=clock)
+    print(f"🔎 SCANNER STARTED | {len(symbols)} pares | {sum(s in params for s in symbols)} con parámetros propios")
+
+    cycles = 0
+    while max_cycles is None or cycles < max_cycles:
+        cycles += 1
+        started = time.perf_counter()
+        result = scanner.scan()
+        hits = result[result['signal']]
+        print(f"\n[{pd.Timestamp(clock.time(), unit='s'):%Y-%m-%d %H:%M}] {len(result)} pares en "
+              f"{time.perf_counter() - started:.1f}s | {len(hits)} rupturas")
+        for symbol, row in hits.iterrows():
+            print(f"✅ {symbol}: {row['price']:.6g} > Breakout Lvl {row['breakout_level']:.6g} | EMA {row['ema']:.6g}")
+        if max_cycles is None or cycles < max_cycles:
+            scheduler.sleep_until_next_close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escáner de rupturas multi-par")
+    parser.add_argument('symbols', nargs='*', help="Pares a vigilar (por defecto todos los USDT de spot)")
+    parser.add_argument('--top', type=int, default=None, help="Solo los N pares con más volumen")
+    args = parser.parse_args()
+    start_from_env()
+    run_scanner(args.symbols or None, top=args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Shadow evaluation of candidate models on the live feed.
+
+Every candidate policy sees the same candles as the active model, decides in
+one stacked forward pass for all candidates (``StackedPolicies``) and trades
+its own ``PositionBook`` with the same stop-loss / cooldown rules. Trades are
+stored under ``<SYMBOL>_SHADOW_<name>`` so candidates can be compared in the
+dashboard before promoting one.
+
+Candidates are the ``*.zip`` files in ``models/SHADOW/<SYMBOL>/``.
+"""
+import glob
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from policy_batch import StackedPolicies, load_policy
+from positions import PositionBook
+
+logger = logging.getLogger(__name__)
+
+SHADOW_DIR = "models/SHADOW"
+
+
+def load_shadow_policies(symbol, directory=SHADOW_DIR) -> Dict[str, object]:
+    """``{name: policy}`` for every candidate zip of ``symbol`` (empty if there are none)."""
+    policies = {}
+    for path in sorted(glob.glob(os.path.join(directory, symbol.upper(), "*.zip"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            policies[name] = load_policy(path)
+        except Exception as e:
+            logger.error(f"❌ Modelo sombra {path} descartado: {e}")
+    return policies
+
+
+class ShadowPolicies:
+    def __init__(self, symbol, policies, config, now=None):
+        self.symbol = symbol
+        self.books = {name: PositionBook(self.bot_name(name), config, now=now, log=None) for name in policies}
+        self.stacked = StackedPolicies(policies)
+        self.actions: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.books)
+
+    def bot_name(self, name):
+        return f"{self.symbol}_SHADOW_{name}"
+
+    def predict(self, market_data, construct_observation):
+        """Decide for every shadow in one batched pass (each with its own position in the observation)."""
+        observations = {name: construct_observation(market_data, book.current_position)
+                        for name, book in self.books.items()}
+        self.actions = self.stacked.predict(observations)
+
+    def execute(self, price, now_dt) -> List[Tuple[str, dict]]:
+        """Apply the pending actions; returns ``[(bot_name, trade)]`` to persist."""
+        trades = []
+        for name, action in self.actions.items():
+            trade = self.books[name].execute(action, price, now_dt)
+            if trade is not None:
+                trades.append((self.bot_name(name), trade))
+        self.actions = {}
+        return trades
@@ -0,0 +1,64 @@
+"""
+Crash-safe state snapshots for the live bots.
+
+A snapshot is a small JSON document (position book, balances, cooldown
+clock and the tail of the candle buffer) written atomically: temp file in
+the same directory, fsync, then ``os.replace``. A crash mid-write leaves the
+previous snapshot intact, so a restarted bot always finds a consistent state
+and can decide on the first cycle without re-downloading history.
+"""
+import json
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = "data/state"
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path, state: dict):
+    """Atomically replace ``path`` with ``state`` as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(state, version=SNAPSHOT_VERSION), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path) -> Optional[dict]:
+    """The last snapshot, or None if there is none (or it is unreadable / from another version)."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Snapshot ilegible ({path}), se ignora: {e}")
+        return None
+    if state.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"⚠️ Snapshot {path} de otra versión ({state.get('version')}), se ignora.")
+        return None
+    return state
+
+
+def frame_to_state(df: pd.DataFrame) -> dict:
+    """Candles (DatetimeIndex in UTC) as plain JSON lists."""
+    epoch = pd.Timestamp(0, tz='UTC')
+    return {
+        "columns": list(df.columns),
+        "index": ((df.index - epoch) // pd.Timedelta(1, 'ns')).tolist(),
+        "data": df.to_numpy(dtype='float64').tolist(),
+    }
+
+
+def frame_from_state(state: dict) -> pd.DataFrame:
+    index = pd.to_datetime(state["index"], unit='ns', utc=True).rename('timestamp')
+    return pd.DataFrame(state["data"], index=index, columns=state["columns"], dtype='float64')
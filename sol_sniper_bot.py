@@ -3,14 +3,24 @@ import pandas as pd
 import numpy as np
 import time
 import json
+import logging
 import os
 from datetime import datetime
+from metrics import DECISION_LATENCY, METRICS, PHASE_SECONDS, start_from_env
+from breakout import BreakoutMonitor, PollingPriceFeed, breakout_step, trailing_stop_price
+from live_feed import publisher_from_env
+from market_data_daemon import client_from_env
+from orders import OrderRouter, gateway_from_env
+from snapshots import STATE_DIR, frame_from_state, frame_to_state, load_snapshot, save_snapshot
 
 # --- CONFIGURATION (OPTION A: SAFE SNIPER) ---
 SYMBOL = 'SOL/USDT'
 TIMEFRAME = '15m'
 CAPITAL_ALLOCATION = 0.60 # 60% of Balance
 LEVERAGE = 1              # Spot (No leverage by default)
+BOT_NAME = "SOL_SNIPER"   # Etiqueta en las métricas de latencia
+BUFFER_SIZE = 500         # Velas en memoria (ventana de señales)
+STATE_PATH = os.path.join(STATE_DIR, "sol_sniper.json")
 
 # Load Best Params (Option A)
 PARAMS = {
@@ -27,28 +37,62 @@ def get_exchange(use_us=False):
 
 exchange = get_exchange(use_us=False) # Start with Global
 
-def fetch_data(symbol, timeframe, limit=500, retries=3):
+def fetch_data(symbol, timeframe, limit=500, retries=3, client=None, clock=time, since=None):
+    """``client`` / ``clock`` permiten reproducir el bot offline (ver replay.py)."""
     global exchange
     for i in range(retries):
         try:
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = (client or exchange).fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             return df
         except Exception as e:
             print(f"⚠️ Connection Error (Attempt {i+1}/{retries}): {e}")
-            time.sleep(2)
+            clock.sleep(2)
             
             # Auto-Switch to Binance US if blocked/451/403 errors occur
-            if "451" in str(e) or "403" in str(e) or "Service Unavailable" in str(e):
+            if client is None and ("451" in str(e) or "403" in str(e) or "Service Unavailable" in str(e)):
                 if not isinstance(exchange, ccxt.binanceus):
                     print("🇺🇸 Switching to Binance US API (Region Detected)...")
                     exchange = get_exchange(use_us=True)
-                    time.sleep(1)
+                    clock.sleep(1)
     
     print("❌ Failed to fetch data after retries. Checking internet or API status.")
     return None
 
+def update_buffer(buffer, new, limit=BUFFER_SIZE):
+    """Últimas ``limit`` velas: las nuevas sustituyen a las repetidas (la vela en formación cambia)."""
+    if buffer is None or len(buffer) == 0:
+        return new.tail(limit).reset_index(drop=True)
+    merged = pd.concat([buffer[buffer['timestamp'] < new['timestamp'].iloc[0]], new])
+    return merged.tail(limit).reset_index(drop=True)
+
+def buffer_since(buffer, clock, limit=BUFFER_SIZE):
+    """ms desde los que pedir velas, o None para descargar la ventana completa."""
+    if buffer is None or len(buffer) == 0:
+        return None
+    last = buffer['timestamp'].iloc[-1]
+    # Si el hueco es mayor que la ventana (bot parado mucho tiempo) no vale la pena encadenar
+    if clock.time() - last.timestamp() > (limit - 1) * 15 * 60:
+        return None
+    return int(last.timestamp() * 1000)
+
+def save_state(path, position, balance, buffer):
+    if not path:
+        return
+    candles = buffer.set_index(buffer['timestamp'].dt.tz_localize('UTC')).drop(columns='timestamp')
+    save_snapshot(path, {'position': position, 'balance': balance, 'candles': frame_to_state(candles)})
+
+def load_state(path):
+    """(position, balance, buffer) del último snapshot, o None."""
+    state = load_snapshot(path)
+    if state is None:
+        return None
+    candles = frame_from_state(state['candles'])
+    buffer = candles.reset_index().rename(columns={'index': 'timestamp'})
+    buffer['timestamp'] = buffer['timestamp'].dt.tz_localize(None)
+    return state['position'], state['balance'], buffer
+
 def calculate_signals(df, params):
     # 1. Breakout Level (Max of last N candles, shifted by 1 to avoid lookahead)
     df['Roll_Max'] = df['high'].rolling(window=params['breakout_period']).max().shift(1)
@@ -64,7 +108,38 @@ def calculate_signals(df, params):
     
     return current_price, prev_breakout_level, ema_value
 
-def run_bot():
+def report(event):
+    if event is None:
+        return
+    if event['type'] == 'BUY':
+        print("✅ BUY SIGNAL DETECTED!")
+        print(f"🛒 BOUGHT {event['shares']:.4f} SOL @ {event['price']} | Invested: ${event['invest']:.2f}")
+        print(f"🛡️ HARD STOP LOSS set at: {event['stop_loss']:.4f}")
+    else:
+        print(f"🚨 SELL EXECUTED: {event['reason']}")
+        print(f"💰 PnL: ${event['net_profit']:.2f}")
+        print(f"💵 NEW BALANCE: ${event['balance']:.2f}")
+
+def route(orders, event, signal_time):
+    """Envía la compra / venta del simulador al gateway (``orders.OrderRouter``), sin esperar."""
+    if orders is None or event is None:
+        return
+    orders.send(SYMBOL, 'buy' if event['type'] == 'BUY' else 'sell', event['shares'], signal_time=signal_time)
+
+def run_bot(client=None, clock=time, max_cycles=None, state_path=STATE_PATH, orders=None):
+    """
+    Bucle del bot. Por defecto contra Binance en tiempo real; con ``client``
+    (cualquier objeto con ``fetch_ohlcv``) y ``clock`` (``time``/``sleep``)
+    se puede reproducir sobre velas guardadas. Devuelve el balance final
+    cuando se alcanza ``max_cycles``.
+
+    Cada ciclo guarda un snapshot atómico (posición, balance y ventana de
+    velas) en ``state_path``; al arrancar se restaura y solo se piden las
+    velas que faltan. ``state_path=None`` lo desactiva.
+
+    Con ``orders`` (``orders.OrderRouter``) cada compra / venta se envía
+    además al exchange (o al paper exchange).
+    """
     print(f"🚀 SOL SNIPER BOT STARTED [Option A Config]")
     print(f"Strategy: Volatility Breakout")
     print(f"Params: {json.dumps(PARAMS, indent=2)}")
@@ -72,82 +147,135 @@ def run_bot():
     # Mock State
     position = None # None or {'entry': float, 'shares': float, 'stop_loss': float, 'highest': float}
     balance = 200.0 # Simulation Balance
+    buffer = None   # Últimas BUFFER_SIZE velas (la última en formación)
+
+    restored = load_state(state_path)
+    if restored is not None:
+        position, balance, buffer = restored
+        print(f"♻️ Estado restaurado: posición {'ABIERTA' if position else 'ninguna'} | Balance: ${balance:.2f} | {len(buffer)} velas")
     
-    while True:
-        df = fetch_data(SYMBOL, TIMEFRAME)
+    cycles = 0
+    while max_cycles is None or cycles < max_cycles:
+        cycles += 1
+        with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="fetch"):
+            new = fetch_data(SYMBOL, TIMEFRAME, limit=BUFFER_SIZE, client=client, clock=clock,
+                             since=buffer_since(buffer, clock))
+        df = None
+        if new is not None and len(new):
+            buffer = update_buffer(buffer, new)
+            df = buffer.copy()
         if df is not None:
-            current_price, breakout_level, ema = calculate_signals(df, PARAMS)
+            with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="features"):
+                current_price, breakout_level, ema = calculate_signals(df, PARAMS)
             
             timestamp = df['timestamp'].iloc[-1]
             print(f"\n[{timestamp}] Price: {current_price:.4f} | Breakout Lvl: {breakout_level:.4f} | EMA: {ema:.4f}")
             
             # --- TRADING LOGIC ---
-            
-            if position is None:
-                # ENTRY CONDITIONS
-                # 1. Price > Breakout Level
-                # 2. Price > EMA (Trend)
-                
-                if current_price > breakout_level and current_price > ema:
-                    print("✅ BUY SIGNAL DETECTED!")
-                    invest = balance * CAPITAL_ALLOCATION
-                    shares = invest / current_price
-                    entry_price = current_price
-                    
-                    # Initial Stop Loss
-                    sl_price = entry_price * (1 - PARAMS['stop_loss'])
-                    
-                    position = {
-                        'entry': entry_price,
-                        'shares': shares,
-                        'stop_loss': sl_price,
-                        'highest': current_price
-                    }
-                    balance -= invest
-                    print(f"🛒 BOUGHT {shares:.4f} SOL @ {current_price} | Invested: ${invest:.2f}")
-                    print(f"🛡️ HARD STOP LOSS set at: {sl_price:.4f}")
-            
-            else:
-                # EXIT CONDITIONS
-                # Update Highest High for Trailing Stop
-                if current_price > position['highest']:
-                    position['highest'] = current_price
-                
-                # Check Hard Stop Loss
-                if current_price < position['stop_loss']:
-                    reason = "STOP LOSS"
-                    sell = True
-                else:
-                    sell = False
-                
-                # Check Trailing Stop
-                # Trigger Condition: Are we in profit enough?
+            risk_start = time.perf_counter()
+            position, balance, event = breakout_step(position, balance, current_price, breakout_level, ema,
+                                                     PARAMS, CAPITAL_ALLOCATION)
+            report(event)
+            route(orders, event, risk_start)
+            stop = trailing_stop_price(position, PARAMS)
+            if stop is not None:
                 profit_pct = (position['highest'] - position['entry']) / position['entry']
-                
-                if profit_pct >= PARAMS['ts_trigger']:
-                    # Calculate Dynamic Stop Price
-                    trailing_stop_price = position['highest'] * (1 - PARAMS['ts_dist'])
-                    
-                    print(f"🎯 TRAILING STOP ACTIVE: {trailing_stop_price:.4f} (Profit Peak: {profit_pct*100:.2f}%)")
-                    
-                    if current_price < trailing_stop_price:
-                        reason = f"TRAILING STOP (Locked Profit)"
-                        sell = True
-                
-                if sell:
-                    revenue = position['shares'] * current_price
-                    # Commission
-                    revenue = revenue * (1 - 0.0005) 
-                    
-                    balance += revenue
-                    net_profit = revenue - (position['shares'] * position['entry'])
-                    
-                    print(f"🚨 SELL EXECUTED: {reason}")
-                    print(f"💰 PnL: ${net_profit:.2f}")
-                    print(f"💵 NEW BALANCE: ${balance:.2f}")
-                    position = None
-
-        time.sleep(15 * 60) # Wait 15 minutes for next candle (Simplified)
+                print(f"🎯 TRAILING STOP ACTIVE: {stop:.4f} (Profit Peak: {profit_pct*100:.2f}%)")
+
+            METRICS.observe(PHASE_SECONDS, time.perf_counter() - risk_start, bot=BOT_NAME, phase="risk")
+            # La última fila es la vela en formación: abrió justo al cerrar la anterior
+            METRICS.observe(DECISION_LATENCY, clock.time() - timestamp.timestamp(), bot=BOT_NAME)
+
+            try:
+                save_state(state_path, position, balance, buffer)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el snapshot: {e}")
+
+        clock.sleep(15 * 60) # Wait 15 minutes for next candle (Simplified)
+
+    return balance
+
+def run_stream(feed=None, client=None, clock=time, max_ticks=None, state_path=STATE_PATH, live_feed=None,
+               orders=None):
+    """
+    Modo por eventos: evalúa la ruptura y los stops en cada precio de ``feed``
+    (por defecto el ticker del exchange cada 2 s) con ``BreakoutMonitor``, en
+    O(1) por tick. Las velas solo se piden al arrancar y al cerrar cada vela,
+    para cerrar el nivel de ruptura con el máximo real del exchange.
+    Con ``live_feed`` (live_feed.LiveFeedPublisher) publica el estado en cada tick
+    y con ``orders`` (``orders.OrderRouter``) envía las compras / ventas.
+    Devuelve el balance tras ``max_ticks`` precios.
+    """
+    print(f"🚀 SOL SNIPER BOT STARTED [Option A Config | Event-driven]")
+    print(f"Params: {json.dumps(PARAMS, indent=2)}")
+
+    position, balance, buffer = None, 200.0, None
+    restored = load_state(state_path)
+    if restored is not None:
+        position, balance, buffer = restored
+        print(f"♻️ Estado restaurado: posición {'ABIERTA' if position else 'ninguna'} | Balance: ${balance:.2f} | {len(buffer)} velas")
+
+    def refresh(buffer):
+        new = fetch_data(SYMBOL, TIMEFRAME, limit=BUFFER_SIZE, client=client, clock=clock,
+                         since=buffer_since(buffer, clock))
+        return update_buffer(buffer, new) if new is not None and len(new) else buffer
+
+    buffer = refresh(buffer)
+    if buffer is None:
+        return balance
+    monitor = BreakoutMonitor(PARAMS, position=position, balance=balance, allocation=CAPITAL_ALLOCATION)
+    monitor.warmup(buffer)
+    print(f"📡 Monitor listo | Breakout Lvl: {monitor.level:.4f} | {len(buffer)} velas")
+
+    feed = feed if feed is not None else PollingPriceFeed(client or exchange, SYMBOL, clock=clock)
+    for ticks, (ts, price) in enumerate(feed, 1):
+        rolled = monitor.rolls_over(ts)
+        if rolled:
+            with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="fetch"):
+                buffer = refresh(buffer)
+            # Todas las velas cerradas desde la última vista (un corte del feed puede saltarse varias)
+            monitor.roll_to(buffer, ts)
+            print(f"[{pd.Timestamp(ts, unit='s')}] Price: {price:.4f} | Breakout Lvl: {monitor.level:.4f} | EMA: {monitor.ema(price):.4f}")
+
+        signal_time = time.perf_counter()
+        with METRICS.timer(PHASE_SECONDS, bot=BOT_NAME, phase="risk"):
+            event = monitor.on_tick(ts, price)
+        if event is not None:
+            report(event)
+            route(orders, event, signal_time)
+            METRICS.observe(DECISION_LATENCY, max(clock.time() - ts, 0.0), bot=BOT_NAME)
+        if live_feed is not None:
+            held = monitor.position
+            live_feed.publish(BOT_NAME, ts=ts, price=price, position=int(held is not None),
+                              entry_price=held['entry'] if held else None, balance=monitor.balance,
+                              equity=monitor.balance + (held['shares'] * price if held else 0.0))
+        if event is not None or rolled:
+            # Snapshot en cada operación y al empezar cada vela
+            try:
+                save_state(state_path, monitor.position, monitor.balance, buffer)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el snapshot: {e}")
+
+        if max_ticks is not None and ticks >= max_ticks:
+            break
+
+    return monitor.balance
 
 if __name__ == "__main__":
-    run_bot()
+    # Los resúmenes periódicos de latencia van por logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    start_from_env()
+    # MARKET_DATA=host:port: velas y ticker del daemon compartido en vez de Binance directo
+    client = client_from_env()
+    # SNIPER_MODE=poll: el bucle clásico de una evaluación por vela
+    # ORDER_GATEWAY=host:port envía las compras / ventas a un paper exchange (orders.py serve)
+    gateway = gateway_from_env(BOT_NAME)
+    orders = OrderRouter(gateway) if gateway is not None else None
+    try:
+        if os.environ.get("SNIPER_MODE", "stream") == "poll":
+            run_bot(client=client, orders=orders)
+        else:
+            run_stream(client=client, live_feed=publisher_from_env(), orders=orders)
+    finally:
+        if orders is not None:
+            orders.close()
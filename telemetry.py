@@ -0,0 +1,86 @@
+"""
+Background sinks for the live bots' telemetry: TensorBoard scalars and logs.
+
+``ScalarSink`` buffers ``add_scalar`` events (from any number of
+``SummaryWriter``s) and writes them from a daemon thread every
+``flush_interval`` seconds, with one ``flush()`` per writer per batch instead
+of one per trade.
+
+``setup_logging`` routes the root logger through a ``QueueHandler``: the
+calling thread only enqueues the record, and a ``QueueListener`` thread
+formats it and writes to the console and a size-rotated log file.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+
+from live_loop import BatchWriter
+from metrics import METRICS, PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class ScalarSink(BatchWriter):
+    thread_name = "tensorboard"
+
+    def __init__(self, flush_interval=5.0, max_events=1000, metrics=None):
+        super().__init__(max_events, flush_interval)
+        self.metrics = metrics or METRICS
+        self.written = 0
+
+    def add_scalars(self, writer, step, scalars):
+        """Queue ``{tag: value}`` at ``step`` for ``writer`` (never touches the disk)."""
+        self._add(*((writer, tag, value, step) for tag, value in scalars.items()))
+
+    def _write(self, events):
+        """Un ``flush`` por writer y lote."""
+        writers = {}
+        for writer, tag, value, step in events:
+            writers.setdefault(id(writer), writer)
+        try:
+            with self.metrics.timer(PHASE_SECONDS, bot="TB", phase="tensorboard_write"):
+                for writer, tag, value, step in events:
+                    writer.add_scalar(tag, value, step)
+                for writer in writers.values():
+                    writer.flush()
+            self.written += len(events)
+            return True
+        except Exception as e:
+            logger.error(f"Error escribiendo a TensorBoard ({len(events)} eventos): {e}")
+            return False
+
+
+def setup_logging(path="live_trader.log", level=logging.INFO, max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Root logger -> ``QueueHandler`` -> listener thread -> console + rotating
+    ``path`` (``max_bytes`` per file, ``backup_count`` old files kept).
+    Returns the started ``QueueListener`` (stopped, and drained, at exit).
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if path:
+        handlers.append(logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                             encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener):
+    # Al salir: vaciar la cola (si no se paró antes a mano)
+    if listener._thread is not None:
+        listener.stop()
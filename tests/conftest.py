@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def random_candles(n=1500, seed=0, vol=0.004, spread=0.002, tz="UTC", base=100.0, start="2025-01-01",
+                   close=None, gapped=False):
+    """
+    15m OHLCV candles indexed by open time: a seeded log-normal random walk
+    (or ``close`` as given) with High / Low ``spread`` above / below the body.
+    ``gapped=True`` opens each candle at the previous close instead of its own.
+    """
+    if close is None:
+        rng = np.random.default_rng(seed)
+        close = base * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    close = np.asarray(close, dtype=np.float64)
+    open_ = np.r_[base, close[:-1]] if gapped else close
+    times = pd.date_range(start, periods=len(close), freq="15min", tz=tz)
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) * (1 + spread),
+                         'Low': np.minimum(open_, close) * (1 - spread), 'Close': close, 'Volume': 1.0},
+                        index=times)
+
+
+@pytest.fixture
+def make_candles():
+    return random_candles
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import archive
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "trading_history.db"))
+    database.init_database()
+    yield database
+    database.close_connection()
+
+
+def test_old_trades_move_to_parquet_and_queries_span_both(db, tmp_path):
+    now = datetime(2024, 6, 1, 12, 0)
+    db.save_trades_bulk([dict(bot_name=bot, action="VENTA", price=100.0 + i, pnl_pct=1.0, balance=1000.0 + i,
+                              timestamp=now - timedelta(hours=12 * i))
+                         for i in range(120) for bot in ("BTC", "ETH")])
+    summary = [tuple(r) for r in db.get_bot_summary()]
+    everything = archive.query_trades()
+
+    assert archive.archive_trades(days=30, now=now) == 2 * 59
+    assert len(db.get_all_trades(limit=10_000)) == 2 * 61
+    days = sorted(p.name for p in (tmp_path / "archive" / "trades").iterdir())
+    assert days[0] == "date=2024-04-03" and len(days) == 30
+    assert [tuple(r) for r in db.get_bot_summary()] == summary  # Los totales no cambian
+
+    # Misma respuesta que antes de archivar, en cualquier rango
+    assert archive.query_trades().equals(everything)
+    btc = archive.query_trades("BTC", start=now - timedelta(days=40), end=now - timedelta(days=20))
+    assert len(btc) == 41 and (btc['bot_name'] == "BTC").all()
+    assert btc['timestamp'].is_monotonic_decreasing
+    assert archive.query_trades(limit=5).equals(everything.head(5))
+    assert archive.query_trades(limit=300).equals(everything.head(240))
+
+    assert archive.archive_trades(days=30, now=now) == 0
+
+
+def test_limited_queries_read_only_the_newest_partitions(db, monkeypatch):
+    now = datetime(2024, 6, 1, 12, 0)
+    db.save_trades_bulk([dict(bot_name="BTC", action="VENTA", price=100.0, pnl_pct=1.0, balance=1000.0 + i,
+                              timestamp=now - timedelta(hours=6 * i)) for i in range(400)])
+    archive.archive_trades(days=30, now=now, vacuum=False)
+
+    opened = []
+    dataset = archive.ds.dataset
+    monkeypatch.setattr(archive.ds, "dataset", lambda files, **kw: opened.append(files) or dataset(files, **kw))
+    trades = archive.query_trades("BTC", limit=130)
+    assert len(trades) == 130 and trades['timestamp'].is_monotonic_decreasing
+    assert len(opened) == 3                                     # 121 filas en la DB + 4 por día archivado
+    assert len(archive.query_trades("BTC")) == 400
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from breakout import BreakoutMonitor, candle_ticks
+
+PARAMS = {"breakout_period": 35, "ema_period": 23, "stop_loss": 0.0172, "ts_trigger": 0.0096, "ts_dist": 0.0080}
+
+
+@pytest.fixture
+def candles(make_candles):
+    """Sniper-style frames (``timestamp`` column, lowercase OHLCV), each candle opening at the previous close."""
+    def frame(n=300, seed=3):
+        df = make_candles(n, seed=seed, tz=None, gapped=True)
+        return df.rename(columns=str.lower).rename_axis('timestamp').reset_index()
+    return frame
+
+
+def test_incremental_level_and_ema_match_the_frame(candles):
+    """Same breakout level and EMA as ``calculate_signals`` on the full frame, at every bar."""
+    sol_sniper_bot = pytest.importorskip("sol_sniper_bot")
+    df = candles()
+    monitor = BreakoutMonitor(PARAMS)
+    monitor.warmup(df.iloc[:50])
+    for i in range(50, len(df)):
+        monitor.close_bar(df['high'].iloc[i - 1], df['close'].iloc[i - 1])
+        monitor.on_tick(df['timestamp'].iloc[i].timestamp(), df['close'].iloc[i])
+        price, level, ema = sol_sniper_bot.calculate_signals(df.iloc[:i + 1].copy(), PARAMS)
+        assert monitor.level == pytest.approx(level)
+        assert monitor.ema(price) == pytest.approx(ema)
+
+
+def test_feed_gap_closes_every_skipped_bar(candles):
+    sol_sniper_bot = pytest.importorskip("sol_sniper_bot")
+    df = candles()
+    monitor = BreakoutMonitor(PARAMS)
+    monitor.warmup(df.iloc[:291])
+    gap = df['timestamp'].iloc[295].timestamp() + 30    # Sin ticks de la vela 290 a la 295
+    monitor.roll_to(df.iloc[:296], gap)
+    monitor.on_tick(gap, df['close'].iloc[295])
+    price, level, ema = sol_sniper_bot.calculate_signals(df.iloc[:296].copy(), PARAMS)
+    assert monitor.level == pytest.approx(level)
+    assert monitor.ema(price) == pytest.approx(ema)
+
+
+def test_breakout_and_stop_fire_inside_the_bar(candles):
+    df = candles(60)
+    df['high'] = df['close'] = df['open'] = 100.0
+    monitor = BreakoutMonitor(PARAMS)
+    monitor.warmup(df)
+    t0 = df['timestamp'].iloc[-1].timestamp()
+
+    assert monitor.on_tick(t0 + 10, 100.0) is None
+    buy = monitor.on_tick(t0 + 20, 100.5)           # Rompe el máximo en mitad de la vela
+    assert buy['type'] == 'BUY' and monitor.position['entry'] == 100.5
+    sell = monitor.on_tick(t0 + 30, 98.0)           # Stop loss en el siguiente tick
+    assert sell['type'] == 'SELL' and sell['reason'] == "STOP LOSS"
+    assert monitor.position is None and monitor.balance < 200.0
+
+
+def test_stream_mode_runs_on_a_local_feed(candles):
+    sol_sniper_bot = pytest.importorskip("sol_sniper_bot")
+    from replay import ReplaySource, SimulatedClock
+
+    df = candles(700)
+    clock = SimulatedClock(df['timestamp'].iloc[500].tz_localize('UTC') + pd.Timedelta(seconds=3))
+    stored = df.set_index(df['timestamp'].dt.tz_localize('UTC')).drop(columns='timestamp').rename(columns=str.capitalize)
+    source = ReplaySource(stored, clock)
+
+    def feed():
+        for ts, price in candle_ticks(df.iloc[501:]):
+            clock.now = ts + 1
+            yield ts, price
+
+    sent = []
+    orders = SimpleNamespace(send=lambda symbol, side, qty, signal_time=None: sent.append((side, qty)))
+    balance = sol_sniper_bot.run_stream(feed=feed(), client=source, clock=clock, state_path=None, orders=orders)
+    assert np.isfinite(balance)
+    assert sent and [side for side, _ in sent[:2]] == ["buy", "sell"][:len(sent[:2])]
+    assert all(qty > 0 for _, qty in sent)
+    assert source.requests <= 1 + 199                 # Una petición por vela, no por tick
+
+
+def test_live_single_step_matches_the_optimizer_bulk_run(candles):
+    """The live bot and the optimizer trade through the same kernel: same trades, same balance."""
+    from breakout import CASH, SHARES, TRADES, breakout_step, simulate
+
+    df = candles(3000, seed=8)
+    levels = df['high'].rolling(PARAMS['breakout_period']).max().shift(1).to_numpy()
+    emas = df['close'].ewm(span=PARAMS['ema_period'], adjust=False).mean().to_numpy()
+    state, equity = simulate(df['close'].to_numpy(), levels, emas, PARAMS, start=50)
+
+    position, balance, trades = None, 200.0, 0
+    for price, level, ema in zip(df['close'].to_numpy()[50:], levels[50:], emas[50:]):
+        position, balance, event = breakout_step(position, balance, price, level, ema, PARAMS)
+        trades += event is not None and event['type'] == 'SELL'
+    assert trades == state[TRADES] > 0
+    assert balance == pytest.approx(state[CASH])
+    assert (position['shares'] if position else 0.0) == pytest.approx(state[SHARES])
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import database
+from dashboard_data import DashboardData
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "trading_history.db"))
+    database.init_database()
+    yield database
+    database.close_connection()
+
+
+def sells(bot, n, start=0):
+    return [dict(bot_name=bot, action="VENTA", price=100.0 + i, pnl_pct=1.0, balance=1000.0 + i)
+            for i in range(start, start + n)]
+
+
+def test_reruns_reuse_the_cache_until_a_write(db):
+    db.save_trades_bulk(sells("BTC", 30) + sells("ETH", 30))
+    data = DashboardData(page_size=15)
+    summary, trades = data.refresh()
+    assert len(trades) == 15 and trades['id'].iloc[0] == 60 and list(summary['bot_name']) == ["BTC", "ETH"]
+
+    with mock.patch.object(db, "get_trades_page", wraps=db.get_trades_page) as page:
+        for _ in range(10):
+            assert data.refresh()[1] is trades
+            assert data.feed_page()[0] is trades
+        assert page.call_count == 0 and data.loads == 1
+
+        db.save_trades_bulk(sells("SOL", 5))
+        summary, trades = data.refresh()
+        page.assert_called_once_with(limit=15)
+    assert list(trades['id'][:6]) == [65, 64, 63, 62, 61, 60] and len(trades) == 15
+    assert list(summary['bot_name']) == ["BTC", "ETH", "SOL"]
+    assert str(trades['timestamp'].dtype).startswith("datetime64")
+
+
+def test_feed_pages_continue_from_the_cached_page(db):
+    db.save_trades_bulk(sells("BTC", 40))
+    data = DashboardData(page_size=15)
+    data.refresh()
+    assert data.kpis['active_bots'] == 1 and len(data.history) == 1
+
+    first, cursor = data.feed_page()
+    second, cursor = data.feed_page(cursor)
+    third, cursor = data.feed_page(cursor)
+    assert cursor is None
+    assert list(first['id']) + list(second['id']) + list(third['id']) == list(range(40, 0, -1))
+
+
+def test_feed_follows_timestamps_when_ids_arrive_out_of_order(db):
+    # Cada proceso vuelca su lote hasta 1 s después de fecharlo: id y timestamp no siguen el mismo orden
+    base = datetime(2025, 1, 1, 12)
+    rows = [dict(trade, timestamp=base + timedelta(seconds=(7 * i) % 20))
+            for i, trade in enumerate(sells("BTC", 10) + sells("ETH", 10))]
+    db.save_trades_bulk(rows)
+    data = DashboardData(page_size=6)
+    data.refresh()
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = data.feed_page(cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    feed = pd.concat(pages)
+    assert len(feed) == 20 and feed['id'].is_unique
+    assert feed['timestamp'].is_monotonic_decreasing
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "trading_history.db"))
+    database.init_database()
+    yield database
+    database.close_connection()
+
+
+def count(bot_name=None):
+    return len(database.get_all_trades(bot_name, limit=10_000))
+
+
+def test_wal_mode_and_one_connection_per_thread(db):
+    assert db.get_connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.get_connection() is db.get_connection()
+    other = []
+    t = threading.Thread(target=lambda: other.append(db.get_connection()))
+    t.start()
+    t.join()
+    assert other[0] is not db.get_connection()
+
+
+def test_bulk_insert_is_one_transaction(db):
+    trades = [dict(bot_name="BTC", action="VENTA", price=100.0 + i, pnl_pct=1.0, balance=100000.0 + i)
+              for i in range(100)]
+    assert db.save_trades_bulk(trades) == 100
+    with pytest.raises(sqlite3.IntegrityError):
+        db.save_trades_bulk([dict(bot_name="BTC", action="VENTA", price=1.0),
+                             dict(bot_name="BTC", action="VENTA", price=None)])
+    assert count("BTC") == 100                                 # La transacción fallida no deja filas
+
+
+def test_buffered_writer_and_concurrent_reader(db):
+    writer = db.TradeWriter(max_rows=50, max_delay=0.05)
+    errors = []
+
+    def bot(name):
+        for i in range(200):
+            writer.add(name, "VENTA", 10.0, 0.5, 1000.0 + i)
+
+    def dashboard():
+        try:
+            for _ in range(50):
+                db.get_bot_summary()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+        finally:
+            db.close_connection()
+
+    threads = [threading.Thread(target=bot, args=(n,)) for n in ("BTC", "ETH", "SOL")]
+    threads.append(threading.Thread(target=dashboard))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+
+    assert not errors
+    assert writer.written == 600 and count() == 600
+
+
+def test_invalid_row_is_dropped_without_blocking_the_batch(db):
+    writer = db.TradeWriter(max_rows=1000, max_delay=60)
+    writer.add("BTC", "VENTA", 10.0, 0.5, 1000.0)
+    writer.add("BTC", "VENTA", None, 0.5, 1000.0)            # Viola NOT NULL
+    writer.add("ETH", "VENTA", 10.0, 0.5, 1000.0)
+    writer.add_equity("BTC", 1000.0, 1000.0)
+    assert writer.flush()
+    assert writer.written == 2 and count() == 2 and not writer._pending
+    writer.close()
+
+
+LEGACY_SUMMARY = '''
+    SELECT t.bot_name, COUNT(t.id), SUM(CASE WHEN t.pnl_pct > 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN t.pnl_pct < 0 THEN 1 ELSE 0 END), AVG(t.pnl_pct),
+           (SELECT balance FROM trades t2 WHERE t2.bot_name = t.bot_name ORDER BY t2.timestamp DESC LIMIT 1)
+    FROM trades t WHERE t.action = 'VENTA' or t.action = 'SYNC' GROUP BY t.bot_name ORDER BY t.bot_name
+'''
+
+
+def some_trades():
+    return [dict(bot_name=bot, action=action, price=100.0, pnl_pct=pnl, balance=balance)
+            for bot in ("BTC", "ETH", "SOL_SHADOW_v2")
+            for action, pnl, balance in [("COMPRA", None, 1000.0), ("VENTA", 2.0, 1020.0), ("SYNC", 0.0, 1500.0),
+                                         ("COMPRA", None, 1500.0), ("VENTA", -1.0, 1485.0), ("SYNC", None, 1485.0),
+                                         ("COMPRA", None, 1485.0)]]
+
+
+def test_summary_table_matches_the_full_scan(db):
+    db.save_trades_bulk(some_trades())
+    db.save_trade("NEW", "COMPRA", 10.0, None, 500.0)        # Sin ventas todavía: no sale en el resumen
+    db.save_trade("OLD", "SYNC", 1.0, None, 1000.0)          # Sincronización sin PnL
+    expected = [tuple(r) for r in db.get_connection().execute(LEGACY_SUMMARY)]
+    assert [tuple(r) for r in db.get_bot_summary()] == pytest.approx(expected)
+    assert db.get_latest_balance("BTC") == 1485.0 and db.get_latest_balance("NEW") == 500.0
+
+
+def test_summary_is_backfilled_for_existing_databases(db):
+    conn = db.get_connection()
+    conn.execute("DROP TRIGGER trg_trades_summary")
+    conn.execute("DROP TABLE bot_summary")
+    db.save_trades_bulk(some_trades())
+    db.init_database()
+    expected = [tuple(r) for r in conn.execute(LEGACY_SUMMARY)]
+    assert [tuple(r) for r in db.get_bot_summary()] == pytest.approx(expected)
+
+
+def test_trade_queries_use_the_indexes(db):
+    plan = " ".join(r[-1] for r in db.get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE bot_name = ? ORDER BY timestamp DESC LIMIT 10", ("BTC",)))
+    assert "idx_trades_bot_ts" in plan
+
+
+def test_equity_rollups_and_daily_metrics(db):
+    from datetime import datetime, timedelta
+    start = datetime(2024, 1, 1, 23, 0)
+    # Un punto por minuto durante dos horas: sube hasta 1100, cae a 1001 y cruza la medianoche en 990
+    values = [1000.0 + 2 * i for i in range(50)] + [1100.0 - 11 * i for i in range(11)] + [990.0] * 59
+    db.save_equity_bulk([dict(bot_name="BTC", equity=v, balance=1000.0, timestamp=start + timedelta(minutes=i, seconds=30))
+                         for i, v in enumerate(values)])
+    db.save_trades_bulk([dict(bot_name="BTC", action="VENTA", price=1.0, pnl_pct=p, balance=990.0,
+                              timestamp=start + timedelta(minutes=5)) for p in (2.0, -1.0, 3.0)])
+
+    assert len(db.get_equity("BTC", resolution="1m")) == 120
+    hours = db.get_equity("BTC", resolution="1h")
+    assert [tuple(r[1:5]) for r in hours] == [(1000.0, 1100.0, 1000.0, 1001.0), (990.0, 990.0, 990.0, 990.0)]
+    days = db.get_equity("BTC", resolution="1d")
+    assert [r[0] for r in days] == ["2024-01-01", "2024-01-02"]
+    assert db.get_connection().execute(
+        "SELECT samples FROM equity_rollup WHERE resolution = '1d' AND bucket = '2024-01-01'").fetchone()[0] == 60
+
+    trades, wins, losses, pnl, dd, final = db.get_connection().execute(
+        "SELECT total_trades, winning_trades, losing_trades, total_pnl, max_drawdown, final_balance "
+        "FROM daily_metrics WHERE bot_name = 'BTC' AND date = '2024-01-01'").fetchone()
+    assert (trades, wins, losses, final) == (3, 2, 1, 990.0)
+    assert pnl == pytest.approx(4.0) and dd == pytest.approx(9.0)
+
+    # Por defecto: la resolución más fina que quepa en max_points
+    assert len(db.get_equity("BTC")) == 120
+    assert len(db.get_equity("BTC", max_points=100)) == 2
+    assert len(db.get_equity("BTC", start="2024-01-02")) == 60
+
+
+def test_kpis_balance_history_and_trade_pages(db):
+    from datetime import datetime, timedelta
+    now = datetime(2024, 3, 10, 12, 0)
+    db.save_trades_bulk([dict(bot_name=bot, action=action, price=1.0, pnl_pct=1.0, balance=1000.0 + i,
+                              timestamp=now - timedelta(minutes=20 * i))
+                         for i in range(100) for bot, action in (("BTC", "VENTA"), ("ETH", "COMPRA"))])
+    # Un modelo en sombra con su propia cuenta de $100k no suma capital ni bots
+    db.save_trades_bulk([dict(bot_name="BTC_SHADOW_v2", action="VENTA", price=1.0, pnl_pct=1.0, balance=100000.0,
+                              timestamp=now - timedelta(days=3))])
+
+    kpis = db.get_dashboard_kpis(now.date())
+    assert kpis == dict(total_balance=1000.0, active_bots=1, best_bot="BTC", best_balance=1000.0,
+                        ops_today=2 * 37, sells_today=37)
+    history = db.get_balance_history(start=now - timedelta(hours=2))
+    assert [tuple(r) for r in history] == [("BTC", "2024-03-10 10:00:00", 1004.0),
+                                           ("BTC", "2024-03-10 11:00:00", 1001.0),
+                                           ("BTC", "2024-03-10 12:00:00", 1000.0)]
+    conn = db.get_connection()
+    conn.execute("DELETE FROM balance_history")
+    db.init_database()                                       # Se rellena desde trades
+    assert [tuple(r) for r in db.get_balance_history(start=now - timedelta(hours=2))] == [tuple(r) for r in history]
+
+    # Recorrer el histórico por páginas da las mismas filas que una sola consulta
+    pages, cursor = [], None
+    while True:
+        rows, cursor = db.get_trades_page(cursor=cursor, limit=30)
+        pages.append([r['id'] for r in rows])
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [30] * 6 + [21]
+    assert sum(pages, []) == [r['id'] for r in db.get_all_trades(limit=10_000)]
+    eth, _ = db.get_trades_page("ETH", limit=5)
+    assert {r['bot_name'] for r in eth} == {"ETH"} and len(eth) == 5
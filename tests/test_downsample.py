@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import downsample, downsample_groups, lttb_indices, minmax_indices
+
+
+def equity_curve(n=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100_000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+
+def max_drawdown(y):
+    return ((np.maximum.accumulate(y) - y) / np.maximum.accumulate(y)).max()
+
+
+@pytest.mark.parametrize("pick", [minmax_indices, lttb_indices])
+def test_fixed_point_budget_keeps_the_ends(pick):
+    y = equity_curve()
+    idx = pick(y, 1000)
+    assert len(idx) <= 1000 and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert (np.diff(idx) > 0).all()
+    assert list(pick(y[:500], 1000)) == list(range(500))      # Series cortas: sin tocar
+
+
+def test_minmax_preserves_extremes_and_drawdown():
+    y = equity_curve()
+    kept = y[minmax_indices(y, 1000)]
+    assert kept.min() == y.min() and kept.max() == y.max()
+    assert max_drawdown(kept) == pytest.approx(max_drawdown(y), rel=0.02)
+
+
+def test_frames_are_decimated_per_group():
+    y = equity_curve(6000)
+    df = pd.DataFrame({'bot_name': np.repeat(["BTC", "ETH"], 3000), 'balance': y})
+    out = downsample_groups(df, 'balance', 'bot_name', n_out=200)
+    assert out.groupby('bot_name').size().le(200).all()
+    assert out.index.is_monotonic_increasing and len(downsample(df['balance'], 100, method='lttb')) == 100
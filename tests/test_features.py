@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from features import PIPELINE, FeatureStream, add_indicators, compute_features
+from trading_env import TradingEnv
+
+
+@pytest.fixture
+def candles(make_candles):
+    return make_candles(seed=42, vol=0.01).reset_index(drop=True)
+
+
+def test_tail_mode_matches_batch_bit_for_bit(candles):
+    """Continuing the pipeline state in chunks gives exactly the batch columns."""
+    close = candles['Close'].to_numpy()
+    batch, _ = PIPELINE.run(close)
+
+    state, chunks = None, []
+    for part in np.array_split(close, [700, 701, 702, 1000, 1499]):
+        cols, state = PIPELINE.run(part, state)
+        chunks.append(cols)
+
+    for name in PIPELINE.columns:
+        tail = np.concatenate([c[name] for c in chunks])
+        np.testing.assert_array_equal(tail, batch[name], err_msg=name)
+
+
+def test_live_observation_matches_training_observation(candles):
+    """A live FeatureStream observation is identical to the TradingEnv one for the same candles."""
+    env = TradingEnv(candles, window_size=60)
+    env.current_step = 1234
+    training_obs = env._next_observation()[:, :len(PIPELINE.obs_columns)]
+
+    stream = FeatureStream(window_size=60)
+    stream.seed(candles['Close'].iloc[:800])
+    for close in candles['Close'].iloc[800:1234]:
+        stream.update(close)
+    live_obs = np.nan_to_num(stream.observation())
+
+    assert live_obs.dtype == training_obs.dtype
+    np.testing.assert_array_equal(live_obs, training_obs)
+
+
+def test_indicators_match_ta(candles):
+    """The pipeline reproduces the ``ta`` columns stored in the downloaded CSVs."""
+    ta = pytest.importorskip("ta")
+    ours = add_indicators(candles)
+    close = candles['Close']
+    bb = ta.volatility.BollingerBands(close=close, window=20, window_dev=2)
+    expected = {
+        'RSI': ta.momentum.RSIIndicator(close=close, window=14).rsi(),
+        'BBL_20_2.0': bb.bollinger_lband(),
+        'BBM_20_2.0': bb.bollinger_mavg(),
+        'BBU_20_2.0': bb.bollinger_hband(),
+        'EMA_200': ta.trend.EMAIndicator(close=close, window=200).ema_indicator(),
+    }
+    for name, values in expected.items():
+        valid = values.notna()
+        np.testing.assert_allclose(ours[name][valid], values[valid], rtol=1e-10, err_msg=name)
+
+
+def test_compute_features_keeps_input_untouched(candles):
+    """Batch mode returns a copy with the pipeline columns added."""
+    out = compute_features(candles)
+    assert set(PIPELINE.columns) <= set(out.columns)
+    assert 'MACD_Hist' not in candles.columns
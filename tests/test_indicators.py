@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import EMA, RSI, RollingMax, RollingStats, RingBuffer
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(7)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600))))
+
+
+def test_ema_matches_pandas(closes):
+    """Streaming EMA equals pandas ewm(adjust=False)."""
+    ema = EMA(20)
+    values = [ema.update(c) for c in closes]
+    expected = closes.ewm(span=20, adjust=False).mean()
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_rolling_stats_and_max_match_pandas(closes):
+    """Ring-buffer mean/std and monotonic-deque max equal pandas rolling windows."""
+    stats, rmax = RollingStats(20), RollingMax(20)
+    means, stds, maxes = [], [], []
+    for c in closes:
+        stats.update(c)
+        maxes.append(rmax.update(c))
+        means.append(stats.mean)
+        stds.append(stats.std)
+    np.testing.assert_allclose(means, closes.rolling(20).mean(), rtol=1e-9)
+    np.testing.assert_allclose(stds, closes.rolling(20).std(), rtol=1e-6)
+    np.testing.assert_array_equal(maxes, closes.rolling(20).max())
+
+
+def test_rsi_sma_matches_legacy_formula(closes):
+    """SMA RSI reproduces the original LiveTrader pandas calculation."""
+    delta = closes.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    expected = 100 - (100 / (1 + gain / loss))
+    rsi = RSI(14, method="sma")
+    np.testing.assert_allclose([rsi.update(c) for c in closes], expected, rtol=1e-9)
+
+
+def test_ring_buffer_returns_last_rows_in_order():
+    """The ring buffer view is the last N rows, oldest first."""
+    buf = RingBuffer(3, 1)
+    for i in range(5):
+        buf.append([i])
+    assert buf.full
+    np.testing.assert_array_equal(buf.view().ravel(), [2, 3, 4])
+
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from live_feed import LiveFeedPublisher, LiveFeedSubscriber, publisher_from_env
+
+
+@pytest.fixture
+def subscriber():
+    sub = LiveFeedSubscriber(port=0).start()
+    yield sub
+    sub.stop()
+
+
+def test_published_states_reach_the_subscriber(subscriber):
+    pub = LiveFeedPublisher([("localhost", subscriber.port)])
+    version = subscriber.snapshot()[0]
+    pub.publish("BTC", ts=100.0, price=50_000.0, position=1, equity=101_000.0)
+    version = subscriber.wait(version, timeout=2)
+    pub.publish("BTC", ts=99.0, price=1.0, position=0)           # Llega tarde: se ignora
+    pub.publish("ETH", ts=101.0, price=3_000.0, position=0)
+    deadline = time.time() + 2
+    while len(subscriber.snapshot()[1]) < 2 and time.time() < deadline:
+        subscriber.wait(subscriber.version, timeout=0.1)
+
+    _, states = subscriber.snapshot()
+    assert states["BTC"]["price"] == 50_000.0 and states["BTC"]["position"] == 1
+    assert states["ETH"]["price"] == 3_000.0
+    pub.close()
+
+
+def test_publishing_without_listener_never_raises():
+    pub = LiveFeedPublisher([("127.0.0.1", 9)])
+    for _ in range(100):
+        pub.publish("BTC", price=1.0)
+    assert pub.sent + pub.dropped == 100
+    assert publisher_from_env({}) is None
+    assert publisher_from_env({"LIVE_FEED": "dashboard:9300, 127.0.0.1:9301"}).targets == [
+        ("dashboard", 9300), ("127.0.0.1", 9301)]
+
+
+def test_bind_errors_are_reported_not_raised(subscriber):
+    other = LiveFeedSubscriber(port=subscriber.port).start()
+    assert other.error is not None
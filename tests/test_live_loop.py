@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from live_loop import BackgroundQueue, run_live
+
+
+def test_background_queue_runs_in_order_and_survives_errors():
+    done = []
+    q = BackgroundQueue("test")
+    q.submit(done.append, 1)
+    q.submit(lambda: 1 / 0)
+    q.submit(done.append, 2)
+    q.join()
+    q.close()
+    assert done == [1, 2]
+
+
+class InstantScheduler:
+    def next_close(self):
+        return 0.0, None
+
+
+def test_slow_io_does_not_delay_decisions():
+    """Decisions happen while a persistence call is still blocked."""
+    release = threading.Event()
+    io = BackgroundQueue("slow-db")
+    acted = []
+
+    def act(data, decision):
+        io.submit(release.wait)
+        acted.append((data, decision))
+
+    async def main():
+        task = asyncio.create_task(run_live(InstantScheduler(), fetch=lambda _: len(acted),
+                                            decide=lambda data: data * 10, act=act))
+        start = time.perf_counter()
+        while len(acted) < 3 and time.perf_counter() - start < 5:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    release.set()
+    io.close()
+    assert len(acted) >= 3
+    assert all(decision == data * 10 for data, decision in acted)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from market_data import CandleCache, CandleScheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_candles(start, periods):
+    times = pd.date_range(start, periods=periods, freq="15min", tz="UTC", name="timestamp")
+    close = np.arange(periods, dtype=float) + 100
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0}, index=times)
+
+
+def test_scheduler_sleeps_until_just_after_close():
+    """From 10:07 the bot wakes at 10:15 + grace and reports the 10:00 candle."""
+    now = pd.Timestamp("2026-01-01 10:07", tz="UTC").timestamp()
+    clock = FakeClock(now)
+    scheduler = CandleScheduler('15m', grace_seconds=3.0, clock=clock)
+    open_ts = scheduler.sleep_until_next_close()
+    assert open_ts == pd.Timestamp("2026-01-01 10:00", tz="UTC")
+    assert clock.slept == [8 * 60 + 3.0]
+
+
+def test_scheduler_drops_forming_candle():
+    candles = make_candles("2026-01-01 09:30", 4)  # 09:30 ... 10:15
+    now = pd.Timestamp("2026-01-01 10:20", tz="UTC").timestamp()
+    mask = CandleScheduler('15m', clock=FakeClock(now)).is_closed(candles.index)
+    assert mask.tolist() == [True, True, True, False]
+
+
+def test_cache_appends_only_new_rows(tmp_path):
+    """Overlapping downloads are deduplicated and persisted across restarts."""
+    cache = CandleCache("BTC-USD", cache_dir=str(tmp_path))
+    assert len(cache.append(make_candles("2026-01-01", 10))) == 10
+    new = cache.append(make_candles("2026-01-01 02:00", 5))  # overlaps 02:00 and 02:15
+    assert len(new) == 3
+
+    reloaded = CandleCache("BTC-USD", cache_dir=str(tmp_path))
+    assert len(reloaded.frame) == 13
+    assert reloaded.last_timestamp == pd.Timestamp("2026-01-01 03:00", tz="UTC")
+    assert reloaded.frame.index.is_monotonic_increasing
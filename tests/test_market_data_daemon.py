@@ -0,0 +1,82 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from market_data_daemon import MarketDataClient, MarketDataDaemon, client_from_env
+from replay import ReplaySource, SimulatedClock
+
+TICKERS = ["BTC-USD", "ETH-USD", "SOL-USD"]
+
+
+@pytest.fixture
+def served(make_candles):
+    """Daemon over a ``ReplaySource`` (Yahoo and ccxt upstream), running in its own loop thread."""
+    clock = SimulatedClock(pd.Timestamp("2025-01-10 12:01", tz="UTC"))
+    source = ReplaySource({t: make_candles(seed=i) for i, t in enumerate(TICKERS + ["SOL/USDT"])}, clock)
+    daemon = MarketDataDaemon(yahoo=source, exchange=source, clock=clock, port=0, retries=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(daemon.start(), loop).result(5)
+    yield daemon, source, clock
+    asyncio.run_coroutine_threadsafe(daemon.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def fan_out(daemon, n, call):
+    """``n`` bots, each with its own connection, asking at the same time."""
+    clients = [MarketDataClient(port=daemon.port) for _ in range(n)]
+    with ThreadPoolExecutor(n) as pool:
+        results = list(pool.map(call, clients))
+    for client in clients:
+        client.close()
+    return results
+
+
+def test_upstream_requests_do_not_grow_with_bots(served):
+    daemon, source, clock = served
+    start = pd.Timestamp("2025-01-09", tz="UTC")
+    for bots in (3, 30):
+        results = fan_out(daemon, bots, lambda c: c.fetch_many(TICKERS, start=start))
+        assert daemon.upstream_requests == 1            # Una petición multi-ticker para todos
+    for ticker in TICKERS:
+        direct = source.fetch(ticker, start=start)
+        for frames in results:
+            pd.testing.assert_frame_equal(frames[ticker], direct, check_freq=False)
+
+    # Vela siguiente: un refresco incremental, compartido otra vez
+    clock.sleep(15 * 60)
+    results = fan_out(daemon, 30, lambda c: c.fetch("ETH-USD", start=start))
+    assert daemon.upstream_requests == 2
+    pd.testing.assert_frame_equal(results[0], source.fetch("ETH-USD", start=start), check_freq=False)
+
+
+def test_ccxt_candles_are_shared(served):
+    daemon, source, clock = served
+    rows = fan_out(daemon, 20, lambda c: c.fetch_ohlcv("SOL/USDT", "15m", limit=500))
+    assert daemon.upstream_requests == 1
+    assert all(r == source.fetch_ohlcv("SOL/USDT", "15m", limit=500) for r in rows)
+
+    client = MarketDataClient(port=daemon.port)
+    with pytest.raises(RuntimeError):
+        client.fetch_ticker("SOL/USDT")                 # ReplaySource no tiene ticker: error, no cuelga
+    assert client.stats()['upstream_requests'] >= 1
+    client.close()
+    assert client_from_env({}) is None
+    env_client = client_from_env({"MARKET_DATA": "market_data:9400"})
+    assert (env_client.host, env_client.port) == ("market_data", 9400)
+
+
+def test_client_does_not_pull_in_the_feature_pipeline():
+    # La imagen del sniper (Dockerfile.production) solo copia market_data_daemon.py
+    code = "import sys, market_data_daemon; print(sorted({'market_data', 'timeframes', 'features'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.strip() == "[]"
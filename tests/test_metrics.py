@@ -0,0 +1,31 @@
+import urllib.error
+import urllib.request
+
+import pytest
+from metrics import PHASE_SECONDS, Metrics
+
+
+def test_quantiles_and_prometheus_format():
+    metrics = Metrics()
+    for ms in range(1, 101):
+        metrics.observe(PHASE_SECONDS, ms / 1000, bot="BTC", phase="predict")
+    text = metrics.render()
+    assert "# TYPE live_cycle_phase_seconds summary" in text
+    assert 'live_cycle_phase_seconds{bot="BTC",phase="predict",quantile="0.5"} 0.0505' in text
+    assert 'live_cycle_phase_seconds_count{bot="BTC",phase="predict"} 100' in text
+    assert "predict p50=50.5 p95=95.0 p99=99.0ms (n=100)" in metrics.summary()
+
+
+def test_endpoint_serves_metrics():
+    metrics = Metrics()
+    with metrics.timer(PHASE_SECONDS, bot="SOL", phase="fetch"):
+        pass
+    server = metrics.serve(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        body = urllib.request.urlopen(f"{url}/metrics", timeout=5).read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+    finally:
+        server.shutdown()
+    assert 'phase="fetch"' in body
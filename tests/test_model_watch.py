@@ -0,0 +1,46 @@
+import os
+
+from model_watch import ModelWatcher
+
+
+def write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def validate(model):
+    if model == "broken":
+        raise ValueError("invalid model")
+
+
+def test_new_model_is_loaded_once_stable_and_taken_once(tmp_path):
+    path = tmp_path / "ppo_btc_final.zip"
+    write(path, "v1", 1_000_000_000)
+    watcher = ModelWatcher(str(path), loader=lambda p: open(p).read(), validate=validate)
+    assert not watcher.check()
+
+    write(path, "v2", 2_000_000_000)
+    assert not watcher.check()      # Recién escrito: esperar un sondeo más
+    assert watcher.check()
+    assert watcher.take() == "v2"
+    assert watcher.take() is None
+    assert not watcher.check()
+
+
+def test_invalid_model_is_discarded(tmp_path):
+    path = tmp_path / "ppo_btc_final.zip"
+    write(path, "v1", 1_000_000_000)
+    loads = []
+    watcher = ModelWatcher(str(path), loader=lambda p: loads.append(p) or open(p).read(), validate=validate)
+
+    write(path, "broken", 2_000_000_000)
+    watcher.check()
+    assert not watcher.check()
+    assert not watcher.check()      # La misma versión rota no se vuelve a cargar
+    assert watcher.take() is None
+    assert len(loads) == 1
+
+
+def test_missing_file_is_ignored(tmp_path):
+    watcher = ModelWatcher(str(tmp_path / "none.zip"), loader=open)
+    assert not watcher.check()
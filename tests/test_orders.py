@@ -0,0 +1,92 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import FILL_LATENCY, Metrics
+from orders import OrderGateway, OrderRouter, PaperExchange, bench, gateway_from_env
+from replay import ReplaySource, SimulatedClock
+
+
+@pytest.fixture
+def candles(make_candles):
+    return make_candles(close=np.linspace(100, 110, 200), spread=0.01)
+
+
+def test_market_limit_and_cancel_against_replayed_candles(candles):
+    clock = SimulatedClock(pd.Timestamp("2025-01-02 00:01", tz="UTC"))
+    source = ReplaySource(candles, clock)
+    metrics = Metrics()
+
+    async def scenario():
+        async with PaperExchange(source, latency=0.001, fee=0.001, match_interval=0.01) as exchange:
+            async with OrderGateway(port=exchange.port, bot="SOL", metrics=metrics) as gateway:
+                fills = []
+                gateway.on_fill.append(fills.append)
+                price = source.fetch_ohlcv("SOL/USDT", limit=1)[-1][4]
+
+                market = await gateway.wait(await gateway.submit("SOL/USDT", "buy", 2.0))
+                assert market.status == "filled" and market.fill_price == price
+                assert market.fee == price * 2.0 * 0.001
+
+                limit = await gateway.submit("SOL/USDT", "sell", 1.0, type="limit", price=price + 0.5)
+                await asyncio.sleep(0.05)
+                assert limit.status == "open"                   # Aún no se ha negociado a ese precio
+                clock.sleep(3 * 60 * 60)                        # Velas posteriores lo alcanzan
+                await gateway.wait(limit, timeout=2)
+                assert limit.status == "filled" and limit.fill_price >= price + 0.5
+
+                resting = await gateway.submit("SOL/USDT", "buy", 1.0, type="limit", price=1.0)
+                assert (await gateway.cancel(resting)).status == "canceled"
+                return fills
+
+    fills = asyncio.run(scenario())
+    assert [o.side for o in fills] == ["buy", "sell"]
+    (name, labels, count, _, _), = metrics.snapshot()
+    assert name == FILL_LATENCY and labels == {'bot': 'SOL'} and count == 2
+
+
+def test_bench_fills_every_order(candles):
+    clock = SimulatedClock(pd.Timestamp("2025-01-02 00:01", tz="UTC"))
+    stats = asyncio.run(bench(ReplaySource(candles, clock), "SOL/USDT", orders=200, latency=0.001))
+    assert stats['filled'] == 200 and stats['p50_ms'] >= 1.0
+
+
+def test_dropped_connection_rejects_open_orders_and_reconnects(candles):
+    clock = SimulatedClock(pd.Timestamp("2025-01-02 00:01", tz="UTC"))
+    source = ReplaySource(candles, clock)
+
+    async def scenario():
+        exchange = await PaperExchange(source, match_interval=0.01).start()
+        gateway = await OrderGateway(port=exchange.port, bot="SOL").connect()
+        resting = await gateway.submit("SOL/USDT", "buy", 1.0, type="limit", price=1.0)
+        await exchange.stop()
+        gateway._writer.transport.abort()                  # El exchange cae con la orden abierta
+        await gateway.wait(resting, timeout=2)
+        assert resting.status == "rejected" and resting.reason == "disconnected"
+
+        async with PaperExchange(source, port=exchange.port):
+            order = await gateway.wait(await asyncio.wait_for(gateway.submit("SOL/USDT", "buy", 1.0), 2), timeout=2)
+            assert order.status == "filled"
+            await gateway.close()
+
+    asyncio.run(scenario())
+
+
+def test_router_sends_from_synchronous_code(candles):
+    clock = SimulatedClock(pd.Timestamp("2025-01-02 00:01", tz="UTC"))
+    source = ReplaySource(candles, clock)
+    exchange = PaperExchange(source)
+    router = OrderRouter(OrderGateway(bot="SNIPER"), timeout=2)
+    asyncio.run_coroutine_threadsafe(exchange.start(), router._loop).result(2)
+    router.gateway.port = exchange.port
+
+    buy, sell = router.send("SOL/USDT", "buy", 1.5), router.send("SOL/USDT", "sell", 1.5)
+    assert buy.result(2).status == sell.result(2).status == "filled"
+    router.close()
+    assert router.gateway._writer is None and not router._thread.is_alive()
+
+    assert gateway_from_env("X", {}) is None
+    gateway = gateway_from_env("X", {"ORDER_GATEWAY": "paper:9200"})
+    assert (gateway.host, gateway.port, gateway.bot) == ("paper", 9200, "X")
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from policy_batch import StackedPolicies
+from trading_env import TradingEnv
+
+PPO = pytest.importorskip("stable_baselines3").PPO
+
+
+@pytest.fixture(scope="module")
+def env():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+    return TradingEnv(pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0}))
+
+
+def test_batched_actions_match_individual_predict(env):
+    """One vmapped forward gives the same deterministic actions as each policy.predict."""
+    policies = {f"A{i}": PPO("MlpPolicy", env, seed=i, device="cpu").policy for i in range(3)}
+    policies["WIDE"] = PPO("MlpPolicy", env, seed=9, device="cpu", policy_kwargs={'net_arch': [32]}).policy
+    stacked = StackedPolicies(policies)
+    assert len(stacked.groups) == 2
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        obs = {name: rng.normal(size=env.observation_space.shape).astype(np.float32) for name in policies}
+        expected = {name: int(p.predict(obs[name], deterministic=True)[0]) for name, p in policies.items()}
+        assert stacked.predict(obs) == expected
+
+    # Activos sin observación en este ciclo simplemente no deciden
+    partial = {"A1": obs["A1"]}
+    assert stacked.predict(partial) == {"A1": expected["A1"]}
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("ccxt")
+import sol_sniper_bot
+from replay import ReplaySource, SimulatedClock
+from scanner import BreakoutScanner
+
+
+def test_vectorized_signals_match_the_single_symbol_bot(make_candles):
+    symbols = ["SOL/USDT", "ETH/USDT", "DOGE/USDT", "NEW/USDT"]
+    frames = {s: make_candles(800, seed=i, vol=0.005, spread=0.003, base=50.0) for i, s in enumerate(symbols)}
+    frames["NEW/USDT"] = frames["NEW/USDT"].iloc[650:]        # Par recién listado: poca historia
+    clock = SimulatedClock(pd.Timestamp("2025-01-08 00:01", tz="UTC"))
+    params = {"ETH/USDT": dict(sol_sniper_bot.PARAMS, breakout_period=11, ema_period=42)}
+
+    scanner = BreakoutScanner(symbols, params, client=ReplaySource(frames, clock), clock=clock, workers=4)
+    for _ in range(3):
+        result = scanner.scan()
+        for symbol in symbols:
+            price, level, ema = sol_sniper_bot.calculate_signals(scanner.buffers[symbol].copy(), scanner.params[symbol])
+            row = result.loc[symbol]
+            assert row['price'] == pytest.approx(price)
+            assert row['ema'] == pytest.approx(ema)
+            assert row['breakout_level'] == pytest.approx(level, nan_ok=True)
+            assert row['signal'] == bool(price > level and price > ema)
+        clock.sleep(15 * 60)
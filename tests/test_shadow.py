@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+import torch
+from config import get_asset_config
+from positions import PositionBook
+from replay import replay_live_trader
+from trading_env import TradingEnv
+
+PPO = pytest.importorskip("stable_baselines3").PPO
+
+
+def test_book_applies_stop_loss_and_cooldown():
+    book = PositionBook("BTC", get_asset_config("BTC"), log=None)
+    t0 = datetime(2026, 1, 1, 10, 0).timestamp()
+    assert book.execute(1, 100.0, datetime.fromtimestamp(t0))['action'] == "COMPRA"
+    # Hold, pero el precio cae más que el stop loss: venta forzada
+    trade = book.execute(0, 96.0, datetime.fromtimestamp(t0 + 900))
+    assert trade['action'] == "VENTA" and trade['pnl_pct'] == pytest.approx(-4.0)
+    # Enfriamiento: la compra inmediata se ignora
+    assert book.execute(1, 96.0, datetime.fromtimestamp(t0 + 1800)) is None
+    assert book.current_position == 0
+
+
+@pytest.fixture
+def candles(make_candles):
+    return make_candles(1800, seed=11, vol=0.006, spread=0.0)
+
+
+def always(action, env, seed):
+    policy = PPO("MlpPolicy", env, seed=seed, device="cpu").policy
+    with torch.no_grad():
+        policy.action_net.weight.zero_()
+        policy.action_net.bias.copy_(torch.tensor([0.0, 0.0, 0.0]))
+        policy.action_net.bias[action] = 10.0
+    return policy
+
+
+def test_shadows_trade_their_own_books(candles):
+    """A shadow identical to the active model records exactly the active trades under its own name."""
+    env = TradingEnv(candles.reset_index(drop=True).iloc[:400])
+    active = always(1, env, seed=0)
+    shadows = {"same": always(1, env, seed=1), "hold": always(0, env, seed=2)}
+    trader, _ = replay_live_trader(candles, "BTC", model=active, bars=700, start_bars=1000, shadows=shadows)
+
+    trades = {}
+    for _, (bot_name, trade) in (c for c in trader.persistence.calls if c[0] == 'write_trade'):
+        trades.setdefault(bot_name, []).append((trade['action'], trade['price']))
+    assert len(trades["BTC"]) >= 2
+    assert trades["BTC_SHADOW_same"] == trades["BTC"]
+    assert "BTC_SHADOW_hold" not in trades
+    assert trader.shadows.books["same"].sim_balance == trader.sim_balance
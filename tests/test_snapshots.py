@@ -0,0 +1,59 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+from positions import PositionBook
+from snapshots import SNAPSHOT_VERSION, frame_from_state, frame_to_state, load_snapshot, save_snapshot
+
+
+def candles(n=5):
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", tz="UTC", name="timestamp").as_unit("ns")
+    return pd.DataFrame({"Open": range(n), "Close": [x + 0.5 for x in range(n)]}, index=index, dtype="float64")
+
+
+def test_save_is_atomic_and_roundtrips(tmp_path):
+    path = str(tmp_path / "state" / "btc.json")
+    save_snapshot(path, {"balance": 1.5, "candles": frame_to_state(candles())})
+    state = load_snapshot(path)
+    assert state["version"] == SNAPSHOT_VERSION
+    assert state["balance"] == 1.5
+    pd.testing.assert_frame_equal(frame_from_state(state["candles"]), candles(), check_freq=False)
+    assert os.listdir(tmp_path / "state") == ["btc.json"]   # Sin temporales sueltos
+
+
+def test_unreadable_or_missing_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "btc.json"
+    assert load_snapshot(str(path)) is None
+    path.write_text('{"balance": ')                         # Escritura cortada
+    assert load_snapshot(str(path)) is None
+    assert load_snapshot(None) is None
+
+
+def test_position_book_state_roundtrip():
+    config = SimpleNamespace(env_params={})
+    now = pd.Timestamp("2024-01-01 12:00", tz="UTC")
+    book = PositionBook("BTC", config, now=now, log=None)
+    book.execute(1, 100.0, now)
+    book.execute(2, 110.0, now + pd.Timedelta(hours=1))
+
+    restored = PositionBook("BTC", config, log=None)
+    restored.restore(book.state())
+    assert restored.state() == book.state()
+    assert restored.sim_balance == 110000.0 and restored.wins == 1
+
+
+def test_open_position_keeps_its_quantity_across_restarts():
+    config = SimpleNamespace(env_params={})
+    now = pd.Timestamp("2024-01-01 12:00", tz="UTC")
+    book = PositionBook("BTC", config, now=now, log=None)
+    assert book.execute(1, 100.0, now)['qty'] == 1000.0
+
+    restored = PositionBook("BTC", config, log=None)
+    restored.restore(book.state())
+    assert restored.execute(2, 110.0, now + pd.Timedelta(hours=1))['qty'] == 1000.0
+
+    legacy = {k: v for k, v in book.state().items() if k != 'position_qty'}   # Snapshot sin cantidad
+    restored = PositionBook("BTC", config, log=None)
+    restored.restore(legacy)
+    assert restored.position_qty == 1000.0
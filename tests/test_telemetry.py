@@ -0,0 +1,54 @@
+import logging
+import threading
+import time
+
+from telemetry import ScalarSink, setup_logging
+
+
+class SlowWriter:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.scalars = []
+        self.flushes = 0
+        self.thread = None
+
+    def add_scalar(self, tag, value, step):
+        self.scalars.append((tag, value, step))
+        self.thread = threading.current_thread().name
+
+    def flush(self):
+        time.sleep(self.delay)                    # Disco lento
+        self.flushes += 1
+
+
+def test_scalars_are_batched_off_the_calling_thread():
+    btc, eth = SlowWriter(delay=0.2), SlowWriter()
+    sink = ScalarSink(flush_interval=0.05)
+    started = time.perf_counter()
+    for step in range(100):
+        sink.add_scalars(btc, step, {"FTMO_Sim/Balance": 1000.0 + step, "FTMO_Sim/WinRate": 50.0})
+        sink.add_scalars(eth, step, {"FTMO_Sim/Balance": 2000.0})
+    assert time.perf_counter() - started < 0.1
+    sink.close()
+
+    assert len(btc.scalars) == 200 and len(eth.scalars) == 100 and sink.written == 300
+    assert btc.scalars[0] == ("FTMO_Sim/Balance", 1000.0, 0)
+    assert btc.flushes < 10 and btc.thread == "tensorboard"
+
+
+def test_logging_goes_through_a_queue_to_a_rotating_file(tmp_path):
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    path = tmp_path / "live_trader.log"
+    listener = setup_logging(str(path), max_bytes=2000, backup_count=2)
+    try:
+        assert [type(h).__name__ for h in root.handlers] == ["QueueHandler"]
+        for i in range(200):
+            logging.getLogger("bot").info(f"🟢 [COMPRA] SEÑAL DETECTADA {i}")
+    finally:
+        listener.stop()
+        root.handlers[:], _ = saved
+        root.setLevel(saved[1])
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["live_trader.log", "live_trader.log.1", "live_trader.log.2"]
+    assert "SEÑAL DETECTADA 199" in path.read_text(encoding="utf-8")
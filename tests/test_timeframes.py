@@ -0,0 +1,61 @@
+import pytest
+import timeframes
+from timeframes import TimeframeCache, add_timeframe_features, resample_ohlcv
+from trading_env import TradingEnv
+
+
+@pytest.fixture
+def candles(make_candles):
+    df = make_candles(2000, seed=3, vol=0.01, spread=0.001, tz=None, start="2026-01-01")
+    return df.reset_index(drop=True).assign(Datetime=df.index.astype(str))[['Datetime', *df.columns]]
+
+
+def test_resample_aggregates_ohlcv(candles):
+    """1h bars take the first open, max high, min low, last close and summed volume."""
+    bars = resample_ohlcv(candles, '1h')
+    first = candles.iloc[:4]
+    assert bars['Open'].iloc[0] == first['Open'].iloc[0]
+    assert bars['High'].iloc[0] == first['High'].max()
+    assert bars['Close'].iloc[0] == first['Close'].iloc[-1]
+    assert bars['Volume'].iloc[0] == 4.0
+
+
+def test_alignment_has_no_lookahead(candles):
+    """A 15m row only sees the last 1h bar that closed at or before its own close."""
+    out = add_timeframe_features(candles, ('1h',), columns=('Close',), cache=TimeframeCache(cache_dir=None))
+    col = out['Close_1h']
+    # 00:00-00:30 rows close before the first 1h bar does
+    assert col.iloc[:3].isna().all()
+    # The 00:45 row closes at 01:00 together with the 00:00 bar
+    assert col.iloc[3] == candles['Close'].iloc[3]
+    # 01:30 (closes 01:45) still sees the 00:00 bar, not the forming 01:00 one
+    assert col.iloc[6] == candles['Close'].iloc[3]
+
+
+def test_env_appends_timeframe_columns(candles, monkeypatch):
+    """TradingEnv can request extra higher-timeframe observation columns."""
+    monkeypatch.setattr(timeframes, "_default_cache", TimeframeCache(cache_dir=None))
+    env = TradingEnv(candles, mtf_timeframes=('1h', '4h'))
+    assert env.observation_space.shape == (60, 6 + 2 * 4 + 2)
+    assert 'EMA_50_Dist_4h' in env.obs_cols
+
+
+def test_disk_cache_misses_on_revised_rows_or_pipeline(candles, tmp_path, monkeypatch):
+    TimeframeCache(cache_dir=str(tmp_path)).bars(candles, '1h')
+    assert len(list(tmp_path.iterdir())) == 1
+    TimeframeCache(cache_dir=str(tmp_path)).bars(candles.copy(), '1h')
+    assert len(list(tmp_path.iterdir())) == 1                  # Mismos datos: se reutiliza
+
+    revised = candles.copy()
+    revised.loc[1000, 'Close'] *= 1.01                        # Fila intermedia corregida al re-descargar
+    bars = TimeframeCache(cache_dir=str(tmp_path)).bars(revised, '1h')
+    assert len(list(tmp_path.iterdir())) == 2
+    assert bars['Close'].iloc[250] == revised['Close'].iloc[1003]
+
+    from features import Ema, FeaturePipeline
+    pipeline = timeframes.PIPELINE
+    changed = FeaturePipeline(pipeline.steps[:3] + (Ema('EMA_20', span=21),) + pipeline.steps[4:], pipeline.obs_columns)
+    assert changed.signature != pipeline.signature
+    monkeypatch.setattr(timeframes, "PIPELINE", changed)
+    TimeframeCache(cache_dir=str(tmp_path)).bars(candles, '1h')
+    assert len(list(tmp_path.iterdir())) == 3
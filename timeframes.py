@@ -0,0 +1,140 @@
+"""
+Higher-timeframe context derived from the stored 15m base series.
+
+The 15m candles are resampled to 1h/4h/... bars, the shared feature pipeline
+is run on those bars, and the result is aligned back onto the 15m index
+using each bar's *close* time, so a 15m row only sees higher-timeframe bars
+that had already closed (no lookahead).
+
+Aggregated bars and their indicators are cached in memory and on disk
+(``data/cache/mtf``), keyed on the full candle series and the pipeline
+signature, so asking for extra timeframes costs almost nothing after the
+first load.
+"""
+import hashlib
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features import PIPELINE, compute_features
+
+BASE_TIMEFRAME = '15m'
+CACHE_DIR = "data/cache/mtf"
+
+# Pipeline columns exposed per higher timeframe (suffixed with ``_<tf>``)
+MTF_COLUMNS = ('RSI_Norm', 'MACD_Hist', 'EMA_20_Dist', 'EMA_50_Dist')
+
+_OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def to_offset(timeframe: str) -> pd.Timedelta:
+    """'15m' / '1h' / '4h' / '1d' -> Timedelta."""
+    units = {'m': 'min', 'h': 'h', 'd': 'D'}
+    return pd.Timedelta(int(timeframe[:-1]), unit=units[timeframe[-1]])
+
+
+def candle_times(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """Open time of every candle, from the index or a Datetime/timestamp column."""
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index
+    for col in ('Datetime', 'timestamp', 'Date'):
+        if col in df.columns:
+            return pd.DatetimeIndex(pd.to_datetime(df[col], format='ISO8601'))
+    raise ValueError("No se encontró columna de tiempo (Datetime/timestamp) en el DataFrame")
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Aggregate base candles into ``timeframe`` bars labelled by their open time."""
+    base = df[[c for c in _OHLCV_AGG if c in df.columns]].set_axis(candle_times(df))
+    agg = {c: f for c, f in _OHLCV_AGG.items() if c in base.columns}
+    bars = base.resample(to_offset(timeframe), label='left', closed='left').agg(agg)
+    return bars.dropna(subset=['Close'])
+
+
+def align_to_base(htf: pd.DataFrame, base_times: pd.DatetimeIndex, timeframe: str,
+                  base_timeframe: str = BASE_TIMEFRAME) -> np.ndarray:
+    """
+    Row of ``htf`` visible to each base candle.
+
+    A higher-timeframe bar becomes available when it closes
+    (``open + timeframe``); a base candle is decided at its own close
+    (``open + base_timeframe``). Returns -1 where no bar has closed yet.
+    """
+    available_at = (htf.index + to_offset(timeframe)).asi8
+    decided_at = (base_times + to_offset(base_timeframe)).asi8
+    return np.searchsorted(available_at, decided_at, side='right') - 1
+
+
+def _fingerprint(df: pd.DataFrame, times: pd.DatetimeIndex) -> str:
+    """
+    Identity of the cached bars: every candle (times and OHLCV) plus the
+    pipeline signature, so revised rows or a changed ``PIPELINE`` miss the
+    cache. Hashing is cheap next to the resample.
+    """
+    digest = hashlib.sha1(PIPELINE.signature.encode())
+    digest.update(np.ascontiguousarray(times.asi8).tobytes())
+    for col in _OHLCV_AGG:
+        if col in df.columns:
+            digest.update(col.encode())
+            digest.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class TimeframeCache:
+    """Memory + disk cache of resampled bars with their pipeline features."""
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory: Dict[Tuple[str, str], pd.DataFrame] = {}
+
+    def bars(self, df: pd.DataFrame, timeframe: str, times: Optional[pd.DatetimeIndex] = None) -> pd.DataFrame:
+        times = candle_times(df) if times is None else times
+        key = (_fingerprint(df, times), timeframe)
+        if key in self._memory:
+            return self._memory[key]
+
+        path = os.path.join(self.cache_dir, f"{key[0]}_{timeframe}.pkl") if self.cache_dir else None
+        if path and os.path.exists(path):
+            bars = pd.read_pickle(path)
+        else:
+            bars = compute_features(resample_ohlcv(df.set_axis(times), timeframe))
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                bars.to_pickle(tmp_path)
+                os.replace(tmp_path, path)
+
+        self._memory[key] = bars
+        return bars
+
+
+_default_cache = TimeframeCache()
+
+
+def add_timeframe_features(df: pd.DataFrame, timeframes: Sequence[str] = ('1h', '4h'),
+                           columns: Sequence[str] = MTF_COLUMNS,
+                           cache: Optional[TimeframeCache] = None) -> pd.DataFrame:
+    """
+    Return a copy of the 15m ``df`` with ``<column>_<tf>`` columns added.
+
+    Rows before the first closed higher-timeframe bar get ``nan``.
+    """
+    cache = cache or _default_cache
+    times = candle_times(df)
+    new = {}
+    for tf in timeframes:
+        bars = cache.bars(df, tf, times)
+        pos = align_to_base(bars, times, tf)
+        valid = pos >= 0
+        for col in columns:
+            values = np.full(len(df), np.nan)
+            values[valid] = bars[col].to_numpy()[pos[valid]]
+            new[f"{col}_{tf}"] = values
+    extra = pd.DataFrame(new, index=df.index)
+    return pd.concat([df.drop(columns=[c for c in new if c in df.columns]), extra], axis=1)
+
+
+def timeframe_columns(timeframes: Sequence[str], columns: Sequence[str] = MTF_COLUMNS):
+    return [f"{col}_{tf}" for tf in timeframes for col in columns]
@@ -2,6 +2,8 @@ import gymnasium as gym
 import numpy as np
 import pandas as pd
 from gymnasium import spaces
+from features import compute_features, OBS_COLUMNS
+from timeframes import add_timeframe_features, timeframe_columns
 
 class TradingEnv(gym.Env):
     """
@@ -13,9 +15,14 @@ class TradingEnv(gym.Env):
     def __init__(self, df, initial_balance=10000, commission=0.0001, window_size=60, 
                  cooldown_steps=8, stop_loss=0.02, trailing_stop_threshold=0.03, 
                  trailing_stop_drop=0.015, risk_aversion=2.5, ema_penalty=0.05, 
-                 vol_penalty=0.05, position_size_pct=0.40):
+                 vol_penalty=0.05, position_size_pct=0.40, mtf_timeframes=None):
         super(TradingEnv, self).__init__()
 
+        # Optional higher-timeframe context derived from the 15m series (e.g. ('1h', '4h'))
+        self.mtf_timeframes = tuple(mtf_timeframes or ())
+        if self.mtf_timeframes:
+            df = add_timeframe_features(df, self.mtf_timeframes)
+
         self.df = df.reset_index(drop=True)
         self.window_size = window_size
         self.initial_balance = initial_balance
@@ -34,28 +41,13 @@ class TradingEnv(gym.Env):
         # Action Space: 0 = Hold, 1 = Buy, 2 = Sell
         self.action_space = spaces.Discrete(3)
 
-        # --- PHASE 3: Features ---
-        # 1. Log Returns
-        self.df['Log_Ret'] = np.log(self.df['Close'] / self.df['Close'].shift(1)).fillna(0)
-        
-        # 2. RSI (Normalized 0-1)
-        self.df['RSI_Norm'] = self.df['RSI'] / 100.0
-        
-        # 3. MACD (Momentum Architecture) - REPLACES BOLINGER
-        ema_12 = self.df['Close'].ewm(span=12, adjust=False).mean()
-        ema_26 = self.df['Close'].ewm(span=26, adjust=False).mean()
-        macd = ema_12 - ema_26
-        signal = macd.ewm(span=9, adjust=False).mean()
-        self.df['MACD_Hist'] = (macd - signal) / self.df['Close'] # Normalized
-        self.df['MACD_Hist'] = self.df['MACD_Hist'].fillna(0)
-        
-        # 4. EMA Distances (Short & Long Term)
-        self.df['EMA_20_Dist'] = (self.df['Close'] / self.df['EMA_20']) - 1
-        self.df['EMA_50_Dist'] = (self.df['Close'] / self.df['EMA_50']) - 1
-        self.df['EMA_200_Dist'] = (self.df['Close'] / self.df['EMA_200']) - 1 # MARKET REGIME
+        # --- PHASE 3: Features (shared pipeline, see features.py) ---
+        # Log Returns, RSI (Normalized 0-1), MACD Histogram (momentum, replaces Bollinger)
+        # and EMA distances (short & long term / market regime)
+        self.df = compute_features(self.df)
 
         # Select Features (MOMENTUM FOCUSED)
-        self.obs_cols = ['Log_Ret', 'RSI_Norm', 'MACD_Hist', 'EMA_20_Dist', 'EMA_50_Dist', 'EMA_200_Dist']
+        self.obs_cols = list(OBS_COLUMNS) + timeframe_columns(self.mtf_timeframes)
         self.n_features = len(self.obs_cols) + 2 # +2 for account
         
         # Pre-compute Data Matrix
@@ -131,7 +131,9 @@ def train_production_asset(symbol_name: str, total_timesteps: Optional[int] = No
         
         # 7. Final Save
         final_path = os.path.join(models_dir, f"ppo_{symbol_name.lower()}_final")
-        model.save(final_path)
+        # Escritura atómica: el live trader recarga este archivo en caliente
+        model.save(f"{final_path}.tmp.zip")
+        os.replace(f"{final_path}.tmp.zip", f"{final_path}.zip")
         print(f"💾 Modelo final guardado en: {final_path}.zip")
         print("✅ Entrenamiento de producción finalizado.")
         